@@ -9,7 +9,7 @@ const auth = window.auth;
 const H = window.helpers;
 
 // state
-let page = 1, size = 12, loading = false, hasMore = true;
+let cursor = null, size = 12, loading = false, hasMore = true;
 let skillsChart = null, farmChart = null;
 
 // safe API + redirect if unauthorized
@@ -65,11 +65,11 @@ function renderPostCard(p) {
     </div>
     <div class="post-body">${H.escape(p.text || '')}</div>
     ${p.media ? (p.mediaType === 'video'
-      ? `<video controls src="${H.escape(p.media)}" style="max-width:100%;margin-top:8px;border-radius:8px"></video>`
-      : `<img src="${H.escape(p.media)}" alt="post media" style="max-width:100%;margin-top:8px;border-radius:8px">`) : ''}
+      ? `<video controls preload="none" ${p.variants?.poster ? `poster="${H.escape(p.variants.poster)}"` : ''} src="${H.escape(p.media)}" style="max-width:100%;margin-top:8px;border-radius:8px"></video>`
+      : renderPicture(p)) : ''}
     <div class="post-actions" style="margin-top:10px;display:flex;gap:8px;align-items:center">
       <button class="btn ghost approve-btn" data-id="${p.id}">❤️ ${p.approvals||0}</button>
-      <button class="btn ghost comment-btn" data-id="${p.id}">💬 ${(p.comments||[]).length}</button>
+      <button class="btn ghost comment-btn" data-id="${p.id}">💬 ${p.commentCount ?? (p.comments||[]).length}</button>
       <button class="btn ghost share-btn" data-id="${p.id}">🔁 ${p.shares||0}</button>
     </div>
     <div class="comments-section" id="comments-${p.id}" hidden></div>
@@ -77,19 +77,29 @@ function renderPostCard(p) {
   return article;
 }
 
+// responsive image: server-side variants (webp/jpeg srcset) when the media worker has run
+function renderPicture(p) {
+  const v = p.variants || {};
+  const img = `<img src="${H.escape(p.media)}" alt="post media" loading="lazy" decoding="async" sizes="(max-width: 700px) 100vw, 640px" ${v['image/jpeg'] ? `srcset="${H.escape(v['image/jpeg'])}"` : ''} style="max-width:100%;margin-top:8px;border-radius:8px">`;
+  if (!v['image/webp']) return img;
+  return `<picture><source type="image/webp" srcset="${H.escape(v['image/webp'])}" sizes="(max-width: 700px) 100vw, 640px">${img}</picture>`;
+}
+
 async function loadFeed() {
   if (loading || !hasMore) return;
   loading = true;
   $('loader').classList.remove('hidden');
   try {
-    const payload = await safeJson(`/posts?page=${page}&limit=${size}`, { method: 'GET' });
+    const qs = cursor ? `limit=${size}&cursor=${encodeURIComponent(cursor)}` : `limit=${size}`;
+    const payload = await safeJson(`/posts?${qs}`, { method: 'GET' });
     const posts = Array.isArray(payload.posts) ? payload.posts : (Array.isArray(payload) ? payload : []);
     posts.forEach(p => $('feed').appendChild(renderPostCard(p)));
-    page++;
-    hasMore = (payload.hasMore !== undefined) ? payload.hasMore : (posts.length === size);
+    cursor = payload.nextCursor || null;
+    hasMore = Boolean(cursor);
+    watchFeed();
   } catch (err) {
     console.warn('loadFeed error', err);
-    if (page === 1) {
+    if (!$('feed').querySelector('.post-card')) {
       const msg = create('div','card'); msg.textContent = 'Unable to load feed right now.';
       $('feed').appendChild(msg);
     }
@@ -143,12 +153,12 @@ $('postBtn').addEventListener('click', async () => {
     const res = await API.request('/posts', { method: 'POST', body: form, skipJson: true });
     if (!res.ok) throw new Error('post failed');
     const created = await res.json();
-    $('feed').prepend(renderPostCard(created));
+    // the stream echoes it back as a "post" event; that one is skipped as already shown
+    if (!postCard(created.id)) $('feed').prepend(renderPostCard(created));
     resetComposer();
+    watchFeed();
 
     // sync with analytics + sidepanel
-    userData.listings.push(`🆕 ${created.text || 'New Post'}`);
-    renderPanel("listings");
     updateAnalytics();
   } catch (err) {
     console.error('post error', err);
@@ -182,12 +192,26 @@ $('feed').addEventListener('click', async (ev) => {
     box.hidden = !box.hidden;
     if (!box.hidden && box.childElementCount === 0) {
       try {
-        const r = await API.request(`/posts/${id}/comments`, { method: 'GET' });
+        const r = await API.request(`/posts/${id}/comments?limit=20`, { method: 'GET' });
         if (r.ok) {
-          const comments = await r.json();
-          comments.forEach(c => {
-            const p = create('p'); p.className = 'muted'; p.textContent = `${c.user?.name || 'User'}: ${c.text}`;
-            box.appendChild(p);
+          // paginated: { comments, hasMore, nextCursor }, oldest first
+          const page = await r.json();
+          const more = create('button', 'btn ghost'); more.textContent = 'Show more comments';
+          const addComments = list => list.forEach(c => {
+            if (box.querySelector(`[data-cid="${c.id}"]`)) return;
+            box.insertBefore(commentLine(c), more);
+          });
+          box.appendChild(more);
+          let next = page.nextCursor;
+          addComments(page.comments || []);
+          more.hidden = !page.hasMore;
+          more.addEventListener('click', async () => {
+            const rn = await API.request(`/posts/${id}/comments?limit=20&cursor=${encodeURIComponent(next)}`, { method: 'GET' });
+            if (!rn.ok) return;
+            const pg = await rn.json();
+            addComments(pg.comments || []);
+            next = pg.nextCursor;
+            more.hidden = !pg.hasMore;
           });
           const ta = create('textarea'); ta.rows=2; ta.placeholder='Write a comment...';
           const b = create('button','btn primary'); b.textContent='Comment';
@@ -197,8 +221,7 @@ $('feed').addEventListener('click', async (ev) => {
               const rr = await API.request(`/posts/${id}/comments`, { method: 'POST', body: JSON.stringify({ text: content }), headers: {'Content-Type':'application/json'} });
               if (rr.ok) {
                 const created = await rr.json();
-                const p = create('p'); p.className='muted'; p.textContent = `${created.user?.name || 'User'}: ${created.text}`;
-                box.insertBefore(p, ta);
+                if (!box.querySelector(`[data-cid="${created.id}"]`)) box.insertBefore(commentLine(created), more);
                 ta.value = '';
               }
             } catch { alert('Could not post comment'); }
@@ -223,6 +246,70 @@ $('feed').addEventListener('click', async (ev) => {
   }
 });
 
+// =======================
+// Live updates (GET /events, text/event-stream)
+// =======================
+// One stream for the feed plus the visible posts; reopened whenever that set changes.
+const MAX_WATCHED = 200; // EVENTS_MAX_WATCHED_POSTS on the server
+let stream = null, watching = null;
+
+const postCard = id => $('feed').querySelector(`.post-card[data-id="${id}"]`);
+
+function commentLine(c) {
+  const p = create('p'); p.className = 'muted'; p.dataset.cid = c.id;
+  p.textContent = `${c.user?.name || 'User'}: ${c.text}`;
+  return p;
+}
+
+function bumpButton(btn, icon, value) {
+  if (btn) btn.textContent = `${icon} ${value}`;
+}
+
+const streamHandlers = {
+  post: p => {
+    if (postCard(p.id)) return;
+    $('feed').prepend(renderPostCard(p));
+    watchFeed();
+  },
+  counts: c => {
+    const card = postCard(c.postId);
+    if (!card) return;
+    bumpButton(card.querySelector('.approve-btn'), '❤️', c.approvals || 0);
+    bumpButton(card.querySelector('.share-btn'), '🔁', c.shares || 0);
+  },
+  comment: ({ postId, comment }) => {
+    const card = postCard(postId);
+    if (!card) return;
+    const btn = card.querySelector('.comment-btn');
+    bumpButton(btn, '💬', (parseInt(btn.textContent.replace(/\D/g, ''), 10) || 0) + 1);
+    // only threads opened and paged to the end; otherwise it arrives with the next page
+    const box = $(`comments-${postId}`);
+    const more = box && box.querySelector(':scope > button');
+    if (more && more.hidden && !box.querySelector(`[data-cid="${comment.id}"]`)) box.insertBefore(commentLine(comment), more);
+  },
+  // the server dropped events for us: start over from the first page
+  resync: () => {
+    $('feed').innerHTML = '';
+    cursor = null; hasMore = true;
+    loadFeed();
+  },
+};
+
+const watchFeed = H.debounce(() => {
+  const ids = [...$('feed').querySelectorAll('.post-card')].map(el => el.dataset.id).filter(Boolean).slice(0, MAX_WATCHED);
+  const key = ids.join(',');
+  if (stream && key === watching) return;
+  if (stream) stream.close();
+  watching = key;
+  stream = new EventSource(`${window.API_BASE}/events?posts=${encodeURIComponent(key)}`);
+  Object.entries(streamHandlers).forEach(([name, fn]) => stream.addEventListener(name, ev => {
+    try { fn(JSON.parse(ev.data)); } catch (err) { console.warn('event failed', name, err); }
+  }));
+  // EventSource reconnects on its own (the server sends `retry:`); nothing to do on error
+}, 250);
+
+window.addEventListener('pagehide', () => { if (stream) stream.close(); stream = null; });
+
 // =======================
 // Infinite Scroll
 // =======================
@@ -287,16 +374,30 @@ const sidePanel = $('sidePanel');
 const linkBtns = document.querySelectorAll('.link-btn');
 
 const userData = {
-  skills: ["Welding", "Plumbing", "App Development"],
-  listings: ["Service: Plumbing (R500)", "Farm: 20 bags of maize"],
-  requests: ["Need an electrician in Pretoria", "Looking for UI designer"]
+  skills: ["Welding", "Plumbing", "App Development"]
 };
 
-function renderPanel(section) {
+const rand = (v) => v == null ? 'negotiable' : `R${Number(v).toLocaleString()}`;
+
+// your own listings / requests, newest first (GET /listings?mine=true, /exchange-requests?mine=true)
+async function marketItems(section) {
+  if (section === "listings") {
+    const page = await safeJson('/listings?mine=true&limit=20', { method: 'GET' });
+    return page.listings.map(l => `📦 ${H.escape(l.title)} <span class="muted small">${H.escape(l.category)} · ${rand(l.price)}${l.status === 'closed' ? ' · closed' : ''}</span>`);
+  }
+  const page = await safeJson('/exchange-requests?mine=true&limit=20', { method: 'GET' });
+  return page.requests.map(r => `🔄 ${H.escape(r.title)} <span class="muted small">${H.escape(r.category)} · up to ${rand(r.maxPrice)}${r.status === 'closed' ? ' · closed' : ''}</span>`);
+}
+
+async function renderPanel(section) {
   let html = "";
   if (section === "skills") html = `<h5>My Skills</h5><ul>${userData.skills.map(s=>`<li>🔹 ${s}</li>`).join("")}</ul>`;
-  if (section === "listings") html = `<h5>My Listings</h5><ul>${userData.listings.map(i=>`<li>📦 ${i}</li>`).join("")}</ul>`;
-  if (section === "requests") html = `<h5>Exchange Requests</h5><ul>${userData.requests.map(r=>`<li>🔄 ${r}</li>`).join("")}</ul>`;
+  if (section === "listings" || section === "requests") {
+    const title = section === "listings" ? "My Listings" : "Exchange Requests";
+    let items;
+    try { items = await marketItems(section); } catch { items = null; }
+    html = `<h5>${title}</h5><ul>${items == null ? '<li class="muted">Could not load.</li>' : items.length ? items.map(i => `<li>${i}</li>`).join("") : '<li class="muted">Nothing yet.</li>'}</ul>`;
+  }
   sidePanel.innerHTML = html;
   sidePanel.classList.remove("hidden");
 }
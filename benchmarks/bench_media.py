@@ -0,0 +1,80 @@
+# benchmarks/bench_media.py
+"""
+Throughput of /uploads: plain StaticFiles vs MediaFiles (core/static.py), in-process over ASGI.
+
+    python -m benchmarks.bench_media [--requests 2000] [--size 1048576]
+
+Scenarios: cold full GET, revalidation (If-None-Match) and a video-scrub style Range read.
+Run from the backend directory (the one containing the `app` package).
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+
+import httpx
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+from app.core.static import MediaFiles
+
+
+def _app(cls, directory):
+    return Starlette(routes=[Mount("/uploads", cls(directory=directory))])
+
+
+async def _run(app, url, n, headers=None, concurrency=32):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        sem = asyncio.Semaphore(concurrency)
+        statuses = {}
+        lat = []
+
+        async def one():
+            async with sem:
+                t = time.perf_counter()
+                r = await client.get(url, headers=headers or {})
+                lat.append(time.perf_counter() - t)
+                statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(n)))
+        elapsed = time.perf_counter() - start
+    lat.sort()
+    return {"rps": n / elapsed, "p50_ms": lat[len(lat) // 2] * 1000, "p99_ms": lat[int(len(lat) * 0.99) - 1] * 1000, "status": statuses}
+
+
+async def main(n, size):
+    with tempfile.TemporaryDirectory() as d:
+        data = os.urandom(size)
+        digest = hashlib.sha256(data).hexdigest()
+        rel = f"{digest[:2]}/{digest[2:4]}/{digest}.mp4"
+        os.makedirs(os.path.join(d, os.path.dirname(rel)))
+        with open(os.path.join(d, rel), "wb") as f:
+            f.write(data)
+        url = f"/uploads/{rel}"
+
+        for label, cls in (("StaticFiles", StaticFiles), ("MediaFiles", MediaFiles)):
+            app = _app(cls, d)
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as c:
+                first = await c.get(url)
+            etag = first.headers.get("etag")
+            print(f"{label}: cache-control={first.headers.get('cache-control')!r} etag={etag}")
+            for scenario, headers in (
+                ("full GET", None),
+                ("revalidate", {"If-None-Match": etag}),
+                ("range 64KiB", {"Range": f"bytes={size // 2}-{size // 2 + 65535}"}),
+            ):
+                res = await _run(app, url, n, headers)
+                print(f"  {scenario:<12} {res['rps']:>9.0f} req/s  p50 {res['p50_ms']:.2f} ms  p99 {res['p99_ms']:.2f} ms  {res['status']}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--size", type=int, default=1024 * 1024)
+    args = ap.parse_args()
+    asyncio.run(main(args.requests, args.size))
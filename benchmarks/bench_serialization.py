@@ -0,0 +1,91 @@
+# benchmarks/bench_serialization.py
+"""
+Cost of turning one feed page into JSON bytes, before and after core/serialization.py.
+
+    python -m benchmarks.bench_serialization [--sizes 12,50] [--repeat 300]
+
+  before       jsonable_encoder + json.dumps (FastAPI's default path for returned dicts)
+  stdlib       json.dumps on the dicts, no jsonable_encoder (fallback without orjson)
+  after        core.serialization.dumps (orjson when installed)
+  pydantic     PostPage.model_validate + model_dump_json, for reference
+
+The page is built by the real routes/post.py helpers from in-memory ORM objects (no
+database), and is checked against schemas/post.py PostPage first.
+Run from the backend directory (the one containing the `app` package).
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.core import serialization
+from app.models.comment import Comment
+from app.models.post import Post
+from app.models.user import User
+from app.routes.posts import _comment_out, _post_out
+from app.schemas.post import PostPage
+
+VARIANTS = json.dumps({"image/webp": {"320": "/uploads/v/a-320.webp", "640": "/uploads/v/a-640.webp"},
+                       "image/jpeg": {"320": "/uploads/v/a-320.jpg", "640": "/uploads/v/a-640.jpg"}})
+
+
+def _page(n: int):
+    now = datetime.now(timezone.utc)
+    users = [User(id=i, first_name=f"First{i}", last_name=f"Last{i}", email=f"u{i}@bench.local") for i in range(1, 9)]
+    posts = []
+    for i in range(n):
+        author = users[i % len(users)]
+        p = Post(id=i + 1, user_id=author.id, text=f"Post {i}: looking for a welder in Polokwane, can trade maize " * 2,
+                 media=f"/uploads/ab/cd/{i:064x}.jpg", media_type="image", variants=VARIANTS,
+                 approvals=i * 3, shares=i, comment_count=2, created_at=now - timedelta(minutes=i))
+        comments = [
+            _comment_out(Comment(id=i * 2 + k, post_id=p.id, user_id=users[k].id, text=f"comment {k} on {i}",
+                                 created_at=now - timedelta(minutes=i, seconds=k)), users[k])
+            for k in range(2)
+        ]
+        posts.append(_post_out(p, author, comments))
+    return {"posts": posts, "hasMore": True, "nextCursor": "MjAyNi0xMC0xOFQxMjo0MTowMHwxMg"}
+
+
+def _stdlib(content):
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+CASES = {
+    "before": lambda page: JSONResponse(None).render(jsonable_encoder(page)),
+    "stdlib": _stdlib,
+    "after": serialization.dumps,
+    "pydantic": lambda page: PostPage.model_validate(page).model_dump_json(by_alias=True).encode(),
+}
+
+
+def _time(fn, page, repeat: int):
+    fn(page)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(page)
+    return (time.perf_counter() - start) / repeat
+
+
+def main(sizes, repeat):
+    print(f"encoder: {'orjson ' + serialization.orjson.__version__ if serialization.orjson else 'stdlib json (orjson not installed)'}")
+    print(f"  {'posts':>5} {'case':>9} {'us/page':>9} {'bytes':>7} {'speed-up':>9}")
+    for n in sizes:
+        page = _page(n)
+        PostPage.model_validate(page)  # the dicts must match the documented schema
+        base = None
+        for label, fn in CASES.items():
+            t = _time(fn, page, repeat)
+            base = base or t
+            print(f"  {n:>5} {label:>9} {t * 1e6:>9.0f} {len(fn(page)):>7} {base / t:>8.1f}x")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="12,50", help="posts per page")
+    ap.add_argument("--repeat", type=int, default=300)
+    args = ap.parse_args()
+    main([int(s) for s in args.sizes.split(",")], args.repeat)
@@ -0,0 +1,125 @@
+# benchmarks/bench_startup.py
+"""
+Worker boot cost: what `import app.main` pulls in and how long until the first response.
+
+    python -m benchmarks.bench_startup [--runs 5] [--top 15] [--budget-import-ms 1500]
+                                       [--budget-first-request-ms 2500] [--json out.json]
+
+Every measurement is a fresh interpreter against a temporary SQLite database that is
+migrated once up front (like a deploy), so nothing is cached between runs:
+
+  import          python -c "import app.main"              (wall time, median of --runs)
+  first request   create_app(), startup handlers, GET /    (wall time from exec to the response)
+  importtime      python -X importtime: slowest modules by self time, and app.* modules
+
+Exits 1 when a median is over its budget, so CI can run it as a check; the defaults leave
+headroom over a laptop-class machine. Run from the backend directory.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+FIRST_REQUEST = """
+import asyncio, httpx
+from app.main import create_app
+
+async def main():
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://boot") as client:
+            r = await client.get("/")
+            assert r.status_code == 200, r.status_code
+
+asyncio.run(main())
+"""
+
+
+def _env(data_dir: str):
+    return {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.join(data_dir, 'boot.db')}",
+        "UPLOAD_DIR": os.path.join(data_dir, "uploads"),
+    }
+
+
+def _wall(args, env) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], env=env, check=True, capture_output=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def _importtime(env, code: str):
+    """(module, self_us, cumulative_us) rows from -X importtime."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env, check=True, capture_output=True, text=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative)))
+    return rows
+
+
+def main(args):
+    data_dir = tempfile.mkdtemp(prefix="vsx-boot-")
+    env = _env(data_dir)
+    migrate_ms = _wall(["-m", "app.core.migrations"], env)
+    # warm the bytecode cache so every run measures the same thing
+    _wall(["-c", "import app.main"], env)
+    _wall(["-c", FIRST_REQUEST], env)
+
+    interpreter = statistics.median(_wall(["-c", "pass"], env) for _ in range(args.runs))
+    imports = statistics.median(_wall(["-c", "import app.main"], env) for _ in range(args.runs))
+    first = statistics.median(_wall(["-c", FIRST_REQUEST], env) for _ in range(args.runs))
+
+    rows = _importtime(env, "from app.main import create_app; create_app()")
+    ours = sorted((r for r in rows if r[0].startswith("app.")), key=lambda r: -r[1])
+    slowest = sorted(rows, key=lambda r: -r[1])[: args.top]
+
+    print(f"  {'bare interpreter':<22} {interpreter:>8.0f} ms")
+    print(f"  {'import app.main':<22} {imports:>8.0f} ms   budget {args.budget_import_ms} ms")
+    print(f"  {'first request':<22} {first:>8.0f} ms   budget {args.budget_first_request_ms} ms")
+    print(f"  {'migrate (once/deploy)':<22} {migrate_ms:>8.0f} ms")
+    print(f"slowest imports by self time (create_app), top {args.top}:")
+    for name, self_us, cumulative in slowest:
+        print(f"  {self_us / 1000:>8.1f} ms self {cumulative / 1000:>8.1f} ms total  {name}")
+    print(f"app modules ({sum(r[1] for r in ours) / 1000:.1f} ms self in total):")
+    for name, self_us, cumulative in ours[: args.top]:
+        print(f"  {self_us / 1000:>8.1f} ms self {cumulative / 1000:>8.1f} ms total  {name}")
+
+    report = {
+        "interpreter_ms": round(interpreter, 1),
+        "import_ms": round(imports, 1),
+        "first_request_ms": round(first, 1),
+        "migrate_ms": round(migrate_ms, 1),
+        "app_modules_self_ms": round(sum(r[1] for r in ours) / 1000, 1),
+        "slowest": [{"module": n, "self_ms": s / 1000, "total_ms": c / 1000} for n, s, c in slowest],
+        "budget": {"import_ms": args.budget_import_ms, "first_request_ms": args.budget_first_request_ms},
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    over = []
+    if imports > args.budget_import_ms:
+        over.append(f"import {imports:.0f} ms > {args.budget_import_ms} ms")
+    if first > args.budget_first_request_ms:
+        over.append(f"first request {first:.0f} ms > {args.budget_first_request_ms} ms")
+    if over:
+        print("OVER BUDGET: " + "; ".join(over))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--budget-import-ms", type=int, default=1500)
+    ap.add_argument("--budget-first-request-ms", type=int, default=2500)
+    ap.add_argument("--json", help="write the numbers here")
+    main(ap.parse_args())
@@ -0,0 +1,173 @@
+# benchmarks/load_posts.py
+"""
+Load test for the posts router: requests/sec and latency percentiles at several client counts.
+
+    python -m benchmarks.load_posts [--clients 1,50,500] [--duration 5] [--scenario mixed]
+                                    [--url http://127.0.0.1:8000] [--label async] [--json out.json]
+    python -m benchmarks.load_posts --compare sync.json async.json
+
+Without --url the app is driven in-process over ASGI (httpx.ASGITransport), so sync
+handlers still go through the threadpool exactly as under uvicorn. With --url a running
+server is hit over HTTP; it must use the same DATABASE_URL, because seeding goes
+straight through the ORM.
+
+To compare against an older (sync) router, run the same command from a checkout of
+that revision with --json, then --compare the two files.
+Run from the backend directory (the one containing the `app` package).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+import httpx
+
+SCENARIOS = {
+    # (weight, kind)
+    "feed": [(1.0, "feed")],
+    "comments": [(1.0, "comments")],
+    "write": [(1.0, "comment")],
+    "mixed": [(0.8, "feed"), (0.1, "comments"), (0.1, "comment")],
+}
+
+
+def _seed(users: int, posts: int, comments: int):
+    """Create users/posts/comments through the ORM and return (post ids, auth headers)."""
+    from app.core import migrations
+    from app.core.database import SessionLocal
+    from app.core.security import create_access_token
+    from app.models.comment import Comment
+    from app.models.post import Post
+    from app.models.user import User
+
+    migrations.upgrade()
+    db = SessionLocal()
+    try:
+        tag = f"{int(time.time())}{random.randint(0, 9999)}"
+        people = [User(email=f"load{tag}-{i}@bench.local", password_hash="!", first_name=f"Load{i}", last_name="User") for i in range(users)]
+        db.add_all(people)
+        db.flush()
+        rows = [Post(user_id=random.choice(people).id, text=f"load test post {i}") for i in range(posts)]
+        db.add_all(rows)
+        db.flush()
+        db.add_all([Comment(post_id=random.choice(rows).id, user_id=random.choice(people).id, text=f"c{i}") for i in range(comments)])
+        db.commit()
+        headers = [{"Authorization": f"Bearer {create_access_token({'sub': str(u.id)})}"} for u in people]
+        return [p.id for p in rows], headers
+    finally:
+        db.close()
+
+
+def _pick(mix):
+    r = random.random()
+    for weight, kind in mix:
+        if r < weight:
+            return kind
+        r -= weight
+    return mix[-1][1]
+
+
+async def _request(client, kind, post_ids, headers, pages):
+    if kind == "feed":
+        return await client.get("/posts", params={"page": random.randint(1, pages), "limit": 12})
+    post_id = random.choice(post_ids)
+    if kind == "comments":
+        return await client.get(f"/posts/{post_id}/comments")
+    return await client.post(f"/posts/{post_id}/comments", json={"text": "load"}, headers=random.choice(headers))
+
+
+async def _level(client, clients, duration, mix, post_ids, headers, pages):
+    lat, statuses = [], {}
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            kind = _pick(mix)
+            t = time.perf_counter()
+            try:
+                r = await _request(client, kind, post_ids, headers, pages)
+                code = r.status_code
+            except httpx.HTTPError as e:
+                code = type(e).__name__
+            lat.append(time.perf_counter() - t)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    lat.sort()
+    pct = lambda q: lat[min(len(lat) - 1, int(len(lat) * q))] * 1000 if lat else 0.0
+    return {
+        "clients": clients, "requests": len(lat), "rps": len(lat) / elapsed,
+        "p50_ms": pct(0.50), "p99_ms": pct(0.99), "max_ms": lat[-1] * 1000 if lat else 0.0, "status": statuses,
+    }
+
+
+def _client(url, clients):
+    if url:
+        limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+        return httpx.AsyncClient(base_url=url, limits=limits, timeout=60)
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+
+def _print(label, results):
+    print(f"{label}")
+    print(f"  {'clients':>7} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}  status")
+    for r in results:
+        print(f"  {r['clients']:>7} {r['requests']:>9} {r['rps']:>9.0f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.2f}  {r['status']}")
+
+
+def _compare(paths):
+    runs = []
+    for path in paths:
+        with open(path) as f:
+            runs.append(json.load(f))
+    for run in runs:
+        _print(f"{run['label']} ({run['scenario']})", run["results"])
+    base = runs[0]
+    for run in runs[1:]:
+        print(f"{run['label']} vs {base['label']}")
+        for a, b in zip(base["results"], run["results"]):
+            print(f"  {a['clients']:>7} clients: req/s x{b['rps'] / a['rps']:.2f}, p99 {a['p99_ms']:.1f} -> {b['p99_ms']:.1f} ms")
+
+
+async def main(args):
+    # measure the data path, not the response cache, unless asked to keep it
+    if not args.keep_cache:
+        os.environ.setdefault("RESPONSE_CACHE_BACKEND", "off")
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")  # one client address for every simulated user
+    post_ids, headers = _seed(args.users, args.posts, args.comments)
+    mix = SCENARIOS[args.scenario]
+    pages = max(1, args.posts // 12)
+    results = []
+    for clients in [int(c) for c in args.clients.split(",")]:
+        async with _client(args.url, clients) as client:
+            await _level(client, 1, 0.5, mix, post_ids, headers, pages)  # warm-up
+            results.append(await _level(client, clients, args.duration, mix, post_ids, headers, pages))
+    _print(f"{args.label} ({args.scenario})", results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"label": args.label, "scenario": args.scenario, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", default="1,50,500")
+    ap.add_argument("--duration", type=float, default=5.0, help="seconds per client level")
+    ap.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    ap.add_argument("--url", help="hit a running server instead of the in-process app")
+    ap.add_argument("--label", default="posts router")
+    ap.add_argument("--json", help="write results here (for --compare)")
+    ap.add_argument("--compare", nargs="+", metavar="RESULTS_JSON")
+    ap.add_argument("--users", type=int, default=50)
+    ap.add_argument("--posts", type=int, default=600)
+    ap.add_argument("--comments", type=int, default=2000)
+    ap.add_argument("--keep-cache", action="store_true", help="leave the response cache on")
+    args = ap.parse_args()
+    if args.compare:
+        _compare(args.compare)
+    else:
+        asyncio.run(main(args))
@@ -0,0 +1,296 @@
+# benchmarks/suite.py
+"""
+Reproducible API benchmark: a seeded dataset, fixed scenarios, one JSON report per run.
+
+    python -m benchmarks.suite [--scale small|medium|full] [--scenarios feed_shallow,upload]
+                               [--clients 16] [--duration 10] [--json run.json]
+    python -m benchmarks.suite --compare base.json head.json
+
+The dataset comes from `python -m seed_user --bulk` (full = 100k users, 1M posts, 5M comments)
+in a temporary SQLite file, or in --database-url (an empty PostgreSQL database, say).
+--data-dir keeps the seeded SQLite file and reuses it on later runs with the same scale
+and seed, so comparing two commits does not pay for seeding twice; every run works on a
+fresh copy of it. The app runs in-process over ASGI (httpx.ASGITransport) with the
+response cache off, so every request reaches the database; --keep-cache leaves it on.
+
+Scenarios:
+  feed_shallow        GET /posts, pages 1-5
+  feed_deep           GET /posts, OFFSET pages from the second half of the table
+  feed_deep_cursor    GET /posts?cursor= at the same depths (keyset)
+  search_users        GET /users?skill=<prefix>
+  approve_contention  POST /posts/{id}/approve, many users on a handful of hot posts
+  create_comment      POST /posts/{id}/comments on recent posts
+  upload              POST /posts with a 256 KB multipart image
+
+Each report records the commit, scale, dialect and Python version next to requests,
+req/s and p50/p95/p99/max per scenario. Run from the backend directory.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SCALES = {
+    # users, posts, comments
+    "small": (1_000, 10_000, 50_000),
+    "medium": (10_000, 100_000, 500_000),
+    "full": (100_000, 1_000_000, 5_000_000),
+}
+SCENARIOS = ("feed_shallow", "feed_deep", "feed_deep_cursor", "search_users", "approve_contention", "create_comment", "upload")
+PAGE = 12
+HOT_POSTS = 5
+UPLOAD_BYTES = 256 * 1024
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _prepare_env(args):
+    """
+    Seed (or reuse) the dataset and point the app at it; must run before anything imports
+    app.core.config. SQLite runs work on a copy, so writes from one run never leak into the next.
+    """
+    seeded = None
+    if args.database_url:
+        url = args.database_url
+        seeded = _seed(args, url)
+    else:
+        data_dir = args.data_dir or tempfile.mkdtemp(prefix="vsx-bench-")
+        pristine = os.path.join(data_dir, f"bench-{args.scale}-{args.seed}.db")
+        if os.path.exists(pristine):
+            print(f"reusing {pristine}")
+        else:
+            seeded = _seed(args, f"sqlite:///{pristine}")
+        work = os.path.join(tempfile.mkdtemp(prefix="vsx-bench-run-"), "bench.db")
+        shutil.copyfile(pristine, work)
+        url = f"sqlite:///{work}"
+    os.environ["DATABASE_URL"] = url
+    # like a deploy: bring a dataset seeded by an older commit up to this commit's schema
+    subprocess.run([sys.executable, "-m", "app.core.migrations"], check=True, env=os.environ)
+    os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="vsx-bench-uploads-"))
+    if not args.keep_cache:
+        os.environ["RESPONSE_CACHE_BACKEND"] = "off"
+    # every anonymous request comes from one in-process "IP": measure the handlers, not the limiter
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+    return seeded
+
+
+def _seed(args, url: str):
+    """`python -m seed_user --bulk` in a child process, so this one has not bound an engine yet."""
+    users, posts, comments = SCALES[args.scale]
+    cmd = [sys.executable, "-m", "seed_user", "--bulk", "--users", str(users), "--posts", str(posts),
+           "--comments", str(comments), "--seed", str(args.seed)]
+    t = time.perf_counter()
+    subprocess.run(cmd, check=True, env={**os.environ, "DATABASE_URL": url})
+    return {"users": users, "posts": posts, "comments": comments, "seconds": round(time.perf_counter() - t, 2)}
+
+
+def _fixtures(rng: random.Random, clients: int):
+    """Ids, tokens, skill prefixes and keyset cursors the scenarios draw from."""
+    from sqlalchemy import func, select
+    from app.core.database import SessionLocal
+    from app.core.pagination import encode_cursor
+    from app.core.security import create_access_token
+    from app.models.post import Post
+    from app.models.user import User
+
+    db = SessionLocal()
+    try:
+        n_users = db.execute(select(func.count()).select_from(User)).scalar()
+        n_posts = db.execute(select(func.count()).select_from(Post)).scalar()
+        max_post = db.execute(select(func.max(Post.id))).scalar() or 0
+        deep_pages = [rng.randint(max(1, n_posts // PAGE // 2), max(1, n_posts // PAGE)) for _ in range(32)]
+        cursors = []
+        for page in deep_pages:
+            # the row just before the requested page, i.e. what the client would hold after walking there
+            row = db.execute(
+                select(Post.created_at, Post.id).order_by(Post.created_at.desc(), Post.id.desc())
+                .offset(max(0, (page - 1) * PAGE - 1)).limit(1)
+            ).first()
+            if row:
+                cursors.append(encode_cursor(row.created_at, row.id))
+        user_ids = [rng.randint(1, n_users) for _ in range(max(clients * 8, 64))] if n_users else []
+    finally:
+        db.close()
+    return {
+        "users": n_users,
+        "posts": n_posts,
+        "deep_pages": deep_pages,
+        "cursors": cursors,
+        "recent": list(range(max(1, max_post - 1000), max_post + 1)),
+        "hot": [max_post - i for i in range(HOT_POSTS)],
+        "tokens": [{"Authorization": f"Bearer {create_access_token({'sub': str(uid)})}"} for uid in user_ids],
+        "skills": ["wel", "plum", "app", "maize", "sol", "tut", "photo", "ca"],
+        "image": _jpeg(rng),
+    }
+
+
+def _jpeg(rng: random.Random) -> bytes:
+    """A decodable ~UPLOAD_BYTES JPEG of noise, so the media worker has real work to do."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return b"\xff\xd8\xff\xe0" + rng.randbytes(UPLOAD_BYTES - 4)
+    side = int((UPLOAD_BYTES / 1.1) ** 0.5)
+    buf = io.BytesIO()
+    Image.frombytes("L", (side, side), rng.randbytes(side * side)).save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+def _request(client, name: str, fx, rng: random.Random):
+    if name == "feed_shallow":
+        return client.get("/posts", params={"page": rng.randint(1, 5), "limit": PAGE})
+    if name == "feed_deep":
+        return client.get("/posts", params={"page": rng.choice(fx["deep_pages"]), "limit": PAGE})
+    if name == "feed_deep_cursor":
+        return client.get("/posts", params={"cursor": rng.choice(fx["cursors"]), "limit": PAGE})
+    if name == "search_users":
+        return client.get("/users", params={"skill": rng.choice(fx["skills"]), "page": rng.randint(1, 5)})
+    headers = rng.choice(fx["tokens"])
+    if name == "approve_contention":
+        return client.post(f"/posts/{rng.choice(fx['hot'])}/approve", headers=headers)
+    if name == "create_comment":
+        return client.post(f"/posts/{rng.choice(fx['recent'])}/comments", json={"text": "benchmark comment"}, headers=headers)
+    if name == "upload":
+        # unique trailing bytes: storage is content-addressed and would dedupe identical uploads
+        files = {"media": ("bench.jpg", fx["image"] + rng.randbytes(16), "image/jpeg")}
+        return client.post("/posts", data={"text": "benchmark upload"}, files=files, headers=headers)
+    raise ValueError(name)
+
+
+def _percentile(lat, q):
+    return lat[min(len(lat) - 1, int(len(lat) * q))] * 1000 if lat else 0.0
+
+
+async def _run(client, name: str, fx, clients: int, duration: float, seed: int):
+    import httpx
+
+    lat, statuses = [], {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(i):
+        rng = random.Random(seed * 1000 + i)   # same request sequence per worker on every run
+        while time.perf_counter() < deadline:
+            t = time.perf_counter()
+            try:
+                code = (await _request(client, name, fx, rng)).status_code
+            except httpx.HTTPError as e:
+                code = type(e).__name__
+            lat.append(time.perf_counter() - t)
+            statuses[str(code)] = statuses.get(str(code), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    lat.sort()
+    return {
+        "clients": clients,
+        "requests": len(lat),
+        "rps": round(len(lat) / elapsed, 1),
+        "p50_ms": round(_percentile(lat, 0.50), 2),
+        "p95_ms": round(_percentile(lat, 0.95), 2),
+        "p99_ms": round(_percentile(lat, 0.99), 2),
+        "max_ms": round(lat[-1] * 1000, 2) if lat else 0.0,
+        "status": statuses,
+    }
+
+
+def _print(report):
+    meta = report["meta"]
+    print(f"{meta['commit'] or 'unknown commit'} {meta['scale']} {meta['dialect']} "
+          f"({meta['users']} users, {meta['posts']} posts), {meta['clients']} clients")
+    print(f"  {'scenario':<19} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  status")
+    for name, r in report["scenarios"].items():
+        print(f"  {name:<19} {r['requests']:>8} {r['rps']:>8.0f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['max_ms']:>8.2f}  {r['status']}")
+
+
+def _compare(paths):
+    runs = []
+    for path in paths:
+        with open(path) as f:
+            runs.append(json.load(f))
+    for run in runs:
+        _print(run)
+    base = runs[0]
+    for run in runs[1:]:
+        print(f"{run['meta']['commit']} vs {base['meta']['commit']}")
+        for name, b in run["scenarios"].items():
+            a = base["scenarios"].get(name)
+            if not a or not a["rps"]:
+                continue
+            print(f"  {name:<19} req/s x{b['rps'] / a['rps']:.2f}, p99 {a['p99_ms']:.1f} -> {b['p99_ms']:.1f} ms")
+
+
+async def main(args):
+    seeded = _prepare_env(args)
+
+    import httpx
+    from app.core.database import engine
+    from app.main import app
+
+    names = [s for s in args.scenarios.split(",") if s] if args.scenarios else list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    fx = _fixtures(random.Random(args.seed), args.clients)
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "scale": args.scale if not args.database_url else "external",
+            "dialect": engine.dialect.name,
+            "users": fx["users"],
+            "posts": fx["posts"],
+            "seed": seeded,
+            "clients": args.clients,
+            "duration": args.duration,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "scenarios": {},
+    }
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        # ASGITransport sends no lifespan events: run startup (counter flusher, event bus, ...) here
+        async with app.router.lifespan_context(app):
+            for name in names:
+                await _run(client, name, fx, 1, min(1.0, args.duration), args.seed)  # warm-up
+                report["scenarios"][name] = await _run(client, name, fx, args.clients, args.duration, args.seed)
+                print(f"  {name}: {report['scenarios'][name]['rps']:.0f} req/s", file=sys.stderr)
+    _print(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scale", choices=sorted(SCALES), default="small")
+    ap.add_argument("--database-url", help="seed into (and benchmark) this empty database instead of a temp SQLite file")
+    ap.add_argument("--data-dir", help="keep the SQLite dataset here and reuse it on later runs")
+    ap.add_argument("--scenarios", help=f"comma separated subset of: {', '.join(SCENARIOS)}")
+    ap.add_argument("--clients", type=int, default=16, help="concurrent clients per scenario")
+    ap.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--json", help="write the report here (for --compare)")
+    ap.add_argument("--compare", nargs="+", metavar="REPORT_JSON")
+    ap.add_argument("--keep-cache", action="store_true", help="leave the response cache on")
+    args = ap.parse_args()
+    if args.compare:
+        _compare(args.compare)
+    else:
+        asyncio.run(main(args))
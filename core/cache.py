@@ -0,0 +1,274 @@
+# backend/app/core/cache.py
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from app.core.serialization import dumps
+from app.core.config import RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_URL, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_SIZE
+
+try:
+    import redis
+except ImportError:  # only needed for RESPONSE_CACHE_BACKEND=redis
+    redis = None
+
+
+class TTLCache:
+    """Small thread-safe LRU with per-entry expiry (sync handlers and dependencies run on the threadpool)."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+# ---------------------------
+# Response cache: serialized JSON bodies keyed by route + params, invalidated by tags
+# ---------------------------
+# Every entry remembers the version of each tag it depends on ("posts", "post:12",
+# "comments:12", "user:5", ...). invalidate() bumps tag versions, so dropping every
+# page that shows a post is O(1) and needs no key scan; stale entries fail the
+# version check on their next read and are rebuilt.
+
+class MemoryBackend:
+    """
+    Per-process. Tag versions are an LRU too: versions come from one counter, and a tag that is
+    not tracked (never bumped, or evicted) reads as the highest version ever evicted, so an
+    eviction can cost a cache miss but never resurrect a stale entry.
+    """
+    blocking = False
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL_SECONDS, max_tags: int = None):
+        self._entries = TTLCache(maxsize, ttl)
+        self._versions = OrderedDict()
+        self._max_tags = max_tags or 4 * maxsize     # a feed page depends on a few dozen tags
+        self._clock = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, entry):
+        self._entries.set(key, entry)
+
+    def versions(self, tags):
+        with self._lock:
+            out = {}
+            for t in tags:
+                v = self._versions.get(t)
+                if v is None:
+                    out[t] = self._floor
+                else:
+                    self._versions.move_to_end(t)
+                    out[t] = v
+            return out
+
+    def bump(self, tags):
+        with self._lock:
+            for t in tags:
+                self._clock += 1
+                self._versions[t] = self._clock
+                self._versions.move_to_end(t)
+            while len(self._versions) > self._max_tags:
+                _, v = self._versions.popitem(last=False)
+                self._floor = max(self._floor, v)
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """
+    Shared across workers; anything speaking the Redis protocol on RESPONSE_CACHE_URL works.
+    Calls block on the network: async handlers go through ResponseCache's *_async methods,
+    which run them on the threadpool.
+    """
+    blocking = True
+
+    def __init__(self, url: str = RESPONSE_CACHE_URL, ttl: float = RESPONSE_CACHE_TTL_SECONDS, prefix: str = "rc:"):
+        if redis is None:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis needs the redis package")
+        self._r = redis.Redis.from_url(url)
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self._r.get(self.prefix + key)
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return entry["v"], entry["b"].encode()
+
+    def set(self, key, entry):
+        versions, body = entry
+        self._r.set(self.prefix + key, json.dumps({"v": versions, "b": body.decode()}), ex=self.ttl)
+
+    def versions(self, tags):
+        tags = list(tags)
+        if not tags:
+            return {}
+        values = self._r.mget([f"{self.prefix}tag:{t}" for t in tags])
+        return {t: int(v or 0) for t, v in zip(tags, values)}
+
+    def bump(self, tags):
+        pipe = self._r.pipeline()
+        for t in tags:
+            pipe.incr(f"{self.prefix}tag:{t}")
+        pipe.execute()
+
+    def size(self):
+        return None
+
+
+class ResponseCache:
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(route: str, **params):
+        return f"{route}?{urlencode(sorted((k, v) for k, v in params.items() if v is not None))}"
+
+    def get(self, key: str):
+        """Cached body for `key` if every tag it depends on is unchanged."""
+        if self.backend is None:
+            return None
+        entry = self.backend.get(key)
+        if entry is not None:
+            versions, body = entry
+            if self.backend.versions(versions) == versions:
+                self.hits += 1
+                return body
+        self.misses += 1
+        return None
+
+    def lookup(self, key: str):
+        body = self.get(key)
+        if body is None:
+            return None
+        return Response(body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+    def snapshot(self, tags=()):
+        """Take tag versions before building so an invalidation that races the build wins."""
+        return self.backend.versions(tags) if self.backend is not None else {}
+
+    def store(self, key: str, payload, versions: dict, tags_of=None):
+        """Serialize once, cache the bytes and return them; `tags_of(payload)` adds content tags."""
+        body = dumps(payload)
+        if self.backend is not None:
+            extra = [t for t in (tags_of(payload) if tags_of else ()) if t not in versions]
+            self.backend.set(key, ({**versions, **self.backend.versions(extra)}, body))
+        return Response(body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+    def json_response(self, key: str, build, tags=(), tags_of=None):
+        """Cached JSON Response for `key`; `build()` produces the payload on a miss."""
+        hit = self.lookup(key)
+        if hit is not None:
+            return hit
+        versions = self.snapshot(tags)
+        return self.store(key, build(), versions, tags_of)
+
+    def invalidate(self, *tags):
+        if self.backend is not None and tags:
+            self.backend.bump(tags)
+            self.invalidations += 1
+
+    # for async handlers: the same calls, moved off the event loop when the backend does I/O
+    async def _off_loop(self, fn, *args):
+        if self.backend is not None and self.backend.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    async def lookup_async(self, key: str):
+        return await self._off_loop(self.lookup, key)
+
+    async def snapshot_async(self, tags=()):
+        return await self._off_loop(self.snapshot, tags)
+
+    async def store_async(self, key: str, payload, versions: dict, tags_of=None):
+        return await self._off_loop(self.store, key, payload, versions, tags_of)
+
+    async def invalidate_async(self, *tags):
+        return await self._off_loop(self.invalidate, *tags)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else "off",
+            "entries": self.backend.size() if self.backend else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def _opaque(tag: str) -> str:
+    return tag.strip().removeprefix("W/")
+
+
+def conditional_json(request, payload, cache_control: str = "private, no-cache"):
+    """JSON response with an ETag of its body; 304 when If-None-Match already has it (weak comparison)."""
+    body = dumps(payload)
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Authorization"}
+    sent = request.headers.get("if-none-match")
+    if sent and (sent.strip() == "*" or _opaque(etag) in {_opaque(t) for t in sent.split(",")}):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _make_backend(kind: str):
+    if kind == "redis":
+        return RedisBackend()
+    if kind == "memory":
+        return MemoryBackend()
+    return None
+
+
+response_cache = ResponseCache(_make_backend(RESPONSE_CACHE_BACKEND))
@@ -7,4 +7,94 @@ UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(BASE_DIR, "../../uploads"))
 API_PREFIX = "/api"
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-change-me")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60*24
\ No newline at end of file
+ACCESS_TOKEN_EXPIRE_MINUTES = 60*24
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 200 * 1024 * 1024))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", 1024 * 1024))
+
+MEDIA_GC_GRACE_SECONDS = int(os.getenv("MEDIA_GC_GRACE_SECONDS", 24 * 3600))
+MEDIA_GC_INTERVAL_SECONDS = int(os.getenv("MEDIA_GC_INTERVAL_SECONDS", 3600))
+
+MEDIA_VARIANT_WIDTHS = [int(w) for w in os.getenv("MEDIA_VARIANT_WIDTHS", "320,640,1280").split(",")]
+MEDIA_WORKER_POLL_SECONDS = float(os.getenv("MEDIA_WORKER_POLL_SECONDS", 2))
+# a failed media job waits base * 2^(failures - 1) before it is claimed again
+MEDIA_RETRY_BASE_SECONDS = float(os.getenv("MEDIA_RETRY_BASE_SECONDS", 30))
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+
+# bcrypt cost; changing it re-hashes users transparently on their next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+
+# decoded-JWT / principal cache (per process); TTL bounds staleness across workers
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", 300))
+
+# approvals/shares are buffered in memory and flushed as batched `col = col + n` updates
+COUNTER_FLUSH_INTERVAL_SECONDS = float(os.getenv("COUNTER_FLUSH_INTERVAL_SECONDS", 1.0))
+COUNTER_FLUSH_THRESHOLD = int(os.getenv("COUNTER_FLUSH_THRESHOLD", 500))
+
+# home timeline: entries kept per reader, authors above the follower limit are merged in at read time
+TIMELINE_MAX_ENTRIES = int(os.getenv("TIMELINE_MAX_ENTRIES", 800))
+TIMELINE_FANOUT_LIMIT = int(os.getenv("TIMELINE_FANOUT_LIMIT", 10000))
+TIMELINE_NEARBY_BOOST_SECONDS = int(os.getenv("TIMELINE_NEARBY_BOOST_SECONDS", 3 * 3600))
+# how often timelines past TIMELINE_MAX_ENTRIES are cut back (background job in main.py)
+TIMELINE_TRIM_INTERVAL_SECONDS = int(os.getenv("TIMELINE_TRIM_INTERVAL_SECONDS", 900))
+
+# response cache for public reads: "memory" (per process), "redis" (RESPONSE_CACHE_URL) or "off"
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 30))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 2048))
+
+# connection pool (shared engine, core/database.py)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") not in ("0", "false", "False")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", 256 * 1024 * 1024))
+
+# schema: `python -m app.core.migrations` once per deploy; the app only checks the version.
+# Set to 1 to migrate at startup instead (single-process dev setups only).
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "0") in ("1", "true", "True")
+
+# rate limiting (core/ratelimit.py): token buckets per user id / IP, "memory" (per process),
+# "redis" (RATE_LIMIT_URL, shared by all workers) or "local" (in-process stand-in for redis)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") not in ("0", "false", "False")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_URL = os.getenv("RATE_LIMIT_URL", "redis://localhost:6379/1")
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", 20))          # tokens per second per caller
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", 100))
+RATE_LIMIT_LOGIN_PER_MINUTE = float(os.getenv("RATE_LIMIT_LOGIN_PER_MINUTE", 10))
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", 16))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") in ("1", "true", "True")
+# load shedding: requests in flight per process before new ones get a 503
+MAX_INFLIGHT_REQUESTS = int(os.getenv("MAX_INFLIGHT_REQUESTS", 512))
+MAX_INFLIGHT_WRITES = int(os.getenv("MAX_INFLIGHT_WRITES", 64))
+MAX_INFLIGHT_UPLOADS = int(os.getenv("MAX_INFLIGHT_UPLOADS", 8))
+
+# messaging websockets: frames queued per socket before a slow reader is disconnected
+MESSAGE_SEND_QUEUE_SIZE = int(os.getenv("MESSAGE_SEND_QUEUE_SIZE", 64))
+MESSAGE_MAX_SOCKETS_PER_USER = int(os.getenv("MESSAGE_MAX_SOCKETS_PER_USER", 16))
+MESSAGE_MAX_LENGTH = int(os.getenv("MESSAGE_MAX_LENGTH", 4000))
+
+# server-sent events: buffered events are coalesced and delivered once per interval
+EVENTS_COALESCE_SECONDS = float(os.getenv("EVENTS_COALESCE_SECONDS", 0.5))
+EVENTS_MAX_PER_TOPIC = int(os.getenv("EVENTS_MAX_PER_TOPIC", 20))
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 32))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+EVENTS_MAX_WATCHED_POSTS = int(os.getenv("EVENTS_MAX_WATCHED_POSTS", 200))
+
+# request metrics (GET /metrics); Server-Timing adds app/db/disk durations to every response
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "0") in ("1", "true", "True")
+N_PLUS_ONE_QUERY_THRESHOLD = int(os.getenv("N_PLUS_ONE_QUERY_THRESHOLD", 25))
+N_PLUS_ONE_REPEAT_THRESHOLD = int(os.getenv("N_PLUS_ONE_REPEAT_THRESHOLD", 10))
+
+# marketplace matching (core/matching.py): new requests/listings are paired with nearby candidates once
+MATCH_RADIUS_KM = float(os.getenv("MATCH_RADIUS_KM", 100))
+MATCHES_PER_REQUEST = int(os.getenv("MATCHES_PER_REQUEST", 20))
+MATCH_CANDIDATE_SCAN = int(os.getenv("MATCH_CANDIDATE_SCAN", 200))
+MATCH_BATCH = int(os.getenv("MATCH_BATCH", 50))
+MATCH_POLL_SECONDS = float(os.getenv("MATCH_POLL_SECONDS", 2))
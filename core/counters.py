@@ -0,0 +1,211 @@
+# backend/app/core/counters.py
+import argparse
+import asyncio
+import logging
+import threading
+from sqlalchemy import bindparam, exists, func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import COUNTER_FLUSH_INTERVAL_SECONDS, COUNTER_FLUSH_THRESHOLD
+from app.models.post import Post
+from app.models.approval import PostApproval
+from app.models.share import PostShare
+from app.models.comment import Comment
+
+log = logging.getLogger(__name__)
+
+posts = Post.__table__
+approvals = PostApproval.__table__
+shares = PostShare.__table__
+comments = Comment.__table__
+FIELDS = ("approvals", "shares")
+
+# one executemany per flush: every touched post gets `col = coalesce(col, 0) + n` for each counter
+_FLUSH_STMT = (
+    posts.update()
+    .where(posts.c.id == bindparam("pid"))
+    .values({f: func.coalesce(posts.c[f], 0) + bindparam(f"d_{f}") for f in FIELDS})
+)
+
+
+class CounterBuffer:
+    """
+    In-process write-behind buffer for post counters.
+    Increments are summed in memory and written as atomic relative updates, so
+    concurrent processes never lose each other's clicks; reads add the not-yet-flushed
+    deltas and never go backwards within the process.
+    """
+
+    def __init__(self, threshold: int = COUNTER_FLUSH_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}      # post_id -> {field: n}
+        self._in_flight = {}    # batch being written right now
+        self._served = {}       # (post_id, field) -> (highest value returned, generation)
+        self._generation = 0
+        self._size = 0
+        self._loop = None
+        self._wake = None
+        self.increments = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+
+    def incr(self, post_id: int, field: str, n: int = 1):
+        if field not in FIELDS:
+            raise ValueError(field)
+        with self._lock:
+            counts = self._pending.setdefault(post_id, {})
+            counts[field] = counts.get(field, 0) + n
+            self._size += 1
+            self.increments += n
+            full = self._size >= self.threshold
+        if full and self._wake is not None:
+            # may be called from a threadpool worker: hand the wake-up to the loop thread
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def value(self, post_id: int, field: str, stored) -> int:
+        """Stored column value plus anything still buffered for it."""
+        with self._lock:
+            delta = self._pending.get(post_id, {}).get(field, 0) + self._in_flight.get(post_id, {}).get(field, 0)
+            value = (stored or 0) + delta
+            key = (post_id, field)
+            seen = self._served.get(key)
+            if seen is not None:
+                value = max(value, seen[0])
+            if delta or seen is not None:
+                self._served[key] = (value, self._generation)
+            return value
+
+    def pending(self):
+        with self._lock:
+            return self._size
+
+    def flush(self, db: Session = None) -> int:
+        """Write buffered deltas in one transaction; on failure they go back into the buffer."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending, self._size = self._pending, {}, 0
+                self._in_flight = batch
+            if not batch:
+                return 0
+            rows = [{"pid": pid, **{f"d_{f}": counts.get(f, 0) for f in FIELDS}} for pid, counts in batch.items()]
+            from app.core.database import SessionLocal
+            session = db or SessionLocal()
+            try:
+                session.execute(_FLUSH_STMT, rows)
+                session.commit()
+            except Exception:
+                session.rollback()
+                with self._lock:
+                    for pid, counts in batch.items():
+                        merged = self._pending.setdefault(pid, {})
+                        for f, n in counts.items():
+                            merged[f] = merged.get(f, 0) + n
+                            self._size += 1
+                    self._in_flight = {}
+                    self.failures += 1
+                raise
+            finally:
+                if db is None:
+                    session.close()
+            with self._lock:
+                self._in_flight = {}
+                self._generation += 1
+                # keep high-water marks one generation past the flush that made them redundant
+                self._served = {k: v for k, v in self._served.items() if v[1] >= self._generation - 1}
+                self.flushes += 1
+                self.rows_written += len(rows)
+            return len(rows)
+
+    async def flush_forever(self, interval: float = COUNTER_FLUSH_INTERVAL_SECONDS):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not self.pending():
+                continue
+            try:
+                await run_in_threadpool(self.flush)
+            except Exception:
+                log.exception("counter flush failed, will retry")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": self._size,
+                "posts_pending": len(self._pending),
+                "increments": self.increments,
+                "flushes": self.flushes,
+                "rows_written": self.rows_written,
+                "failures": self.failures,
+            }
+
+
+counters = CounterBuffer()
+
+
+def _once_stmt(table, dialect_name: str, post_id: int, user_id: int):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    ins = insert(table).values(post_id=post_id, user_id=user_id)
+    return ins.on_conflict_do_nothing(index_elements=[table.c.post_id, table.c.user_id])
+
+
+def approve_stmt(dialect_name: str, post_id: int, user_id: int):
+    """INSERT the (post, user) approval, doing nothing if it already exists."""
+    return _once_stmt(approvals, dialect_name, post_id, user_id)
+
+
+def share_stmt(dialect_name: str, post_id: int, user_id: int):
+    """INSERT the (post, user) share, doing nothing if it already exists."""
+    return _once_stmt(shares, dialect_name, post_id, user_id)
+
+
+def _comment_counts():
+    return select(func.count()).select_from(comments).where(comments.c.post_id == posts.c.id).scalar_subquery()
+
+
+def backfill_comment_counts(db: Session):
+    """Recompute posts.comment_count from comments (rows that predate the column, bulk loads)."""
+    db.execute(posts.update().values(comment_count=_comment_counts()))
+    db.commit()
+
+
+def reconcile(db: Session):
+    """
+    Recompute posts.approvals from post_approvals (e.g. after a crash lost buffered deltas)
+    and posts.comment_count from comments. Only posts with approval rows are recounted:
+    approvals given before post_approvals existed have no rows behind them. Shares are not
+    recounted for the same reason (post_shares only holds shares since migration 7).
+    """
+    counters.flush(db)
+    count = select(func.count()).select_from(approvals).where(approvals.c.post_id == posts.c.id).scalar_subquery()
+    has_rows = exists().where(approvals.c.post_id == posts.c.id)
+    db.execute(posts.update().where(has_rows).values(approvals=count))
+    db.execute(posts.update().values(comment_count=_comment_counts()))
+    db.commit()
+
+
+if __name__ == "__main__":
+    from app.core.database import SessionLocal
+
+    ap = argparse.ArgumentParser(description="Recompute post counters.")
+    ap.add_argument("--comments-only", action="store_true", help="only backfill comment_count; leave approvals alone")
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.comments_only:
+            backfill_comment_counts(db)
+        else:
+            reconcile(db)
+    finally:
+        db.close()
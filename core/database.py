@@ -1,16 +1,194 @@
 # backend/app/core/database.py
-from sqlalchemy import create_engine
+import asyncio
+import contextlib
+import time
+from sqlalchemy import create_engine, event, DateTime
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.exc import TimeoutError as PoolTimeout
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.config import DATABASE_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+from starlette.concurrency import run_in_threadpool
+from app.core.metrics import instrument_engine
+from app.core.config import (
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+    SQLITE_BUSY_TIMEOUT_MS, SQLITE_MMAP_BYTES,
+)
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+class _CheckoutTimer:
+    """Pool mixin that records how long callers wait for a connection and how often they time out."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.peak_checked_out = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeout:
+            self.timeouts += 1
+            raise
+        waited = time.perf_counter() - start
+        self.checkouts += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.peak_checked_out = max(self.peak_checked_out, self.checkedout())
+        return conn
+
+
+class InstrumentedQueuePool(_CheckoutTimer, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimer, AsyncAdaptedQueuePool):
+    pass
+
+
+# async drivers for the plain URLs used in DATABASE_URL
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def normalize_url(url: str) -> str:
+    # Heroku-style postgres:// URLs are rejected by SQLAlchemy 1.4+
+    return "postgresql://" + url[len("postgres://"):] if url.startswith("postgres://") else url
+
+
+def _sqlite_pragmas(dbapi_conn, record):
+    cur = dbapi_conn.cursor()
+    # WAL: readers don't block the writer; NORMAL is durable across app crashes in WAL mode
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.close()
+
+
+def async_url(url: str) -> str:
+    url = normalize_url(url)
+    scheme, rest = url.split("://", 1)
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+def _engine_kwargs(url: str, poolclass):
+    # a SQLite file has no server connection to lose; on aiosqlite the ping is four more thread hops
+    kwargs = {"pool_pre_ping": DB_POOL_PRE_PING and not url.startswith("sqlite")}
+    if url.startswith("sqlite"):
+        kwargs["connect_args"] = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+        if url.split("://", 1)[1] in ("", "/:memory:"):
+            # one shared in-memory database instead of a fresh one per connection
+            kwargs["poolclass"] = StaticPool
+    if "poolclass" not in kwargs:
+        kwargs.update(
+            poolclass=poolclass,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    return kwargs
+
+
+def make_engine(url: str = DATABASE_URL, **overrides):
+    """The one place sync engines are built; pool settings come from DB_* config."""
+    url = normalize_url(url)
+    eng = create_engine(url, **{**_engine_kwargs(url, InstrumentedQueuePool), **overrides})
+    if eng.dialect.name == "sqlite":
+        event.listen(eng, "connect", _sqlite_pragmas)
+    instrument_engine(eng)
+    return eng
+
+
+def make_async_engine(url: str = DATABASE_URL, **overrides):
+    """Async engine (aiosqlite / asyncpg) with the same pool settings and pragmas."""
+    url = async_url(url)
+    eng = create_async_engine(url, **{**_engine_kwargs(url, InstrumentedAsyncQueuePool), **overrides})
+    if eng.dialect.name == "sqlite":
+        event.listen(eng.sync_engine, "connect", _sqlite_pragmas)
+    instrument_engine(eng.sync_engine)
+    return eng
+
+
+def pool_stats(eng=None):
+    """Pool occupancy and checkout latency for the shared engine (or `eng`)."""
+    pool = (eng or engine).pool
+    out = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        out.update(size=pool.size(), max_overflow=pool._max_overflow, checked_out=pool.checkedout(),
+                   overflow=max(pool.overflow(), 0), saturation=round(pool.checkedout() / capacity, 3) if capacity else 0.0)
+    if isinstance(pool, _CheckoutTimer):
+        out.update(
+            checkouts=pool.checkouts,
+            timeouts=pool.timeouts,
+            peak_checked_out=pool.peak_checked_out,
+            avg_wait_ms=round(1000 * pool.wait_seconds / pool.checkouts, 3) if pool.checkouts else 0.0,
+            max_wait_ms=round(1000 * pool.max_wait_seconds, 3),
+        )
+    return out
+
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# SQLite's CURRENT_TIMESTAMP has second precision; store and bind datetimes in the
+# same text form so keyset comparisons on created_at line up with server defaults.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# request handlers use the async engine; the sync one above serves background jobs and CLIs
+async_engine = make_async_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Sessions are admitted first come, first served up to the pool's capacity. Without this gate
+# a request arriving just as a connection is returned takes it ahead of the ones already
+# waiting in the pool, and under overload those waiters make up a multi-second p99.
+_sessions = asyncio.Semaphore(DB_POOL_SIZE + DB_MAX_OVERFLOW)
+
+async def get_async_db():
+    async with _sessions:
+        async with AsyncSessionLocal() as db:
+            yield db
+
+# SQLite has a single writer. Queue write transactions on the event loop instead of letting
+# them collide in SQLite's busy handler, whose sleeps show up as multi-second p99s.
+_sqlite_writer = asyncio.Lock()
+
+def write_lock(db):
+    """`async with write_lock(db):` around a unit of writes + commit."""
+    return _sqlite_writer if db.bind.dialect.name == "sqlite" else contextlib.nullcontext()
+
+def _write_sync(fn, args):
+    with engine.begin() as conn:
+        return fn(conn, *args)
+
+async def run_write(db, fn, *args):
+    """
+    `fn(conn, *args)` as one committed transaction; returns its result. Every aiosqlite
+    statement is several thread hops, and under load each hop waits a full turn of the event
+    loop, all while the writer lock is held. On SQLite the unit therefore runs on the sync
+    engine in a single threadpool call, so the lock is held for one hop instead of ~10.
+    """
+    if db.bind.dialect.name != "sqlite":
+        result = await db.run_sync(lambda session: fn(session.connection(), *args))
+        await db.commit()
+        return result
+    async with _sqlite_writer:
+        return await run_in_threadpool(_write_sync, fn, args)
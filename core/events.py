@@ -0,0 +1,153 @@
+# backend/app/core/events.py
+import asyncio
+import json
+import logging
+from collections import deque
+from app.core.config import EVENTS_COALESCE_SECONDS, EVENTS_MAX_PER_TOPIC, EVENTS_QUEUE_SIZE
+
+log = logging.getLogger(__name__)
+
+# Live updates for the SSE stream (routes/events.py). Handlers publish to topics:
+#   "posts"      new posts                       (appended, capped per tick)
+#   "post:<id>"  counts of one post (last wins) and its new comments (appended, capped)
+# Every EVENTS_COALESCE_SECONDS the bus turns each topic's buffer into one pre-encoded
+# chunk and hands it to the topic's subscribers, so a post approved a thousand times in
+# a tick costs each viewer a single "counts" event.
+
+
+class Subscriber:
+    """One open stream: the topics it follows and a bounded backlog of encoded chunks."""
+
+    __slots__ = ("topics", "_chunks", "_ready", "overflowed")
+
+    def __init__(self, topics):
+        self.topics = frozenset(topics)
+        self._chunks = deque()
+        self._ready = asyncio.Event()
+        self.overflowed = False
+
+    def offer(self, chunk: str):
+        if len(self._chunks) >= EVENTS_QUEUE_SIZE:
+            # the client stopped reading: forget the backlog and tell it to refetch instead
+            self._chunks.clear()
+            self.overflowed = True
+        self._chunks.append(chunk)
+        self._ready.set()
+
+    async def next(self, timeout: float):
+        """Everything queued so far as one string, or None after `timeout` idle seconds."""
+        if not self._chunks:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        self._ready.clear()
+        out = "".join(self._chunks)
+        self._chunks.clear()
+        if self.overflowed:
+            self.overflowed = False
+            out = frame("resync", {"reason": "backlog"}) + out
+        return out
+
+
+def frame(event: str, data, event_id: int = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class EventBus:
+    """In-process and loop-bound: publish() is called from async handlers on the event loop."""
+
+    def __init__(self, interval: float = EVENTS_COALESCE_SECONDS, max_per_topic: int = EVENTS_MAX_PER_TOPIC):
+        self.interval = interval
+        self.max_per_topic = max_per_topic
+        self._subs = {}        # topic -> set of Subscriber
+        self._latest = {}      # topic -> {key: (event, data)}, last write wins
+        self._appended = {}    # topic -> [(event, data)]
+        self._overflow = set() # topics that hit max_per_topic this tick
+        self._seq = 0
+        self.published = 0
+        self.coalesced = 0
+        self.chunks = 0
+        self.ticks = 0
+
+    def subscribe(self, topics) -> Subscriber:
+        sub = Subscriber(topics)
+        for topic in sub.topics:
+            self._subs.setdefault(topic, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        for topic in sub.topics:
+            subs = self._subs.get(topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[topic]
+
+    def publish(self, topic: str, event: str, data, key=None):
+        """Queue an event for the next tick; with `key`, a later event with the same key replaces it."""
+        if topic not in self._subs:
+            return
+        self.published += 1
+        if key is not None:
+            latest = self._latest.setdefault(topic, {})
+            if key in latest:
+                self.coalesced += 1
+            latest[key] = (event, data)
+            return
+        pending = self._appended.setdefault(topic, [])
+        if len(pending) >= self.max_per_topic:
+            self._overflow.add(topic)
+            self.coalesced += 1
+            return
+        pending.append((event, data))
+
+    def tick(self) -> int:
+        """Deliver everything buffered since the last tick; returns the number of chunks handed out."""
+        latest, self._latest = self._latest, {}
+        appended, self._appended = self._appended, {}
+        overflow, self._overflow = self._overflow, set()
+        self.ticks += 1
+        delivered = 0
+        for topic in set(latest) | set(appended):
+            subs = self._subs.get(topic)
+            if not subs:
+                continue
+            parts = []
+            for event, data in appended.get(topic, ()):
+                self._seq += 1
+                parts.append(frame(event, data, self._seq))
+            if topic in overflow:
+                # more than max_per_topic in one tick: the client refetches rather than us streaming them all
+                parts.append(frame("resync", {"topic": topic}))
+            for event, data in latest.get(topic, {}).values():
+                self._seq += 1
+                parts.append(frame(event, data, self._seq))
+            chunk = "".join(parts)
+            for sub in subs:
+                sub.offer(chunk)
+                delivered += 1
+        self.chunks += delivered
+        return delivered
+
+    async def run_forever(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.tick()
+            except Exception:
+                log.exception("event bus tick failed")
+
+    def stats(self):
+        return {
+            "subscribers": len({s for subs in self._subs.values() for s in subs}),
+            "topics": len(self._subs),
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "chunks": self.chunks,
+            "ticks": self.ticks,
+        }
+
+
+bus = EventBus()
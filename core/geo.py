@@ -0,0 +1,163 @@
+# backend/app/core/geo.py
+import math
+import re
+
+# Offline gazetteer: South African provinces and towns -> (lat, lng).
+# Good enough for "near me" ranking; no network geocoder involved.
+PROVINCES = {
+    "gauteng": (-26.27, 28.11),
+    "western cape": (-33.23, 21.86),
+    "eastern cape": (-32.30, 26.42),
+    "kwazulu-natal": (-28.53, 30.90),
+    "kzn": (-28.53, 30.90),
+    "limpopo": (-23.40, 29.42),
+    "mpumalanga": (-25.57, 30.53),
+    "north west": (-26.66, 25.28),
+    "free state": (-28.45, 26.80),
+    "northern cape": (-29.05, 21.86),
+}
+
+TOWNS = {
+    # Gauteng
+    "johannesburg": (-26.2041, 28.0473), "joburg": (-26.2041, 28.0473), "jhb": (-26.2041, 28.0473),
+    "pretoria": (-25.7479, 28.2293), "tshwane": (-25.7479, 28.2293), "soweto": (-26.2485, 27.8540),
+    "sandton": (-26.1076, 28.0567), "midrand": (-25.9964, 28.1263), "centurion": (-25.8603, 28.1894),
+    "benoni": (-26.1885, 28.3208), "germiston": (-26.2227, 28.1700), "boksburg": (-26.2125, 28.2560),
+    "krugersdorp": (-26.0851, 27.7749), "roodepoort": (-26.1625, 27.8725), "vereeniging": (-26.6736, 27.9319),
+    "vanderbijlpark": (-26.7118, 27.8379), "springs": (-26.2500, 28.4000), "tembisa": (-25.9964, 28.2268),
+    # Western Cape
+    "cape town": (-33.9249, 18.4241), "stellenbosch": (-33.9321, 18.8602), "paarl": (-33.7342, 18.9621),
+    "worcester": (-33.6465, 19.4485), "george": (-33.9630, 22.4617), "mossel bay": (-34.1831, 22.1460),
+    "knysna": (-34.0363, 23.0471), "oudtshoorn": (-33.5920, 22.2014), "hermanus": (-34.4187, 19.2345),
+    "saldanha": (-33.0117, 17.9442),
+    # KwaZulu-Natal
+    "durban": (-29.8587, 31.0218), "pietermaritzburg": (-29.6006, 30.3794), "richards bay": (-28.7830, 32.0377),
+    "newcastle": (-27.7580, 29.9318), "ladysmith": (-28.5539, 29.7784), "port shepstone": (-30.7414, 30.4550),
+    "umhlanga": (-29.7261, 31.0849), "empangeni": (-28.7621, 31.8933), "vryheid": (-27.7690, 30.7916),
+    # Eastern Cape
+    "gqeberha": (-33.9608, 25.6022), "port elizabeth": (-33.9608, 25.6022), "east london": (-33.0153, 27.9116),
+    "mthatha": (-31.5889, 28.7844), "makhanda": (-33.3042, 26.5328), "grahamstown": (-33.3042, 26.5328),
+    "komani": (-31.8976, 26.8753), "queenstown": (-31.8976, 26.8753), "jeffreys bay": (-34.0500, 24.9167),
+    "kariega": (-33.7577, 25.3971), "uitenhage": (-33.7577, 25.3971),
+    # Free State
+    "bloemfontein": (-29.0852, 26.1596), "welkom": (-27.9774, 26.7351), "bethlehem": (-28.2308, 28.3071),
+    "kroonstad": (-27.6504, 27.2349), "sasolburg": (-26.8136, 27.8169),
+    # Limpopo
+    "polokwane": (-23.9045, 29.4689), "thohoyandou": (-22.9456, 30.4850), "tzaneen": (-23.8332, 30.1635),
+    "mokopane": (-24.1944, 29.0097), "makhado": (-23.0430, 29.9030), "louis trichardt": (-23.0430, 29.9030),
+    "musina": (-22.3381, 30.0417), "giyani": (-23.3025, 30.7187), "phalaborwa": (-23.9430, 31.1411),
+    "bela-bela": (-24.8845, 28.2907), "lephalale": (-23.6769, 27.7000),
+    # Mpumalanga
+    "mbombela": (-25.4753, 30.9694), "nelspruit": (-25.4753, 30.9694), "emalahleni": (-25.8713, 29.2332),
+    "witbank": (-25.8713, 29.2332), "middelburg": (-25.7751, 29.4648), "secunda": (-26.5504, 29.1781),
+    "ermelo": (-26.5333, 29.9833), "hazyview": (-25.0431, 31.1293), "white river": (-25.3319, 31.0110),
+    # North West
+    "rustenburg": (-25.6676, 27.2421), "mahikeng": (-25.8560, 25.6403), "mafikeng": (-25.8560, 25.6403),
+    "klerksdorp": (-26.8521, 26.6667), "potchefstroom": (-26.7145, 27.0970), "brits": (-25.6347, 27.7800),
+    "vryburg": (-26.9566, 24.7284),
+    # Northern Cape
+    "kimberley": (-28.7282, 24.7499), "upington": (-28.4478, 21.2561), "springbok": (-29.6643, 17.8865),
+    "kuruman": (-27.4524, 23.4325), "de aar": (-30.6497, 24.0123),
+}
+
+# longest names first so "east london" wins over a bare "london"-style partial
+_NAMES = sorted(TOWNS, key=len, reverse=True) + sorted(PROVINCES, key=len, reverse=True)
+
+# Grid bucket index: 0.25 degree cells (~25 km) keyed as a single integer.
+CELL_DEG = 0.25
+_COLS = int(360 / CELL_DEG)
+_KM_PER_DEG = 111.32
+EARTH_KM = 6371.0
+
+
+def geocode(location: str):
+    """Resolve a free-text SA town/province to (lat, lng), or None."""
+    if not location:
+        return None
+    text = re.sub(r"[^a-z\- ,]", " ", location.lower())
+    for part in [text] + [p for p in text.split(",")]:
+        part = " ".join(part.split())
+        if part in TOWNS:
+            return TOWNS[part]
+        if part in PROVINCES:
+            return PROVINCES[part]
+    padded = f" {' '.join(text.replace(',', ' ').split())} "
+    for name in _NAMES:
+        if f" {name} " in padded:
+            return TOWNS.get(name) or PROVINCES[name]
+    return None
+
+
+def cell_of(lat: float, lng: float) -> int:
+    return _row(lat) * _COLS + _col(lng)
+
+
+def _row(lat):
+    return int(math.floor((lat + 90.0) / CELL_DEG))
+
+
+def _col(lng):
+    return int(math.floor((lng + 180.0) / CELL_DEG)) % _COLS
+
+
+def ring_cells(lat: float, lng: float, r: int):
+    """Cell keys on the square ring at Chebyshev distance r from the point's cell."""
+    row, col = _row(lat), _col(lng)
+    if r == 0:
+        return [row * _COLS + col]
+    out = []
+    for dr in range(-r, r + 1):
+        for dc in range(-r, r + 1):
+            if max(abs(dr), abs(dc)) == r:
+                out.append((row + dr) * _COLS + (col + dc) % _COLS)
+    return out
+
+
+def ring_radius_km(lat: float, r: int) -> float:
+    """Every point closer than this is guaranteed to sit within rings 0..r."""
+    # cells are narrowest in longitude, and narrower still towards the pole
+    return r * CELL_DEG * _KM_PER_DEG * math.cos(math.radians(min(abs(lat) + r * CELL_DEG, 89.0)))
+
+
+def cells_within(lat: float, lng: float, km: float):
+    """Cell keys covering every point within `km` of (lat, lng): rings 0..r, smallest such r."""
+    r = 0
+    while ring_radius_km(lat, r) < km and r < 40:
+        r += 1
+    return [c for i in range(r + 1) for c in ring_cells(lat, lng, i)]
+
+
+def haversine_km(lat1, lng1, lat2, lng2) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_KM * math.asin(math.sqrt(a))
+
+
+def locate_user(user, lat: float = None, lng: float = None):
+    """Set lat/lng/geo_cell from explicit coordinates or the free-text location."""
+    if lat is None or lng is None:
+        point = geocode(user.location)
+        lat, lng = point if point else (None, None)
+    user.lat, user.lng = lat, lng
+    user.geo_cell = cell_of(lat, lng) if lat is not None else None
+
+
+def nearest(fetch_cells, lat: float, lng: float, k: int = 10, max_km: float = 300.0):
+    """
+    k nearest points around (lat, lng), expanding ring by ring over the grid index.
+    `fetch_cells(cells)` returns objects with .lat/.lng for the given cell keys.
+    Returns [(distance_km, obj)] sorted by distance.
+    """
+    found = []
+    r = 0
+    while True:
+        for obj in fetch_cells(ring_cells(lat, lng, r)):
+            d = haversine_km(lat, lng, obj.lat, obj.lng)
+            if d <= max_km:
+                found.append((d, obj))
+        covered = ring_radius_km(lat, r)
+        found.sort(key=lambda t: t[0])
+        if (len(found) >= k and found[k - 1][0] <= covered) or covered >= max_km:
+            return found[:k]
+        r += 1
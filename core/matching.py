@@ -0,0 +1,220 @@
+# backend/app/core/matching.py
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import MATCH_RADIUS_KM, MATCHES_PER_REQUEST, MATCH_CANDIDATE_SCAN, MATCH_BATCH, MATCH_POLL_SECONDS
+from app.core.geo import cells_within, haversine_km
+from app.models.listing import ExchangeMatch, ExchangeRequest, Listing
+from app.models.user import User
+from app.models.user_skill import UserSkill
+
+log = logging.getLogger(__name__)
+matches = ExchangeMatch.__table__
+
+# Incremental matching. Rows with matched_at IS NULL are the queue (ix_*_unmatched): each new
+# request is compared once against active listings and skilled users near it, each new listing
+# once against open requests near it, and both are stamped. Nothing already matched is ever
+# looked at again, so the cost is proportional to what was posted, not to the table sizes.
+# Every candidate query is an index range: category + status + geo_cell (ix_*_browse_geo) or
+# the skill prefix on ix_user_skills_skill_user.
+
+NO_LOCATION_PENALTY = 300
+
+
+def score(distance_km: float = None, price_cents: int = None, budget_cents: int = None) -> int:
+    """Higher is better: close by, and comfortably within budget."""
+    s = 1000
+    if distance_km is None:
+        s -= NO_LOCATION_PENALTY
+    else:
+        s -= int(distance_km * 500 / max(MATCH_RADIUS_KM, 1))
+    if price_cents is not None and budget_cents:
+        s += int(200 * max(0.0, 1 - price_cents / budget_cents))
+    return s
+
+
+def _distance(a, b):
+    if a.lat is None or b.lat is None:
+        return None
+    return haversine_km(a.lat, a.lng, b.lat, b.lng)
+
+
+def _near(row):
+    """geo_cell values to look in, or None when the row has no location (match on category only)."""
+    return cells_within(row.lat, row.lng, MATCH_RADIUS_KM) if row.lat is not None else None
+
+
+def _within(distance_km):
+    return distance_km is None or distance_km <= MATCH_RADIUS_KM
+
+
+def _listings_for(db: Session, req: ExchangeRequest):
+    q = select(Listing).where(Listing.category == req.category, Listing.status == "active", Listing.user_id != req.user_id)
+    cells = _near(req)
+    if cells:
+        q = q.where(Listing.geo_cell.in_(cells))
+    if req.max_price_cents is not None:
+        q = q.where(or_(Listing.price_cents.is_(None), Listing.price_cents <= req.max_price_cents))
+    rows = db.execute(q.order_by(Listing.created_at.desc(), Listing.id.desc()).limit(MATCH_CANDIDATE_SCAN)).scalars().all()
+    out = []
+    for l in rows:
+        d = _distance(req, l)
+        if _within(d):
+            out.append({"request_id": req.id, "kind": "listing", "target_id": l.id, "candidate_user_id": l.user_id,
+                        "score": score(d, l.price_cents, req.max_price_cents), "distance_km": d})
+    return out
+
+
+def _users_for(db: Session, req: ExchangeRequest):
+    # people whose skills start with the category ("plumb" finds "plumbing"), see core/search.py
+    s = req.category
+    q = (
+        select(User)
+        .join(UserSkill, UserSkill.user_id == User.id)
+        .where(and_(UserSkill.skill >= s, UserSkill.skill < s + "\uffff"), User.discoverable.is_(True), User.id != req.user_id)
+    )
+    cells = _near(req)
+    if cells:
+        q = q.where(User.geo_cell.in_(cells))
+    rows = db.execute(q.distinct().order_by(User.id.desc()).limit(MATCH_CANDIDATE_SCAN)).scalars().all()
+    out = []
+    for u in rows:
+        d = _distance(req, u)
+        if _within(d):
+            out.append({"request_id": req.id, "kind": "user", "target_id": u.id, "candidate_user_id": u.id,
+                        "score": score(d), "distance_km": d})
+    return out
+
+
+def _top(rows):
+    return sorted(rows, key=lambda m: -m["score"])[:MATCHES_PER_REQUEST]
+
+
+def match_request(db: Session, req: ExchangeRequest):
+    """Best listings and best skilled users for a new request."""
+    return _top(_listings_for(db, req)) + _top(_users_for(db, req))
+
+
+def match_listing(db: Session, listing: Listing):
+    """Open requests a new listing can serve: same category, nearby, budget not below its price."""
+    q = select(ExchangeRequest).where(
+        ExchangeRequest.category == listing.category, ExchangeRequest.status == "open", ExchangeRequest.user_id != listing.user_id,
+    )
+    cells = _near(listing)
+    if cells:
+        q = q.where(ExchangeRequest.geo_cell.in_(cells))
+    if listing.price_cents is not None:
+        q = q.where(or_(ExchangeRequest.max_price_cents.is_(None), ExchangeRequest.max_price_cents >= listing.price_cents))
+    rows = db.execute(q.order_by(ExchangeRequest.created_at.desc(), ExchangeRequest.id.desc()).limit(MATCH_CANDIDATE_SCAN)).scalars().all()
+    out = []
+    for r in rows:
+        d = _distance(r, listing)
+        if _within(d):
+            out.append({"request_id": r.id, "kind": "listing", "target_id": listing.id, "candidate_user_id": listing.user_id,
+                        "score": score(d, listing.price_cents, r.max_price_cents), "distance_km": d})
+    return out
+
+
+def insert_stmt(dialect_name: str):
+    """INSERT matches, doing nothing for a (request, kind, target) that is already there."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(matches).on_conflict_do_nothing(index_elements=[matches.c.request_id, matches.c.kind, matches.c.target_id])
+
+
+def _pending(db: Session, model, limit: int):
+    return db.execute(select(model).where(model.matched_at.is_(None)).order_by(model.id).limit(limit)).scalars().all()
+
+
+def run_batch(db: Session, limit: int = MATCH_BATCH):
+    """Match up to `limit` unmatched requests and listings; returns (rows handled, candidate pairs)."""
+    now = datetime.now(timezone.utc)
+    found = []
+    reqs = _pending(db, ExchangeRequest, limit)
+    for r in reqs:
+        if r.status == "open":
+            found += match_request(db, r)
+        r.matched_at = now
+    listings = _pending(db, Listing, limit)
+    for l in listings:
+        if l.status == "active":
+            found += match_listing(db, l)
+        l.matched_at = now
+    if found:
+        db.execute(insert_stmt(db.bind.dialect.name), found)
+    db.commit()
+    return len(reqs) + len(listings), len(found)
+
+
+class MatchStats:
+    def __init__(self):
+        self.batches = 0
+        self.rows = 0
+        self.candidates = 0     # pairs offered for insert; a pair seen from both sides is stored once
+        self.errors = 0
+
+    def stats(self):
+        return {"batches": self.batches, "rows": self.rows, "candidates": self.candidates, "errors": self.errors}
+
+
+matcher = MatchStats()
+
+
+def run_pending(limit: int = MATCH_BATCH):
+    """One batch on the current thread with its own session; returns how many rows it handled."""
+    from app.core.database import SessionLocal
+    db = SessionLocal()
+    try:
+        rows, found = run_batch(db, limit)
+    finally:
+        db.close()
+    if rows:
+        matcher.batches += 1
+        matcher.rows += rows
+        matcher.candidates += found
+    return rows
+
+
+async def worker_forever(poll: float = MATCH_POLL_SECONDS):
+    """Local worker: the unmatched rows are the queue, so a restart simply picks up where it was."""
+    while True:
+        try:
+            ran = await run_in_threadpool(run_pending)
+        except Exception:
+            matcher.errors += 1
+            log.exception("matching worker failed")
+            ran = 0
+        if not ran:
+            await asyncio.sleep(poll)
+
+
+def rematch(db: Session):
+    """Queue every open request and active listing again (after changing the scoring or radius)."""
+    db.execute(ExchangeRequest.__table__.update().where(ExchangeRequest.status == "open").values(matched_at=None))
+    db.execute(Listing.__table__.update().where(Listing.status == "active").values(matched_at=None))
+    db.commit()
+
+
+if __name__ == "__main__":
+    from app.core.database import SessionLocal
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    ap = argparse.ArgumentParser(description="Drain the marketplace matching queue.")
+    ap.add_argument("--rematch", action="store_true", help="re-queue all open requests and active listings first")
+    ap.add_argument("--batch", type=int, default=MATCH_BATCH)
+    args = ap.parse_args()
+    if args.rematch:
+        with SessionLocal() as db:
+            rematch(db)
+    total = 0
+    while True:
+        n = run_pending(args.batch)
+        if not n:
+            break
+        total += n
+    print(f"matched {total} rows, {matcher.candidates} candidates")
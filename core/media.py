@@ -0,0 +1,211 @@
+# backend/app/core/media.py
+import asyncio
+import json
+import logging
+import os
+import shutil
+import subprocess
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core import storage
+from app.core.cache import response_cache
+from app.core.config import UPLOAD_DIR, MEDIA_VARIANT_WIDTHS, MEDIA_WORKER_POLL_SECONDS, MEDIA_RETRY_BASE_SECONDS, FFMPEG_BIN
+from app.models.media import MediaJob
+from app.models.post import Post
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it posts keep their original media only
+    Image = None
+
+log = logging.getLogger(__name__)
+jobs = MediaJob.__table__
+
+MAX_ATTEMPTS = 3     # failed runs before a job is given up on
+# a job locked longer than this belongs to a worker that died
+LOCK_TIMEOUT = timedelta(minutes=10)
+
+
+def enqueue_stmt(post_id: int, media_url: str, media_type: str):
+    return jobs.insert().values(post_id=post_id, source=storage._name(media_url), media_type=media_type, status="queued")
+
+
+async def enqueue(db, post_id: int, media_url: str, media_type: str):
+    """Queue variants for a post, in the caller's AsyncSession transaction; wake() after commit."""
+    await db.execute(enqueue_stmt(post_id, media_url, media_type))
+
+
+_wakeup = None
+
+
+def wake():
+    """Tell the local worker a job was committed, so it does not wait out its poll interval."""
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def claim_next(db: Session):
+    """Atomically take the oldest runnable job, or None."""
+    now = datetime.now(timezone.utc)
+    due = or_(jobs.c.run_after.is_(None), jobs.c.run_after <= now)
+    runnable = or_((jobs.c.status == "queued") & due, (jobs.c.status == "running") & (jobs.c.locked_at < now - LOCK_TIMEOUT))
+    job_id = db.execute(select(jobs.c.id).where(runnable).order_by(jobs.c.id).limit(1)).scalar()
+    if job_id is None:
+        return None
+    # compare-and-set so two workers never run the same job
+    claimed = db.execute(
+        jobs.update().where(jobs.c.id == job_id, runnable)
+        .values(status="running", locked_at=now, attempts=jobs.c.attempts + 1)
+    ).rowcount
+    db.commit()
+    return db.get(MediaJob, job_id) if claimed else None
+
+
+# ---------------------------
+# Variant generation
+# ---------------------------
+def _image_variants(src_path: str, made: list):
+    """Resized WebP + JPEG copies for each configured width narrower than the source."""
+    out = {"image/webp": {}, "image/jpeg": {}}
+    with Image.open(src_path) as im:
+        im = ImageOps.exif_transpose(im)
+        widths = [w for w in MEDIA_VARIANT_WIDTHS if w < im.width] or [im.width]
+        for w in widths:
+            h = max(1, round(im.height * w / im.width))
+            resized = im.resize((w, h), Image.LANCZOS)
+            for mime, ext, fmt, opts in (
+                ("image/webp", ".webp", "WEBP", {"quality": 80, "method": 4}),
+                ("image/jpeg", ".jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+            ):
+                tmp = storage.new_tmp_path(ext)
+                made.append(tmp)
+                img = resized.convert("RGB") if fmt == "JPEG" else resized
+                img.save(tmp, fmt, **opts)
+                out[mime][w] = storage.store_path(tmp)
+    return out
+
+
+def _video_poster(src_path: str, made: list):
+    if not shutil.which(FFMPEG_BIN):
+        return None
+    tmp = storage.new_tmp_path(".jpg")
+    made.append(tmp)
+    cmd = [FFMPEG_BIN, "-nostdin", "-loglevel", "error", "-y", "-ss", "1", "-i", src_path, "-frames:v", "1", tmp]
+    if subprocess.run(cmd, timeout=60).returncode != 0 or not os.path.exists(tmp):
+        # very short clips have no frame at 1s; take the first one
+        cmd[cmd.index("-ss"):cmd.index("-ss") + 2] = []
+        subprocess.run(cmd, timeout=60, check=True)
+    return storage.store_path(tmp)
+
+
+def build_variants(db: Session, job: MediaJob, made: list):
+    """
+    Generate files for one job; returns the variant map stored on the post. Every path written
+    (scratch files, and store files that did not exist before) goes into `made` for cleanup.
+    """
+    src = os.path.join(UPLOAD_DIR, job.source)
+    stored = []
+    variants = {}
+    if job.media_type == "video":
+        poster = _video_poster(src, made)
+        if poster:
+            stored.append(poster)
+            variants["poster"] = poster.url
+            src = poster.local
+        else:
+            src = None
+    if src and Image is not None:
+        for mime, by_width in _image_variants(src, made).items():
+            variants[mime] = {str(w): f.url for w, f in by_width.items()}
+            stored.extend(by_width.values())
+    for f in stored:
+        if not os.path.exists(f.path):
+            made.append(f.path)
+        storage.register(db, f, refs=1)
+    return variants
+
+
+def retry_delay(failures: int) -> timedelta:
+    return timedelta(seconds=MEDIA_RETRY_BASE_SECONDS * 2 ** (failures - 1))
+
+
+def process(db: Session, job: MediaJob):
+    made = []
+    try:
+        variants = build_variants(db, job, made)
+        db.query(Post).filter(Post.id == job.post_id).update({"variants": json.dumps(variants)}, synchronize_session=False)
+        job.status, job.error, job.locked_at = "done", None, None
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        # the blob rows went with the rollback; drop the partial files with them
+        for path in made:
+            storage._discard(path)
+        log.exception("media job %s failed", job.id)
+        job = db.get(MediaJob, job.id)
+        job.failures = (job.failures or 0) + 1
+        if job.failures >= MAX_ATTEMPTS:
+            job.status = "failed"
+        else:
+            job.status = "queued"
+            job.run_after = datetime.now(timezone.utc) + retry_delay(job.failures)
+        job.error = str(e)[:1000]
+        job.locked_at = None
+        db.commit()
+        return
+    # cached pages carry a post:<id> tag for each post on them (routes/post.py _feed_tags)
+    response_cache.invalidate(f"post:{job.post_id}")
+
+
+def run_pending(limit: int = 20):
+    """Drain up to `limit` jobs on the current thread; returns how many ran."""
+    from app.core.database import SessionLocal
+    db = SessionLocal()
+    try:
+        n = 0
+        while n < limit:
+            job = claim_next(db)
+            if job is None:
+                break
+            process(db, job)
+            n += 1
+        return n
+    finally:
+        db.close()
+
+
+async def worker_forever(poll: float = MEDIA_WORKER_POLL_SECONDS):
+    """Local worker: no broker, the media_jobs table is the queue; wake() cuts the idle wait short."""
+    global _wakeup
+    _wakeup = asyncio.Event()
+    while True:
+        _wakeup.clear()
+        try:
+            ran = await run_in_threadpool(run_pending)
+        except Exception:
+            log.exception("media worker failed")
+            ran = 0
+        if not ran:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), poll)
+            except asyncio.TimeoutError:
+                pass
+
+
+def srcset(variants_json: str):
+    """Variant map for API responses: {"image/webp": "url 320w, ...", "image/jpeg": ..., "poster": url}."""
+    if not variants_json:
+        return None
+    try:
+        variants = json.loads(variants_json)
+    except Exception:
+        return None
+    out = {}
+    for key, value in variants.items():
+        if isinstance(value, dict):
+            out[key] = ", ".join(f"{url} {w}w" for w, url in sorted(value.items(), key=lambda kv: int(kv[0])))
+        else:
+            out[key] = value
+    return out
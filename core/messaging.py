@@ -0,0 +1,215 @@
+# backend/app/core/messaging.py
+import asyncio
+import json
+import logging
+from collections import deque
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import MESSAGE_SEND_QUEUE_SIZE, MESSAGE_MAX_SOCKETS_PER_USER, MESSAGE_MAX_LENGTH
+from app.core.database import write_lock
+from app.models.message import Conversation, Message
+from app.models.user import User
+
+log = logging.getLogger(__name__)
+
+conversations = Conversation.__table__
+
+# close codes sent to clients
+CLOSE_POLICY = 1008      # bad or missing token
+CLOSE_TRY_LATER = 1013   # too slow to keep up, or too many sockets for this user
+
+
+class Connection:
+    """
+    One open socket. Outbound frames go through a bounded deque; a writer task exists
+    only while there is something to send, so an idle connection costs one small object.
+    """
+
+    __slots__ = ("ws", "user_id", "closed", "_frames", "_writer")
+
+    def __init__(self, ws, user_id: int):
+        self.ws = ws
+        self.user_id = user_id
+        self.closed = False
+        self._frames = deque()
+        self._writer = None
+
+    def offer(self, frame: str) -> bool:
+        """Queue a frame; False when the client is MESSAGE_SEND_QUEUE_SIZE frames behind."""
+        if self.closed:
+            return True
+        if len(self._frames) >= MESSAGE_SEND_QUEUE_SIZE:
+            return False
+        self._frames.append(frame)
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._drain())
+        return True
+
+    async def _drain(self):
+        try:
+            while self._frames:
+                await self.ws.send_text(self._frames.popleft())
+                hub.frames_sent += 1
+        except Exception:
+            # socket already gone; the receive loop sees the disconnect and unregisters us
+            self.closed = True
+            self._frames.clear()
+        finally:
+            # close() may have replaced us with its own task; keep that reference alive
+            if self._writer is asyncio.current_task():
+                self._writer = None
+
+    def close(self, code: int):
+        if self.closed:
+            return
+        self.closed = True
+        self._frames.clear()
+        if self._writer is not None:
+            self._writer.cancel()
+        self._writer = asyncio.create_task(self._close(code))
+
+    async def _close(self, code: int):
+        try:
+            await self.ws.close(code=code)
+        except Exception:
+            pass
+
+
+class Hub:
+    """
+    In-process pub/sub: user id -> that user's open sockets (tabs, devices). Frames are
+    serialized once per publish and shared by every recipient socket. Only sockets held
+    by this worker are reached; other workers' clients catch up from history.
+    """
+
+    def __init__(self):
+        self._sockets = {}   # user_id -> set of Connection
+        self.connections = 0
+        self.frames_sent = 0
+        self.published = 0
+        self.dropped_slow = 0
+        self.rejected = 0
+
+    def connect(self, ws, user_id: int):
+        """Register an accepted socket, or None when the user already has too many open."""
+        mine = self._sockets.setdefault(user_id, set())
+        if len(mine) >= MESSAGE_MAX_SOCKETS_PER_USER:
+            self.rejected += 1
+            return None
+        conn = Connection(ws, user_id)
+        mine.add(conn)
+        self.connections += 1
+        return conn
+
+    def disconnect(self, conn: Connection):
+        mine = self._sockets.get(conn.user_id)
+        if mine is None or conn not in mine:
+            return
+        mine.discard(conn)
+        self.connections -= 1
+        if not mine:
+            del self._sockets[conn.user_id]
+        conn.closed = True
+
+    def publish(self, user_ids, frame: dict) -> int:
+        """Send `frame` to every socket of `user_ids`; returns how many sockets it was queued on."""
+        text = json.dumps(frame, separators=(",", ":"))
+        queued = 0
+        self.published += 1
+        for user_id in set(user_ids):
+            for conn in list(self._sockets.get(user_id, ())):
+                if conn.offer(text):
+                    queued += 1
+                else:
+                    # backpressure: never buffer without bound for a reader that stopped reading
+                    self.dropped_slow += 1
+                    log.info("dropping slow message socket of user %s", user_id)
+                    conn.close(CLOSE_TRY_LATER)
+                    self.disconnect(conn)
+        return queued
+
+    def online(self, user_id: int) -> bool:
+        return bool(self._sockets.get(user_id))
+
+    def stats(self):
+        return {
+            "connections": self.connections,
+            "users": len(self._sockets),
+            "published": self.published,
+            "frames_sent": self.frames_sent,
+            "dropped_slow": self.dropped_slow,
+            "rejected": self.rejected,
+        }
+
+
+hub = Hub()
+
+
+def message_out(m: Message):
+    return {
+        "id": m.id,
+        "conversationId": m.conversation_id,
+        "senderId": m.sender_id,
+        "text": m.text,
+        "createdAt": m.created_at.isoformat() if m.created_at else None,
+    }
+
+
+def pair(a: int, b: int):
+    return (a, b) if a < b else (b, a)
+
+
+def _pair_stmt(dialect_name: str, user_a: int, user_b: int):
+    """INSERT the conversation row for an ordered pair, doing nothing if it already exists."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    ins = insert(conversations).values(user_a=user_a, user_b=user_b)
+    return ins.on_conflict_do_nothing(index_elements=[conversations.c.user_a, conversations.c.user_b])
+
+
+def conversation_stmt(user_id: int, other_id: int):
+    user_a, user_b = pair(user_id, other_id)
+    return select(Conversation).where(Conversation.user_a == user_a, Conversation.user_b == user_b)
+
+
+async def send(db: AsyncSession, sender_id: int, recipient_id: int, text: str, client_id=None) -> dict:
+    """Persist one message and push it to both participants' open sockets."""
+    # WebSocket frames are arbitrary JSON: {"text": 5} or {"text": ["a"]} must not get past here
+    if text is not None and not isinstance(text, str):
+        raise HTTPException(status_code=422, detail="'text' must be a string")
+    text = (text or "").strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Missing 'text' in body")
+    if len(text) > MESSAGE_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Message longer than {MESSAGE_MAX_LENGTH} characters")
+    if recipient_id == sender_id:
+        raise HTTPException(status_code=400, detail="Cannot message yourself")
+    if (await db.execute(select(User.id).where(User.id == recipient_id))).first() is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    user_a, user_b = pair(sender_id, recipient_id)
+    async with write_lock(db):
+        await db.execute(_pair_stmt(db.bind.dialect.name, user_a, user_b))
+        conversation_id = (await db.execute(
+            select(conversations.c.id).where(conversations.c.user_a == user_a, conversations.c.user_b == user_b)
+        )).scalar_one()
+        message = Message(conversation_id=conversation_id, sender_id=sender_id, text=text)
+        db.add(message)
+        await db.flush()
+        await db.execute(
+            conversations.update()
+            .where(conversations.c.id == conversation_id)
+            .values(last_message_id=message.id, last_message_at=func.now())
+        )
+        await db.commit()
+    await db.refresh(message, ["created_at"])
+    out = message_out(message)
+    frame = {"type": "message", "message": out}
+    if client_id is not None:
+        # lets the sending tab match the echo to its optimistic bubble
+        frame["clientId"] = client_id
+    hub.publish((sender_id, recipient_id), frame)
+    return out
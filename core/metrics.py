@@ -0,0 +1,257 @@
+# backend/app/core/metrics.py
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+from app.core.config import METRICS_SERVER_TIMING, N_PLUS_ONE_QUERY_THRESHOLD, N_PLUS_ONE_REPEAT_THRESHOLD
+
+log = logging.getLogger(__name__)
+
+# Per-process metrics in Prometheus text format (GET /metrics). With several workers,
+# scrape each one or put them behind a per-worker port; nothing here is shared.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+_LE_INF = 'le="+Inf"'
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Count:
+    """Monotonic counter, optionally labelled."""
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, n=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + n
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for values, total in items:
+            yield f"{self.name}{_labels(self.labels, values)} {_num(total)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}   # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for values, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                le = f'le="{_num(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labels, values, le)} {cumulative}"
+            yield f"{self.name}_bucket{_labels(self.labels, values, _LE_INF)} {series[-1]}"
+            yield f"{self.name}_sum{_labels(self.labels, values)} {_num(series[-2])}"
+            yield f"{self.name}_count{_labels(self.labels, values)} {series[-1]}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []   # (prefix, fn, labels)
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def collect(self, prefix: str, fn, **labels):
+        """Export the numeric values of `fn()` (a component's .stats()) as gauges named <prefix>_<key>."""
+        # replaces an earlier registration of the same series, so building the app twice doesn't duplicate them
+        self._collectors = [c for c in self._collectors if (c[0], c[2]) != (prefix, labels)]
+        self._collectors.append((prefix, fn, labels))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        gauges = {}
+        for prefix, fn, labels in self._collectors:
+            try:
+                stats = fn()
+            except Exception:
+                log.exception("metrics collector %s failed", prefix)
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                gauges.setdefault(f"{prefix}_{key}", []).append((labels, value))
+        for name, samples in gauges.items():
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.add(Count("vsx_http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status")))
+http_latency = registry.add(Histogram("vsx_http_request_duration_seconds", "Time to the end of the response body.", ("method", "route")))
+http_queries = registry.add(Histogram("vsx_http_request_db_queries", "SQL statements per request.", ("method", "route"), COUNT_BUCKETS))
+n_plus_one = registry.add(Count("vsx_http_n_plus_one_total", "Requests over the N+1 query thresholds.", ("method", "route")))
+db_queries = registry.add(Histogram("vsx_db_query_duration_seconds", "Duration of single SQL statements.", ("engine",), QUERY_BUCKETS))
+upload_bytes = registry.add(Count("vsx_upload_bytes_total", "Upload bytes written to disk."))
+upload_seconds = registry.add(Count("vsx_upload_disk_seconds_total", "Time spent in upload disk writes."))
+uploads = registry.add(Histogram("vsx_upload_duration_seconds", "Wall time to receive and store one upload.", (), LATENCY_BUCKETS))
+
+
+# ---------------------------
+# Per-request accounting
+# ---------------------------
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "disk_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.disk_seconds = 0.0
+        self.statements = Counter()
+
+
+# set by MetricsMiddleware; contextvars follow the request into run_in_threadpool and
+# into SQLAlchemy's async greenlets, so the hooks below find the right request
+current = contextvars.ContextVar("request_stats", default=None)
+
+
+def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_metrics_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    db_queries.observe(elapsed, conn.engine.dialect.driver)
+    stats = current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        stats.statements[statement] += 1
+
+
+def instrument_engine(sync_engine):
+    """Time every statement on an engine (for async engines pass engine.sync_engine)."""
+    from sqlalchemy import event  # here, not at the top: app.main imports this module before any engine exists
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor)
+
+
+def record_upload(size: int, disk_seconds: float, seconds: float):
+    upload_bytes.inc(n=size)
+    upload_seconds.inc(n=disk_seconds)
+    uploads.observe(seconds)
+    stats = current.get()
+    if stats is not None:
+        stats.disk_seconds += disk_seconds
+
+
+def _route(scope) -> str:
+    route = scope.get("route")
+    # templates, never raw paths: /posts/{post_id}, not one series per post
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _server_timing(stats: RequestStats, app_seconds: float) -> bytes:
+    parts = [f'app;dur={app_seconds * 1000:.1f}', f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"']
+    if stats.disk_seconds:
+        parts.append(f"disk;dur={stats.disk_seconds * 1000:.1f}")
+    return ", ".join(parts).encode()
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI (streams are passed through untouched): per-route latency histogram, status
+    counts, SQL statements per request, N+1 flagging, and Server-Timing when enabled.
+    """
+
+    def __init__(self, app, server_timing: bool = METRICS_SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = RequestStats()
+        token = current.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", ()))
+                    headers.append((b"server-timing", _server_timing(stats, time.perf_counter() - start)))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current.reset(token)
+            route = _route(scope)
+            http_requests.inc(scope["method"], route, status)
+            http_latency.observe(time.perf_counter() - start, scope["method"], route)
+            http_queries.observe(stats.queries, scope["method"], route)
+            self._check_n_plus_one(scope["method"], route, stats)
+
+    @staticmethod
+    def _check_n_plus_one(method, route, stats: RequestStats):
+        if not stats.statements:
+            return
+        statement, repeats = stats.statements.most_common(1)[0]
+        if stats.queries >= N_PLUS_ONE_QUERY_THRESHOLD or repeats >= N_PLUS_ONE_REPEAT_THRESHOLD:
+            n_plus_one.inc(method, route)
+            log.warning(
+                "possible N+1 on %s %s: %d queries, %d x %s",
+                method, route, stats.queries, repeats, " ".join(statement.split())[:160],
+            )
@@ -0,0 +1,418 @@
+# backend/app/core/migrations.py
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+from sqlalchemy import (
+    BigInteger, Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text,
+    UniqueConstraint, exists, func, inspect, select, text,
+)
+from app.core.database import Timestamp, engine
+
+log = logging.getLogger(__name__)
+
+# Versioned schema changes, applied once per deploy instead of create_all on every import:
+#
+#     python -m app.core.migrations            upgrade to the latest version
+#     python -m app.core.migrations --check    exit 1 if the database is behind
+#
+# The app only checks the recorded version at startup (main.create_app). A migration is a
+# function of one Connection and runs in its own transaction with its schema_version row.
+# Data backfills stay separate CLIs (core.counters, core.search, core.timeline), except what
+# migration 6 fills in for rows that predate their columns and indexes.
+
+_meta = MetaData()
+schema_version = Table(
+    "schema_version", _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+# The schema as of the first versioned release, frozen here so that migrations 1 and 2 build
+# the same tables no matter what the models look like today. Never edit: model changes go in
+# a new migration below.
+_v1 = MetaData()
+Table(
+    "users", _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("first_name", String(120), nullable=True),
+    Column("last_name", String(120), nullable=True),
+    Column("email", String(320), unique=True, index=True, nullable=False),
+    Column("password_hash", String(256), nullable=False),
+    Column("role", String(50), default="client"),
+    Column("location", String(200), nullable=True),
+    Column("lat", Float, nullable=True),
+    Column("lng", Float, nullable=True),
+    Column("geo_cell", Integer, nullable=True, index=True),
+    Column("bio", Text, nullable=True),
+    Column("skills", Text, nullable=True),
+    Column("discoverable", Boolean, default=True),
+    Column("follower_count", Integer, default=0),
+)
+Table(
+    "user_skills", _v1,
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("skill", String(120), primary_key=True),
+    Index("ix_user_skills_skill_user", "skill", "user_id"),
+)
+_posts = Table(
+    "posts", _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+    Column("text", Text, nullable=True),
+    Column("media", String(1024), nullable=True),
+    Column("media_type", String(32), nullable=True),
+    Column("variants", Text, nullable=True),
+    Column("approvals", Integer, default=0),
+    Column("shares", Integer, default=0),
+    Column("comment_count", Integer, default=0),
+    Column("created_at", Timestamp, server_default=func.now()),
+)
+Index("ix_posts_created_at_id", _posts.c.created_at.desc(), _posts.c.id.desc())
+Table(
+    "post_approvals", _v1,
+    Column("post_id", Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("created_at", Timestamp, server_default=func.now()),
+)
+Table(
+    "comments", _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("post_id", Integer, ForeignKey("posts.id", ondelete="CASCADE")),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+    Column("text", Text, nullable=False),
+    Column("created_at", Timestamp, server_default=func.now()),
+    Index("ix_comments_post_created_id", "post_id", "created_at", "id"),
+)
+Table(
+    "follows", _v1,
+    Column("follower_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("followee_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("created_at", Timestamp, server_default=func.now()),
+    Index("ix_follows_followee_follower", "followee_id", "follower_id"),
+)
+Table(
+    "media_blobs", _v1,
+    Column("name", String(200), primary_key=True),
+    Column("sha256", String(64), index=True, nullable=False),
+    Column("size", BigInteger, nullable=False, default=0),
+    Column("refcount", Integer, nullable=False, default=0),
+    Column("touched_at", Timestamp, server_default=func.now(), index=True),
+)
+Table(
+    "media_jobs", _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("post_id", Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False),
+    Column("source", String(200), nullable=False),
+    Column("media_type", String(32), nullable=True),
+    Column("status", String(16), nullable=False, default="queued"),
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("error", Text, nullable=True),
+    Column("locked_at", Timestamp, nullable=True),
+    Column("created_at", Timestamp, server_default=func.now()),
+    Index("ix_media_jobs_status_id", "status", "id"),
+)
+_conversations = Table(
+    "conversations", _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_a", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("user_b", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("last_message_id", Integer, nullable=True),
+    Column("last_message_at", Timestamp, server_default=func.now()),
+    Column("created_at", Timestamp, server_default=func.now()),
+    UniqueConstraint("user_a", "user_b", name="uq_conversations_pair"),
+)
+_c = _conversations.c
+Index("ix_conversations_a_last", _c.user_a, _c.last_message_at.desc(), _c.id.desc())
+Index("ix_conversations_b_last", _c.user_b, _c.last_message_at.desc(), _c.id.desc())
+_messages = Table(
+    "messages", _v1,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("conversation_id", Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False),
+    Column("sender_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("text", Text, nullable=False),
+    Column("created_at", Timestamp, server_default=func.now()),
+)
+Index("ix_messages_conversation_created_id", _messages.c.conversation_id, _messages.c.created_at.desc(), _messages.c.id.desc())
+_timeline = Table(
+    "timeline_entries", _v1,
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("post_id", Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True),
+    Column("author_id", Integer, nullable=False),
+    Column("score", BigInteger, nullable=False),
+)
+Index("ix_timeline_user_score_post", _timeline.c.user_id, _timeline.c.score.desc(), _timeline.c.post_id.desc())
+
+# core/search.py: SQLite only, other backends use the LIKE fallback
+_USERS_FTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5("
+    "name, bio, location, skills, "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+
+
+def _baseline(conn):
+    # every table as of the first versioned release; existing tables are left alone
+    _v1.create_all(bind=conn)
+    if conn.dialect.name == "sqlite":
+        conn.execute(text(_USERS_FTS))
+
+
+def _catch_up(conn):
+    # databases built by the old create_all-at-import never got columns or indexes added to
+    # tables that already existed; add them (nullable, constant defaults filled in). Migration 6
+    # fills in comment_count and the search index for the rows already there
+    insp = inspect(conn)
+    for table in _v1.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+        have = {c["name"] for c in insp.get_columns(table.name)}
+        for col in table.columns:
+            if col.name in have:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col.type.compile(conn.dialect)}"
+            default = getattr(col.server_default, "arg", None)
+            if isinstance(default, str):
+                # constant defaults only: SQLite rejects ADD COLUMN ... DEFAULT CURRENT_TIMESTAMP
+                ddl += f" DEFAULT '{default}'"
+            conn.execute(text(ddl))
+            if col.default is not None and col.default.is_scalar:
+                # Python-side defaults (discoverable=True, counters=0) for the rows already there
+                conn.execute(table.update().values({col.name: col.default.arg}))
+            log.info("added column %s.%s", table.name, col.name)
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+# Marketplace tables as migration 3 shipped them; frozen like _v1 above.
+_v3 = MetaData()
+Table("users", _v3, Column("id", Integer, primary_key=True))   # referenced only, migration 1 creates it
+_listings = Table(
+    "listings", _v3,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("category", String(60), nullable=False),
+    Column("title", String(200), nullable=False),
+    Column("description", Text, nullable=True),
+    Column("price_cents", BigInteger, nullable=True),
+    Column("quantity", Integer, nullable=True),
+    Column("unit", String(30), nullable=True),
+    Column("location", String(200), nullable=True),
+    Column("lat", Float, nullable=True),
+    Column("lng", Float, nullable=True),
+    Column("geo_cell", Integer, nullable=True),
+    Column("status", String(16), nullable=False, default="active"),
+    Column("matched_at", Timestamp, nullable=True),
+    Column("created_at", Timestamp, server_default=func.now()),
+)
+_l = _listings.c
+Index("ix_listings_browse_recent", _l.category, _l.status, _l.created_at.desc(), _l.id.desc())
+Index("ix_listings_browse_geo", _l.category, _l.status, _l.geo_cell, _l.created_at.desc(), _l.id.desc())
+Index("ix_listings_browse_price", _l.category, _l.status, _l.price_cents, _l.id)
+Index("ix_listings_status_recent", _l.status, _l.created_at.desc(), _l.id.desc())
+Index("ix_listings_user_recent", _l.user_id, _l.created_at.desc(), _l.id.desc())
+Index("ix_listings_unmatched", _l.matched_at, _l.id)
+_requests = Table(
+    "exchange_requests", _v3,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("category", String(60), nullable=False),
+    Column("title", String(200), nullable=False),
+    Column("description", Text, nullable=True),
+    Column("max_price_cents", BigInteger, nullable=True),
+    Column("quantity", Integer, nullable=True),
+    Column("unit", String(30), nullable=True),
+    Column("location", String(200), nullable=True),
+    Column("lat", Float, nullable=True),
+    Column("lng", Float, nullable=True),
+    Column("geo_cell", Integer, nullable=True),
+    Column("status", String(16), nullable=False, default="open"),
+    Column("matched_at", Timestamp, nullable=True),
+    Column("created_at", Timestamp, server_default=func.now()),
+)
+_r = _requests.c
+Index("ix_exchange_requests_browse_recent", _r.category, _r.status, _r.created_at.desc(), _r.id.desc())
+Index("ix_exchange_requests_browse_geo", _r.category, _r.status, _r.geo_cell, _r.created_at.desc(), _r.id.desc())
+Index("ix_exchange_requests_browse_price", _r.category, _r.status, _r.max_price_cents, _r.id)
+Index("ix_exchange_requests_status_recent", _r.status, _r.created_at.desc(), _r.id.desc())
+Index("ix_exchange_requests_user_recent", _r.user_id, _r.created_at.desc(), _r.id.desc())
+Index("ix_exchange_requests_unmatched", _r.matched_at, _r.id)
+_matches = Table(
+    "exchange_matches", _v3,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("request_id", Integer, ForeignKey("exchange_requests.id", ondelete="CASCADE"), nullable=False),
+    Column("kind", String(10), nullable=False),
+    Column("target_id", Integer, nullable=False),
+    Column("candidate_user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("score", Integer, nullable=False),
+    Column("distance_km", Float, nullable=True),
+    Column("created_at", Timestamp, server_default=func.now()),
+    UniqueConstraint("request_id", "kind", "target_id", name="uq_exchange_matches_target"),
+)
+_m = _matches.c
+Index("ix_exchange_matches_request_score", _m.request_id, _m.score.desc(), _m.id)
+Index("ix_exchange_matches_candidate_recent", _m.candidate_user_id, _m.created_at.desc(), _m.id.desc())
+
+
+def _marketplace(conn):
+    _v3.create_all(bind=conn, tables=[_listings, _requests, _matches])
+
+
+def _profile_media(conn):
+    # the profile route stores the avatar and gallery as URLs holding media_blobs references
+    have = {c["name"] for c in inspect(conn).get_columns("users")}
+    for name, ddl in (("avatar_url", "VARCHAR(300)"), ("photos", "TEXT")):
+        if name not in have:
+            conn.execute(text(f"ALTER TABLE users ADD COLUMN {name} {ddl}"))
+
+
+def _media_job_backoff(conn):
+    have = {c["name"] for c in inspect(conn).get_columns("media_jobs")}
+    for name, ddl in (("failures", "INTEGER NOT NULL DEFAULT 0"), ("run_after", "TIMESTAMP")):
+        if name not in have:
+            conn.execute(text(f"ALTER TABLE media_jobs ADD COLUMN {name} {ddl}"))
+
+
+def _v1_skills(raw):
+    # users.skills as stored then: a JSON list, or a comma separated string in older rows
+    try:
+        value = json.loads(raw)
+        value = value if isinstance(value, list) else [value]
+    except ValueError:
+        value = raw.split(",")
+    return sorted({str(s).strip().lower()[:120] for s in value if str(s).strip()})
+
+
+def _backfill(conn):
+    # comment counts, from the rows they count (approvals are left alone: older databases have
+    # no post_approvals rows behind them, see core/counters.reconcile)
+    posts, comments = _v1.tables["posts"], _v1.tables["comments"]
+    n = select(func.count()).select_from(comments).where(comments.c.post_id == posts.c.id).scalar_subquery()
+    conn.execute(posts.update().values(comment_count=n))
+
+    # search index (core/search.py index_user) for users that have none yet
+    users, skills = _v1.tables["users"], _v1.tables["user_skills"]
+    unindexed = select(users.c.id, users.c.skills).where(
+        users.c.skills.isnot(None), ~exists().where(skills.c.user_id == users.c.id)
+    )
+    rows = [{"user_id": uid, "skill": s} for uid, raw in conn.execute(unindexed) for s in _v1_skills(raw)]
+    if rows:
+        conn.execute(skills.insert(), rows)
+    if conn.dialect.name == "sqlite":
+        conn.execute(text(
+            "INSERT INTO users_fts(rowid, name, bio, location, skills) "
+            "SELECT u.id, trim(coalesce(u.first_name, '') || ' ' || coalesce(u.last_name, '')), "
+            "coalesce(u.bio, ''), coalesce(u.location, ''), "
+            "coalesce((SELECT group_concat(s.skill, ' ') FROM user_skills s WHERE s.user_id = u.id), '') "
+            "FROM users u WHERE u.id NOT IN (SELECT rowid FROM users_fts)"
+        ))
+
+
+# post_shares as migration 7 shipped it; frozen like _v1
+_v7 = MetaData()
+Table("users", _v7, Column("id", Integer, primary_key=True))   # referenced only
+Table("posts", _v7, Column("id", Integer, primary_key=True))   # referenced only
+_post_shares = Table(
+    "post_shares", _v7,
+    Column("post_id", Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("created_at", Timestamp, server_default=func.now()),
+)
+
+
+def _shares_once(conn):
+    # existing posts.shares stay as they are; from here on a user's share counts once
+    _v7.create_all(bind=conn, tables=[_post_shares])
+
+
+_v8 = MetaData()
+_v8_listings = Table(   # only the indexed columns
+    "listings", _v8,
+    Column("id", Integer, primary_key=True),
+    Column("status", String(16)),
+    Column("geo_cell", Integer),
+)
+_listings_nearby = Index("ix_listings_status_geo", _v8_listings.c.status, _v8_listings.c.geo_cell)
+
+
+def _listings_nearby_index(conn):
+    # /nearby walks active listings cell by cell; the browse indexes all lead with category
+    _listings_nearby.create(conn, checkfirst=True)
+
+
+# (version, name, fn): append only, never renumber or edit one that has shipped
+MIGRATIONS = [
+    (1, "baseline schema", _baseline),
+    (2, "columns and indexes missing from pre-migration databases", _catch_up),
+    (3, "marketplace listings, exchange requests and matches", _marketplace),
+    (4, "users.avatar_url and users.photos", _profile_media),
+    (5, "media_jobs.failures and run_after (retry backoff)", _media_job_backoff),
+    (6, "comment counts and search index for pre-migration rows", _backfill),
+    (7, "post_shares (one share per user and post)", _shares_once),
+    (8, "listings (status, geo_cell) index for /nearby", _listings_nearby_index),
+]
+LATEST = MIGRATIONS[-1][0]
+
+
+def current_version(conn) -> int:
+    if not inspect(conn).has_table(schema_version.name):
+        return 0
+    return conn.execute(select(schema_version.c.version).order_by(schema_version.c.version.desc()).limit(1)).scalar() or 0
+
+
+def pending(eng=None):
+    with (eng or engine).connect() as conn:
+        version = current_version(conn)
+    return [(v, name) for v, name, _ in MIGRATIONS if v > version]
+
+
+def _lock(conn):
+    # several deploy hooks racing: the first one migrates, the rest wait and then find nothing to do
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('vsx_schema_version'))"))
+
+
+def upgrade(eng=None) -> int:
+    """Apply every pending migration; returns the number applied."""
+    eng = eng or engine
+    applied = 0
+    with eng.begin() as conn:
+        _lock(conn)
+        _meta.create_all(bind=conn)
+    for version, name, fn in MIGRATIONS:
+        with eng.begin() as conn:
+            _lock(conn)
+            if current_version(conn) >= version:
+                continue
+            fn(conn)
+            conn.execute(schema_version.insert().values(version=version, name=name, applied_at=datetime.now(timezone.utc)))
+            log.info("applied migration %d: %s", version, name)
+            applied += 1
+    return applied
+
+
+def check(eng=None):
+    """Raise if the database is behind; the app calls this at startup instead of creating tables."""
+    missing = pending(eng)
+    if missing:
+        raise RuntimeError(
+            f"database schema is at version {missing[0][0] - 1}, the code needs {LATEST}: "
+            "run `python -m app.core.migrations` before starting the app"
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    ap = argparse.ArgumentParser(description="Apply or check versioned schema migrations.")
+    ap.add_argument("--check", action="store_true", help="exit 1 if migrations are pending, change nothing")
+    args = ap.parse_args()
+    if args.check:
+        todo = pending()
+        for version, name in todo:
+            print(f"pending {version}: {name}")
+        sys.exit(1 if todo else 0)
+    n = upgrade()
+    print(f"schema at version {LATEST} ({n} applied)")
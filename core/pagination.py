@@ -0,0 +1,35 @@
+# backend/app/core/pagination.py
+import base64
+from datetime import datetime
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for (created_at, id) ordered feeds."""
+    raw = f"{created_at.isoformat() if created_at else ''}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Return (created_at, id) or None if the cursor is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception:
+        return None
+
+
+def encode_score_cursor(score: int, row_id: int) -> str:
+    """Keyset cursor for (score, id) ordered feeds such as the home timeline."""
+    raw = f"{int(score)}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_score_cursor(cursor: str):
+    """Return (score, id) or None if the cursor is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return int(score), int(row_id)
+    except Exception:
+        return None
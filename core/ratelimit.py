@@ -0,0 +1,303 @@
+# backend/app/core/ratelimit.py
+import json
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+from starlette.routing import compile_path
+from app.core.config import (
+    RATE_LIMIT_ENABLED, RATE_LIMIT_BACKEND, RATE_LIMIT_URL, RATE_LIMIT_RATE, RATE_LIMIT_BURST,
+    RATE_LIMIT_LOGIN_PER_MINUTE, RATE_LIMIT_SHARDS, RATE_LIMIT_MAX_KEYS, RATE_LIMIT_TRUST_PROXY,
+    MAX_INFLIGHT_REQUESTS, MAX_INFLIGHT_WRITES, MAX_INFLIGHT_UPLOADS,
+)
+from app.core.security import decode_token
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # only needed for RATE_LIMIT_BACKEND=redis
+    aioredis = None
+
+log = logging.getLogger(__name__)
+
+# Token buckets per caller (user id from the JWT, else client IP), checked in a pure ASGI
+# middleware before routing, so a rejected upload is never read off the socket. Each route
+# spends a weighted number of tokens from the caller's bucket; "login" routes use a separate,
+# much slower bucket keyed by IP. Independently, in-flight caps per pool shed load with a 503
+# before the threadpool, the SQLite writer queue or the disk fill up.
+
+
+class Rule(NamedTuple):
+    bucket: str       # "api" or "login"
+    cost: int         # tokens per request
+    pool: str = None  # concurrency cap it counts against ("write", "upload")
+
+
+# route templates as in the routers (and the metrics labels); anything else is a 1-token read
+RULES = {
+    ("POST", "/login"): Rule("login", 1),
+    ("POST", "/register"): Rule("login", 1),
+    ("POST", "/posts"): Rule("api", 10, "upload"),                 # multipart, usually with media
+    ("POST", "/upload"): Rule("api", 20, "upload"),
+    ("PUT", "/upload/sessions/{upload_id}"): Rule("api", 5, "upload"),
+    ("POST", "/upload/sessions"): Rule("api", 2, "write"),
+    ("POST", "/posts/{post_id}/comments"): Rule("api", 3, "write"),
+    ("POST", "/posts/{post_id}/approve"): Rule("api", 1, "write"),
+    ("POST", "/posts/{post_id}/share"): Rule("api", 1, "write"),
+    ("POST", "/messages/{user_id}"): Rule("api", 2, "write"),
+    ("POST", "/listings"): Rule("api", 3, "write"),
+    ("POST", "/exchange-requests"): Rule("api", 3, "write"),
+}
+DEFAULT_RULE = Rule("api", 1)
+# media is fetched many times per page and is cheap to serve; streams hold their slot for hours
+EXEMPT_PREFIXES = ("/uploads/", "/events", "/metrics")
+
+BUCKETS = {
+    # name: (tokens per second, burst)
+    "api": (RATE_LIMIT_RATE, RATE_LIMIT_BURST),
+    "login": (RATE_LIMIT_LOGIN_PER_MINUTE / 60, RATE_LIMIT_LOGIN_PER_MINUTE),
+}
+POOLS = {"write": MAX_INFLIGHT_WRITES, "upload": MAX_INFLIGHT_UPLOADS}
+
+
+def _refill(tokens, stamp, now, rate, burst, cost):
+    """One token-bucket step: (allowed, seconds until it would be, tokens left)."""
+    tokens = burst if tokens is None else min(burst, tokens + (now - stamp) * rate)
+    if tokens >= cost:
+        return True, 0.0, tokens - cost
+    return False, (cost - tokens) / rate, tokens
+
+
+# ---------------------------
+# Stores
+# ---------------------------
+class MemoryStore:
+    """Per-process buckets in lock-striped LRU shards; an evicted bucket simply starts full again."""
+
+    def __init__(self, shards: int = RATE_LIMIT_SHARDS, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(max(1, shards))]
+        self._per_shard = max(1, max_keys // len(self._shards))
+
+    async def take(self, key: str, rate: float, burst: float, cost: float):
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            tokens, stamp = buckets.get(key, (None, now))
+            ok, wait, left = _refill(tokens, stamp, now, rate, burst, cost)
+            buckets[key] = (left, now)
+            buckets.move_to_end(key)
+            if len(buckets) > self._per_shard:
+                buckets.popitem(last=False)
+        return ok, wait, left
+
+    def size(self):
+        return sum(len(b) for _, b in self._shards)
+
+
+# atomic read-refill-spend on the server, using its clock so every worker agrees
+TOKEN_BUCKET_LUA = """
+local rate, burst, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(b[1])
+if tokens == nil then tokens = burst else tokens = math.min(burst, tokens + (now - tonumber(b[2])) * rate) end
+local ok, wait = 0, 0
+if tokens >= cost then ok = 1; tokens = tokens - cost else wait = (cost - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {ok, tostring(wait), tostring(tokens)}
+"""
+
+
+class RedisStore:
+    """Buckets shared by every worker; anything speaking the Redis protocol with EVAL works."""
+
+    def __init__(self, client=None, url: str = RATE_LIMIT_URL, prefix: str = "rl:"):
+        if client is None:
+            if aioredis is None:
+                raise RuntimeError("RATE_LIMIT_BACKEND=redis needs the redis package")
+            client = aioredis.Redis.from_url(url)
+        self._script = client.register_script(TOKEN_BUCKET_LUA)
+        self.prefix = prefix
+
+    async def take(self, key: str, rate: float, burst: float, cost: float):
+        ok, wait, left = await self._script(keys=[self.prefix + key], args=[rate, burst, cost])
+        return bool(int(ok)), float(wait), float(left)
+
+    def size(self):
+        return None
+
+
+class _LocalRedis:
+    """
+    In-process stand-in for the server side of RedisStore (RATE_LIMIT_BACKEND=local): runs the
+    same script semantics over a dict, answering in Redis reply types, so the shared code path
+    can be exercised without a server. Private to the limiter: it knows TOKEN_BUCKET_LUA only
+    and refuses any other script when it is registered, not when it is run.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def register_script(self, source: str):
+        if source != TOKEN_BUCKET_LUA:
+            raise NotImplementedError("_LocalRedis only emulates the token bucket script")
+
+        async def run(keys, args):
+            rate, burst, cost = (float(a) for a in args)
+            now = time.time()
+            with self._lock:
+                tokens, stamp, expires = self._data.get(keys[0], (None, now, 0))
+                if expires <= now:
+                    tokens = None
+                ok, wait, left = _refill(tokens, stamp, now, rate, burst, cost)
+                self._data[keys[0]] = (left, now, now + math.ceil(burst / rate) + 1)
+            return [int(ok), repr(wait).encode(), repr(left).encode()]
+
+        return run
+
+
+# ---------------------------
+# Limiter
+# ---------------------------
+class Limiter:
+    def __init__(self, store=None):
+        self.store = store
+        self._rules = [(method, compile_path(path)[0], rule) for (method, path), rule in RULES.items()]
+        self._inflight = {"all": 0, **{pool: 0 for pool in POOLS}}
+        self.allowed = 0
+        self.limited = 0
+        self.shed = 0
+        self.errors = 0
+
+    def rule(self, method: str, path: str) -> Rule:
+        for m, regex, rule in self._rules:
+            if m == method and regex.match(path):
+                return rule
+        return DEFAULT_RULE
+
+    @staticmethod
+    def caller(scope, headers) -> str:
+        auth = headers.get(b"authorization", b"").decode("latin-1")
+        if auth.startswith("Bearer "):
+            claims = decode_token(auth[7:].strip())   # cached, see core/security.py
+            if claims and claims.get("sub"):
+                return f"u:{claims['sub']}"
+        ip = scope["client"][0] if scope.get("client") else "unknown"
+        if RATE_LIMIT_TRUST_PROXY:
+            # the last hop was appended by our own proxy; earlier entries are client-controlled
+            forwarded = headers.get(b"x-forwarded-for", b"").decode("latin-1")
+            if forwarded:
+                ip = forwarded.split(",")[-1].strip() or ip
+        return f"ip:{ip}"
+
+    async def check(self, key: str, rule: Rule):
+        """(allowed, retry_after seconds) for spending rule.cost tokens of `key`'s bucket."""
+        rate, burst = BUCKETS[rule.bucket]
+        try:
+            ok, wait, _ = await self.store.take(f"{rule.bucket}:{key}", rate, burst, min(rule.cost, burst))
+        except Exception:
+            # a limiter outage must not become an API outage
+            self.errors += 1
+            log.exception("rate limit store failed; letting the request through")
+            return True, 0.0
+        if ok:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return ok, wait
+
+    def acquire(self, pool: str):
+        """Take an in-flight slot (event loop only); False when the global or the pool's cap is reached."""
+        if self._inflight["all"] >= MAX_INFLIGHT_REQUESTS or (pool and self._inflight[pool] >= POOLS[pool]):
+            self.shed += 1
+            return False
+        self._inflight["all"] += 1
+        if pool:
+            self._inflight[pool] += 1
+        return True
+
+    def release(self, pool: str):
+        self._inflight["all"] -= 1
+        if pool:
+            self._inflight[pool] -= 1
+
+    async def admit(self, key: str, rule: Rule):
+        """
+        (status, retry_after): 200 holding an in-flight slot (release(rule.pool) when done), 503
+        when a cap is reached, 429 when the bucket is empty. The slot comes first so a request
+        that is shed costs no tokens.
+        """
+        if not self.acquire(rule.pool):
+            return 503, 1
+        ok, wait = await self.check(key, rule)
+        if not ok:
+            self.release(rule.pool)
+            return 429, wait
+        return 200, 0.0
+
+    def stats(self):
+        return {
+            "backend": type(self.store).__name__ if self.store else "off",
+            "keys": self.store.size() if self.store else 0,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "shed": self.shed,
+            "errors": self.errors,
+            **{f"inflight_{pool}": n for pool, n in self._inflight.items()},
+        }
+
+
+REJECTED = {429: "Too many requests", 503: "Server busy, try again shortly"}
+
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """Pure ASGI: 429 + Retry-After when the caller's bucket is empty, 503 + Retry-After when a pool is full."""
+
+    def __init__(self, app, limits: Limiter = None):
+        self.app = app
+        self.limiter = limits or limiter
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or self.limiter.store is None or path.startswith(EXEMPT_PREFIXES):
+            return await self.app(scope, receive, send)
+        rule = self.limiter.rule(scope["method"], path)
+        headers = dict(scope["headers"])
+        status, wait = await self.limiter.admit(self.limiter.caller(scope, headers), rule)
+        if status != 200:
+            return await _reject(send, status, REJECTED[status], wait)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release(rule.pool)
+
+
+def _make_store(kind: str):
+    if not RATE_LIMIT_ENABLED:
+        return None
+    if kind == "redis":
+        return RedisStore()
+    if kind == "local":
+        return RedisStore(client=_LocalRedis())
+    return MemoryStore()
+
+
+limiter = Limiter(_make_store(RATE_LIMIT_BACKEND))
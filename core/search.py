@@ -0,0 +1,128 @@
+# backend/app/core/search.py
+import json
+import re
+from sqlalchemy import Float, Integer, and_, exists, or_, text
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.models.user_skill import UserSkill
+
+# FTS5 index over the searchable profile fields; rowid mirrors users.id. Only SQLite gets the
+# virtual table (migration 1, core/migrations.py), other backends use the LIKE fallback below.
+# bm25 column weights: name, bio, location, skills
+_RANK = "bm25(users_fts, 10.0, 1.0, 2.0, 5.0)"
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def parse_skills(raw):
+    """Skills are stored as a JSON list, older rows as a comma separated string."""
+    if not raw:
+        return []
+    if isinstance(raw, (list, tuple)):
+        return list(raw)
+    try:
+        value = json.loads(raw)
+        return value if isinstance(value, list) else [value]
+    except Exception:
+        return [s.strip() for s in str(raw).split(",") if s.strip()]
+
+
+def _fts_enabled(db: Session):
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def _match_expr(q: str, column: str = None):
+    """Turn free text into a safe FTS5 MATCH expression (every token a prefix, ANDed)."""
+    tokens = _TOKEN.findall(q.lower())
+    if not tokens:
+        return None
+    terms = " ".join(f'"{t}"*' for t in tokens)
+    return f"{column} : ({terms})" if column else terms
+
+
+def _fts_ids(match: str):
+    sql = f"SELECT rowid AS id, {_RANK} AS rank FROM users_fts WHERE users_fts MATCH :m"
+    return text(sql).bindparams(m=match).columns(id=Integer, rank=Float).subquery()
+
+
+def _skill_prefix(skill: str):
+    s = skill.strip().lower()
+    # range scan on ix_user_skills_skill_user instead of LIKE so the index is usable everywhere
+    return exists().where(and_(UserSkill.user_id == User.id, UserSkill.skill >= s, UserSkill.skill < s + "\uffff"))
+
+
+def index_user(db: Session, user):
+    """Refresh user_skills and the FTS row for one user. The caller commits."""
+    skills = sorted({str(s).strip().lower()[:120] for s in parse_skills(user.skills) if str(s).strip()})
+    db.execute(UserSkill.__table__.delete().where(UserSkill.user_id == user.id))
+    if skills:
+        db.execute(UserSkill.__table__.insert(), [{"user_id": user.id, "skill": s} for s in skills])
+    if _fts_enabled(db):
+        db.execute(text("DELETE FROM users_fts WHERE rowid = :id"), {"id": user.id})
+        db.execute(
+            text("INSERT INTO users_fts(rowid, name, bio, location, skills) VALUES (:id, :name, :bio, :location, :skills)"),
+            {
+                "id": user.id,
+                "name": f"{user.first_name or ''} {user.last_name or ''}".strip(),
+                "bio": getattr(user, "bio", None) or "",
+                "location": user.location or "",
+                "skills": " ".join(skills),
+            },
+        )
+
+
+def rebuild_index(db: Session, batch: int = 500):
+    """Re-index every user; used to backfill existing databases."""
+    last_id = 0
+    while True:
+        users = db.query(User).filter(User.id > last_id).order_by(User.id).limit(batch).all()
+        if not users:
+            break
+        for u in users:
+            index_user(db, u)
+        db.commit()
+        last_id = users[-1].id
+
+
+def search_users(db: Session, skill: str = None, location: str = None, offset: int = 0, limit: int = 20):
+    """Discoverable users matching skill OR location, paged in the database."""
+    q = db.query(User).filter(User.discoverable == True)
+    conds = []
+    if skill and skill.strip():
+        conds.append(_skill_prefix(skill))
+    if location and location.strip():
+        match = _match_expr(location, "location")
+        if _fts_enabled(db) and match:
+            conds.append(User.id.in_(text("SELECT rowid FROM users_fts WHERE users_fts MATCH :loc").bindparams(loc=match)))
+        else:
+            conds.append(User.location.ilike(f"%{location.strip()}%"))
+    if conds:
+        q = q.filter(or_(*conds))
+    return q.order_by(User.id).offset(offset).limit(limit).all()
+
+
+def search_text(db: Session, q: str, offset: int = 0, limit: int = 10):
+    """Free-text search over name/bio/location/skills, best matches first."""
+    match = _match_expr(q or "")
+    if not match:
+        return []
+    base = db.query(User).filter(User.discoverable == True)
+    if _fts_enabled(db):
+        hits = _fts_ids(match)
+        base = base.join(hits, hits.c.id == User.id).order_by(hits.c.rank, User.id)
+    else:
+        like = f"%{q.strip()}%"
+        base = base.filter(or_(
+            User.first_name.ilike(like), User.last_name.ilike(like),
+            User.location.ilike(like), User.bio.ilike(like), _skill_prefix(q),
+        )).order_by(User.id)
+    return base.offset(offset).limit(limit).all()
+
+
+if __name__ == "__main__":
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        rebuild_index(db)
+    finally:
+        db.close()
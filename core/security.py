@@ -1,12 +1,29 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+from fastapi import HTTPException, Request
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from jose import jwt
+from jose import JWTError, jwt
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.config import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES,
+    BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING,
+    AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS,
+)
+from app.core.cache import TTLCache
+from app.models.user import User
 
-SECRET_KEY = "super-secret-key"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min == max == default: any stored hash with another cost is flagged for re-hash on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 def get_password_hash(password: str):
     return pwd_context.hash(password)
@@ -14,8 +31,161 @@ def get_password_hash(password: str):
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+
+class HashPool:
+    """
+    Dedicated, size-limited pool for bcrypt so a login burst can't occupy the
+    request threadpool. Past `max_pending` (queued + running) callers get a 429.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+
+    async def run(self, fn, *args):
+        # only touched from the event loop thread, so plain counters are safe
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=429, detail="Too many sign-in attempts in progress, retry shortly", headers={"Retry-After": "1"})
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+            self.total_seconds += time.perf_counter() - start
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "queued": max(0, self.pending - self.workers),
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_ms": round(1000 * self.total_seconds / self.completed, 1) if self.completed else 0.0,
+        }
+
+
+hash_pool = HashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+async def hash_password_async(password: str) -> str:
+    return await hash_pool.run(pwd_context.hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    """Returns (ok, new_hash); new_hash is set when the stored hash should be upgraded."""
+    return await hash_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: int = ACCESS_TOKEN_EXPIRE_MINUTES):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=expires_delta)
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
\ No newline at end of file
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+# ---------------------------
+# Token verification + principal cache
+# ---------------------------
+class Principal(NamedTuple):
+    """What handlers need to know about the caller; cheap to cache, no ORM session attached."""
+    id: int
+    first_name: Optional[str]
+    last_name: Optional[str]
+    email: str
+    role: Optional[str]
+    avatar_url: Optional[str]
+
+
+token_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+principal_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+
+
+def decode_token(token: str):
+    """Verified claims of a token from create_access_token, or None. Cached until min(TTL, exp)."""
+    if not token:
+        return None
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    exp = claims.get("exp")
+    token_cache.set(token, claims, ttl=exp - time.time() if exp else None)
+    return claims
+
+
+def load_principal(user_id: int, db: Session = None) -> Optional[Principal]:
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    from app.core.database import SessionLocal
+    session = db or SessionLocal()
+    try:
+        row = session.query(User.id, User.first_name, User.last_name, User.email, User.role, User.avatar_url).filter(User.id == user_id).first()
+    finally:
+        if db is None:
+            session.close()
+    if row is None:
+        return None
+    principal = Principal(*row)
+    principal_cache.set(user_id, principal)
+    return principal
+
+
+def invalidate_user(user_id: int):
+    """Drop the cached principal after a profile change or delete."""
+    principal_cache.pop(user_id)
+
+
+def _bearer(request: Request):
+    auth = request.headers.get("Authorization")
+    if not auth or not auth.startswith("Bearer "):
+        return None
+    return auth.split(" ", 1)[1].strip()
+
+
+def get_current_user_optional(request: Request) -> Optional[Principal]:
+    claims = decode_token(_bearer(request))
+    if not claims or "sub" not in claims:
+        return None
+    try:
+        user_id = int(claims["sub"])
+    except (TypeError, ValueError):
+        return None
+    return load_principal(user_id)
+
+
+def get_current_user(request: Request) -> Principal:
+    """Shared auth dependency: `user: Principal = Depends(get_current_user)`."""
+    principal = get_current_user_optional(request)
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    return principal
+
+
+# any flush that updates or deletes a user drops its cached principal, whichever router did it;
+# dropped again on commit so a concurrent request can't re-cache the pre-commit row
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target):
+    invalidate_user(target.id)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("auth_dirty", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop("auth_dirty", ()):
+        invalidate_user(user_id)
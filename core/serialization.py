@@ -0,0 +1,36 @@
+# backend/app/core/serialization.py
+import datetime
+import json
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, same output
+    orjson = None
+
+# Handlers build plain dicts of str/int/float/bool/None/list/dict (see the *_out helpers);
+# encoding those directly skips jsonable_encoder's recursive walk, which dominated feed
+# serialization cost (benchmarks/bench_serialization.py). Anything else (datetimes,
+# pydantic models, ...) still works through _default.
+
+
+def _default(obj):
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json", by_alias=True)
+    return jsonable_encoder(obj)
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """App-wide default response class; handlers on hot paths return it directly to skip jsonable_encoder too."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,69 @@
+# backend/app/core/static.py
+import mimetypes
+import os
+import re
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+# ab/cd/<sha256>.<ext> from core/storage.py, or the older <uuid4 hex>.<ext> names
+_CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(\.[a-z0-9]+)?$")
+_UUID_NAME = re.compile(r"^[0-9a-f]{32}(\.[a-z0-9]+)?$")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=300, must-revalidate"
+
+# served as-is when a pre-compressed sibling exists (photos/videos are already compressed)
+_PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+_COMPRESSIBLE = {".svg", ".json", ".txt", ".css", ".js", ".html", ".xml", ".vtt"}
+
+
+class MediaFiles(StaticFiles):
+    """
+    StaticFiles for UPLOAD_DIR with caching tuned for never-changing media:
+    - content-addressed / uuid names get `immutable` and a strong ETag derived from the name
+    - If-None-Match -> 304 without touching the file body
+    - Range / If-Range -> 206 (FileResponse), whole files go out via the server's pathsend extension when offered
+    - `.br` / `.gz` siblings are served for compressible types when the client accepts them
+    """
+
+    def get_path(self, scope):
+        path = super().get_path(scope)
+        # never expose in-progress uploads or other dot-directories
+        if any(part.startswith(".") for part in path.replace("\\", "/").split("/")):
+            raise HTTPException(status_code=404)
+        return path
+
+    def file_response(self, full_path, stat_result, scope, status_code=200) -> Response:
+        request_headers = Headers(scope=scope)
+        name = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+        headers = {"vary": "Accept-Encoding"}
+
+        m = _CONTENT_ADDRESSED.match(name)
+        if m:
+            etag, cache = f'"{m.group("digest")}"', IMMUTABLE
+        elif _UUID_NAME.match(name):
+            etag, cache = f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"', IMMUTABLE
+        else:
+            etag, cache = f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"', REVALIDATE
+        headers["cache-control"] = cache
+
+        path, media_stat = full_path, stat_result
+        ext = os.path.splitext(name)[1].lower()
+        if ext in _COMPRESSIBLE and "range" not in request_headers:
+            accepted = request_headers.get("accept-encoding", "")
+            for encoding, suffix in _PRECOMPRESSED:
+                if encoding in accepted and os.path.isfile(full_path + suffix):
+                    path, media_stat = full_path + suffix, os.stat(full_path + suffix)
+                    headers["content-encoding"] = encoding
+                    etag = f'{etag[:-1]}-{encoding}"'
+                    break
+
+        # content-type always of the original, not of the .br/.gz sibling
+        media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        response = FileResponse(path, status_code=status_code, stat_result=media_stat, headers=headers, media_type=media_type)
+        response.headers["etag"] = etag
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
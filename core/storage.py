@@ -0,0 +1,407 @@
+# backend/app/core/storage.py
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+import weakref
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from app.core.config import (
+    UPLOAD_DIR, MAX_UPLOAD_BYTES, UPLOAD_CHUNK_BYTES, MEDIA_GC_GRACE_SECONDS, MEDIA_GC_INTERVAL_SECONDS,
+)
+from app.models.media import MediaBlob
+from app.core.metrics import record_upload
+
+log = logging.getLogger(__name__)
+
+# resumable upload sessions live here until they are finalized
+INCOMING_DIR = os.path.join(UPLOAD_DIR, ".incoming")
+blobs = MediaBlob.__table__
+
+
+class StoredFile(NamedTuple):
+    name: str
+    path: str
+    size: int
+    sha256: str
+    tmp: str = None   # received bytes not yet moved to `path`; register() places them
+
+    @property
+    def url(self):
+        return f"/uploads/{self.name}"
+
+    @property
+    def local(self):
+        """Where the bytes are right now."""
+        return self.tmp or self.path
+
+
+def _ext(filename: str):
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if ext[1:].isalnum() else ""
+
+
+def _too_large():
+    return HTTPException(status_code=413, detail=f"File exceeds {MAX_UPLOAD_BYTES} bytes")
+
+
+# Every upload path (POST /upload, sessions, POST /posts, the profile photo) accepts only these:
+# anything else (.html, .svg, ...) would be served back from /uploads as active content.
+IMAGE_EXT = {"png", "jpg", "jpeg", "gif", "webp"}
+ALLOWED_EXT = IMAGE_EXT | {"mp4", "mov", "webm"}
+
+
+def check_filename(filename: str, allowed=ALLOWED_EXT) -> str:
+    """The lower-cased extension of an accepted upload; 400 otherwise."""
+    if not filename or "." not in filename:
+        raise HTTPException(status_code=400, detail="Invalid filename")
+    ext = filename.rsplit(".", 1)[1].lower()
+    if ext not in allowed:
+        raise HTTPException(status_code=400, detail="Invalid file type")
+    return ext
+
+
+class UploadLimitMiddleware:
+    """
+    Pure ASGI, in front of routing: FastAPI reads and spools a multipart body before any route
+    dependency runs, so the size cap has to sit here. A declared Content-Length over the cap is
+    refused without reading the body; a chunked one is cut off as soon as it passes the cap.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES + 64 * 1024):   # + form fields and framing
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None:
+            if length.isdigit() and int(length) > self.max_bytes:
+                response = JSONResponse({"detail": _too_large().detail}, status_code=413)
+                return await response(scope, receive, send)
+            return await self.app(scope, receive, send)
+        seen = 0
+
+        async def limited():
+            nonlocal seen
+            message = await receive()
+            if message["type"] == "http.request":
+                seen += len(message.get("body", b""))
+                if seen > self.max_bytes:
+                    raise _too_large()
+            return message
+
+        await self.app(scope, limited, send)
+
+
+def blob_name(digest: str, ext: str = "") -> str:
+    """Content address: sharded two levels deep so no directory grows past ~65k entries."""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def _finish(tmp: str, filename: str, size: int, digest: str) -> StoredFile:
+    # nothing is moved yet: whether the bytes are new is decided by register(), with the row locked
+    name = blob_name(digest, _ext(filename))
+    return StoredFile(name, os.path.join(UPLOAD_DIR, name), size, digest, tmp)
+
+
+def place(stored: StoredFile) -> StoredFile:
+    """Move received bytes into the store, or drop them if the same content is already there."""
+    if stored.tmp is None:
+        return stored
+    if os.path.exists(stored.path):
+        # same bytes already stored: keep the existing copy
+        _discard(stored.tmp)
+    else:
+        os.makedirs(os.path.dirname(stored.path), exist_ok=True)
+        os.replace(stored.tmp, stored.path)
+    return stored._replace(tmp=None)
+
+
+def _tmp_path():
+    os.makedirs(INCOMING_DIR, exist_ok=True)
+    return os.path.join(INCOMING_DIR, f"{uuid.uuid4().hex}.tmp")
+
+
+def copy_stream(src, dest: str, max_bytes: int = MAX_UPLOAD_BYTES):
+    """Blocking chunked copy with hashing; aborts as soon as max_bytes is crossed."""
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest, "wb") as out:
+            while True:
+                chunk = src.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large()
+                h.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        _discard(dest)
+        raise
+    return size, h.hexdigest()
+
+
+def save_upload_sync(upload: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> StoredFile:
+    """For sync handlers (already on a worker thread). The bytes are stored by register()."""
+    tmp = _tmp_path()
+    size, digest = copy_stream(upload.file, tmp, max_bytes)
+    return _finish(tmp, upload.filename, size, digest)
+
+
+def store_path(tmp: str) -> StoredFile:
+    """Hash a locally generated file (e.g. a thumbnail) for the store; register() moves it in."""
+    return _finish(tmp, tmp, os.path.getsize(tmp), _hash_file(tmp))
+
+
+def new_tmp_path(ext: str = "") -> str:
+    return _tmp_path()[:-len(".tmp")] + ext
+
+
+async def save_upload(upload: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> StoredFile:
+    """Stream an UploadFile to disk in fixed-size chunks without blocking the event loop; register() stores it."""
+    tmp = await run_in_threadpool(_tmp_path)
+    size, digest = await write_chunks(_iter_upload(upload), tmp, max_bytes)
+    return await run_in_threadpool(_finish, tmp, upload.filename, size, digest)
+
+
+async def _iter_upload(upload: UploadFile):
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def write_chunks(chunks, dest: str, max_bytes: int = MAX_UPLOAD_BYTES, mode: str = "wb", start: int = 0):
+    """
+    Consume an async iterator of bytes into `dest`, writing on the threadpool.
+    `start` is the byte count already on disk (resumable appends). Returns (size, sha256 of new bytes).
+    """
+    h = hashlib.sha256()
+    size = start
+    began = time.perf_counter()
+    disk = 0.0
+    out = await run_in_threadpool(open, dest, mode)
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large()
+            h.update(chunk)
+            t = time.perf_counter()
+            await run_in_threadpool(out.write, chunk)
+            disk += time.perf_counter() - t
+    except BaseException:
+        await run_in_threadpool(out.close)
+        if mode == "wb":
+            _discard(dest)
+        raise
+    await run_in_threadpool(out.close)
+    # throughput on /metrics: bytes vs time in disk writes vs total time receiving
+    record_upload(size - start, disk, time.perf_counter() - began)
+    return size, h.hexdigest()
+
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# ---------------------------
+# Resumable uploads: init / append chunk / finalize
+# ---------------------------
+def _session_paths(upload_id: str):
+    if not upload_id.isalnum():
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    base = os.path.join(INCOMING_DIR, upload_id)
+    return base + ".part", base + ".json"
+
+
+def session_info(upload_id: str):
+    part, meta = _session_paths(upload_id)
+    if not os.path.exists(meta):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    with open(meta) as f:
+        info = json.load(f)
+    info["offset"] = os.path.getsize(part)
+    return info
+
+
+def create_session(filename: str, size: int = None, content_type: str = None):
+    if size is not None and size > MAX_UPLOAD_BYTES:
+        raise _too_large()
+    os.makedirs(INCOMING_DIR, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    part, meta = _session_paths(upload_id)
+    open(part, "wb").close()
+    info = {"uploadId": upload_id, "filename": filename, "size": size, "contentType": content_type, "createdAt": time.time()}
+    with open(meta, "w") as f:
+        json.dump(info, f)
+    return {**info, "offset": 0, "chunkSize": UPLOAD_CHUNK_BYTES}
+
+
+# one writer per session: a retried PUT racing the original must not pass the offset check
+# alongside it and interleave bytes in the part file. Sessions are served by the process that
+# holds the part file, like write_lock for SQLite writes.
+_session_locks = weakref.WeakValueDictionary()
+
+
+def _session_lock(upload_id: str) -> asyncio.Lock:
+    lock = _session_locks.get(upload_id)
+    if lock is None:
+        lock = _session_locks[upload_id] = asyncio.Lock()
+    return lock
+
+
+async def append_chunk(upload_id: str, offset: int, chunks):
+    """Append a chunk at `offset`; a mismatched offset means the client must resume from ours."""
+    async with _session_lock(upload_id):
+        info = await run_in_threadpool(session_info, upload_id)
+        if offset != info["offset"]:
+            raise HTTPException(status_code=409, detail={"offset": info["offset"]})
+        limit = min(info["size"] or MAX_UPLOAD_BYTES, MAX_UPLOAD_BYTES)
+        part, _ = _session_paths(upload_id)
+        try:
+            size, _ = await write_chunks(chunks, part, limit, mode="ab", start=offset)
+        except BaseException:
+            # drop a half-written chunk so the next attempt resumes at a clean boundary
+            await run_in_threadpool(os.truncate, part, offset)
+            raise
+    return {"uploadId": upload_id, "offset": size}
+
+
+def _hash_file(path: str):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_BYTES), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+async def finalize_session(upload_id: str, sha256: str = None) -> StoredFile:
+    """Close the session; the part file is handed over as the received bytes for register()."""
+    async with _session_lock(upload_id):
+        info = await run_in_threadpool(session_info, upload_id)
+        if info["size"] is not None and info["offset"] != info["size"]:
+            raise HTTPException(status_code=409, detail={"offset": info["offset"]})
+        part, meta = _session_paths(upload_id)
+        digest = await run_in_threadpool(_hash_file, part)
+        if sha256 and sha256.lower() != digest:
+            raise HTTPException(status_code=422, detail="Checksum mismatch")
+        await run_in_threadpool(_discard, meta)
+    return _finish(part, info["filename"], info["offset"], digest)
+
+
+# ---------------------------
+# Reference counting (media_blobs) and garbage collection
+# ---------------------------
+def _name(ref: str) -> str:
+    return ref[len("/uploads/"):] if ref.startswith("/uploads/") else ref
+
+
+def register_stmt(stored: StoredFile, dialect_name: str, refs: int = 1):
+    """Upsert the blob row and add `refs` references in one atomic statement."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    ins = insert(blobs).values(name=stored.name, sha256=stored.sha256, size=stored.size, refcount=refs)
+    return ins.on_conflict_do_update(
+        index_elements=[blobs.c.name],
+        set_={"refcount": blobs.c.refcount + refs, "touched_at": func.now()},
+    )
+
+
+def release_stmt(ref: str):
+    return blobs.update().where(blobs.c.name == _name(ref)).values(refcount=blobs.c.refcount - 1)
+
+
+def register(db: Session, stored: StoredFile, refs: int = 1) -> StoredFile:
+    """
+    Add `refs` references and place the bytes, in the caller's transaction. The upsert comes
+    first: it refreshes touched_at and holds the row (the SQLite writer lock, a row lock on
+    PostgreSQL) until commit, so collect_garbage cannot unlink a blob that is being reused.
+    """
+    db.execute(register_stmt(stored, db.get_bind().dialect.name, refs))
+    return place(stored)
+
+
+async def register_async(db, stored: StoredFile, refs: int = 1) -> StoredFile:
+    """register() for an AsyncSession; call inside write_lock(db) and commit afterwards."""
+    await db.execute(register_stmt(stored, db.bind.dialect.name, refs))
+    return await run_in_threadpool(place, stored)
+
+
+def acquire_stmt(ref: str):
+    return blobs.update().where(blobs.c.name == _name(ref)).values(refcount=blobs.c.refcount + 1, touched_at=func.now())
+
+
+def swap(db: Session, old_refs, new_refs):
+    """Move references from the media a row used to point at to what it points at now."""
+    old_refs, new_refs = {r for r in old_refs if r}, {r for r in new_refs if r}
+    for ref in new_refs - old_refs:
+        db.execute(acquire_stmt(ref))
+    for ref in old_refs - new_refs:
+        release(db, ref)
+
+
+def release(db: Session, ref: str):
+    """Drop one reference; files from before content addressing have no row and are left alone."""
+    if ref:
+        db.execute(release_stmt(ref))
+
+
+def collect_garbage(db: Session, grace_seconds: int = MEDIA_GC_GRACE_SECONDS, batch: int = 500):
+    """Remove unreferenced blobs and abandoned upload sessions older than the grace period."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+    stale = (blobs.c.refcount <= 0) & (blobs.c.touched_at < cutoff)
+    removed = 0
+    for name in db.execute(select(blobs.c.name).where(stale).limit(batch)).scalars().all():
+        # conditional delete: a concurrent register() bumps refcount/touched_at and wins. The file
+        # goes before the commit, so an upload that waited on this row finds it gone and re-stores it
+        if db.execute(blobs.delete().where(stale & (blobs.c.name == name))).rowcount:
+            _discard(os.path.join(UPLOAD_DIR, name))
+            db.commit()
+            removed += 1
+        else:
+            db.rollback()
+    db.commit()
+    if os.path.isdir(INCOMING_DIR):
+        for entry in os.scandir(INCOMING_DIR):
+            if entry.stat().st_mtime < cutoff.timestamp():
+                _discard(entry.path)
+    return removed
+
+
+def _gc_once():
+    from app.core.database import SessionLocal
+    db = SessionLocal()
+    try:
+        return collect_garbage(db)
+    finally:
+        db.close()
+
+
+async def gc_forever(interval: int = MEDIA_GC_INTERVAL_SECONDS):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await run_in_threadpool(_gc_once)
+            if removed:
+                log.info("media gc removed %d blobs", removed)
+        except Exception:
+            log.exception("media gc failed")
@@ -0,0 +1,277 @@
+# backend/app/core/timeline.py
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import case, func, literal, select, tuple_
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import TIMELINE_MAX_ENTRIES, TIMELINE_FANOUT_LIMIT, TIMELINE_NEARBY_BOOST_SECONDS, TIMELINE_TRIM_INTERVAL_SECONDS
+from app.core.geo import ring_cells
+from app.models.follow import Follow
+from app.models.post import Post
+from app.models.timeline import TimelineEntry
+from app.models.user import User
+
+# Home timeline, fan-out on write: create_post pushes (reader, post, score) rows to the
+# author and their followers. Authors with more than TIMELINE_FANOUT_LIMIT followers
+# are not pushed; their posts are merged in when a follower reads (fan-out on read).
+# score = post time in epoch seconds, plus a boost when reader and author are nearby.
+# Reads never write: timelines that grew past TIMELINE_MAX_ENTRIES are cut back by
+# trim_forever (started in main.py) or `python -m app.core.timeline trim`.
+
+log = logging.getLogger(__name__)
+
+entries = TimelineEntry.__table__
+follows = Follow.__table__
+users = User.__table__
+
+
+def base_score(created_at: datetime = None) -> int:
+    if created_at is None:
+        created_at = datetime.now(timezone.utc)
+    elif created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return int(created_at.timestamp())
+
+
+def is_pull_author(author) -> bool:
+    return (author.follower_count or 0) > TIMELINE_FANOUT_LIMIT
+
+
+def _nearby_cells(author):
+    if author.lat is None or author.lng is None:
+        return []
+    return ring_cells(author.lat, author.lng, 0) + ring_cells(author.lat, author.lng, 1)
+
+
+def _boost(reader_cell, cells) -> int:
+    return TIMELINE_NEARBY_BOOST_SECONDS if reader_cell is not None and reader_cell in cells else 0
+
+
+def fan_out(db: Session, post_id: int, author_id: int, created_at: datetime = None):
+    """Push a new post into its author's and followers' timelines. The caller commits."""
+    author = db.get(User, author_id)
+    if author is None:
+        return 0
+    base = base_score(created_at)
+    db.execute(entries.insert().values(user_id=author_id, post_id=post_id, author_id=author_id, score=base))
+    if is_pull_author(author):
+        return 1
+    cells = _nearby_cells(author)
+    score = literal(base)
+    if cells:
+        score = score + case((users.c.geo_cell.in_(cells), TIMELINE_NEARBY_BOOST_SECONDS), else_=0)
+    audience = (
+        select(follows.c.follower_id, literal(post_id), literal(author_id), score)
+        .select_from(follows.join(users, users.c.id == follows.c.follower_id))
+        .where(follows.c.followee_id == author_id, follows.c.follower_id != author_id)
+    )
+    res = db.execute(entries.insert().from_select(["user_id", "post_id", "author_id", "score"], audience))
+    return 1 + max(res.rowcount or 0, 0)
+
+
+def _insert_new(db: Session, table):
+    """INSERT that skips rows whose primary key is already there (a concurrent request won)."""
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table).on_conflict_do_nothing(index_elements=list(table.primary_key.columns))
+
+
+def _backfill(db: Session, reader, author, limit: int):
+    """Copy the author's most recent posts into one reader's timeline."""
+    cells = _nearby_cells(author)
+    boost = _boost(reader.geo_cell, cells)
+    recent = (
+        db.query(Post.id, Post.created_at)
+        .filter(Post.user_id == author.id)
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(limit)
+        .all()
+    )
+    rows = [
+        {"user_id": reader.id, "post_id": r.id, "author_id": author.id, "score": base_score(r.created_at) + boost}
+        for r in recent
+    ]
+    if rows:
+        # posts fanned out to this reader meanwhile are already there
+        db.execute(_insert_new(db, entries), rows)
+
+
+def follow(db: Session, follower_id: int, followee_id: int) -> bool:
+    if follower_id == followee_id:
+        return False
+    author = db.get(User, followee_id)
+    reader = db.get(User, follower_id)
+    if author is None or reader is None:
+        return False
+    # two concurrent follows of the same pair: one inserts, the other finds nothing to do
+    inserted = db.execute(_insert_new(db, follows).values(follower_id=follower_id, followee_id=followee_id)).rowcount
+    if not inserted:
+        db.rollback()
+        return False
+    db.execute(users.update().where(users.c.id == followee_id).values(follower_count=func.coalesce(users.c.follower_count, 0) + 1))
+    db.flush()
+    db.refresh(author)
+    if not is_pull_author(author):
+        _backfill(db, reader, author, min(50, TIMELINE_MAX_ENTRIES))
+    db.commit()
+    return True
+
+
+def unfollow(db: Session, follower_id: int, followee_id: int) -> bool:
+    deleted = db.execute(
+        follows.delete().where(follows.c.follower_id == follower_id, follows.c.followee_id == followee_id)
+    ).rowcount
+    if deleted:
+        db.execute(users.update().where(users.c.id == followee_id).values(follower_count=func.coalesce(users.c.follower_count, 0) - 1))
+        db.execute(entries.delete().where(entries.c.user_id == follower_id, entries.c.author_id == followee_id))
+    db.commit()
+    return bool(deleted)
+
+
+def trim(db: Session, user_id: int, keep: int = TIMELINE_MAX_ENTRIES):
+    """Drop entries past the newest `keep` for one reader. The caller commits."""
+    newest = (
+        select(entries.c.post_id)
+        .where(entries.c.user_id == user_id)
+        .order_by(entries.c.score.desc(), entries.c.post_id.desc())
+        .limit(keep)
+    )
+    return db.execute(entries.delete().where(entries.c.user_id == user_id, entries.c.post_id.not_in(newest))).rowcount
+
+
+def _pulled(db: Session, user_id: int, key, limit: int):
+    """Posts from followed high-follower authors, newest first, in (score, id) form."""
+    authors = [
+        a for (a,) in db.query(Follow.followee_id)
+        .join(User, User.id == Follow.followee_id)
+        .filter(Follow.follower_id == user_id, User.follower_count > TIMELINE_FANOUT_LIMIT)
+    ]
+    if not authors:
+        return []
+    q = db.query(Post.id, Post.created_at).filter(Post.user_id.in_(authors), Post.user_id != user_id)
+    if key:
+        q = q.filter(Post.created_at < datetime.fromtimestamp(key[0] + 1, timezone.utc))
+    out = []
+    for pid, created_at in q.order_by(Post.created_at.desc(), Post.id.desc()).yield_per(limit + 1):
+        item = (base_score(created_at), pid)
+        if key and item >= key:
+            continue
+        out.append(item)
+        if len(out) > limit:
+            break
+    return out
+
+
+def read(db: Session, user_id: int, key=None, limit: int = 12):
+    """
+    One page of the home timeline: materialized entries merged with pulled posts.
+    Returns (posts, next_key) where next_key is None on the last page.
+    """
+    q = db.query(TimelineEntry.score, TimelineEntry.post_id).filter(TimelineEntry.user_id == user_id)
+    if key:
+        q = q.filter(tuple_(TimelineEntry.score, TimelineEntry.post_id) < key)
+    pushed = q.order_by(TimelineEntry.score.desc(), TimelineEntry.post_id.desc()).limit(limit + 1).all()
+    best = {}
+    for score, pid in [tuple(r) for r in pushed] + _pulled(db, user_id, key, limit):
+        best[pid] = max(score, best.get(pid, score))
+    page = sorted(((s, pid) for pid, s in best.items()), reverse=True)[:limit + 1]
+    has_more = len(page) > limit
+    page = page[:limit]
+    by_id = {p.id: p for p in db.query(Post).filter(Post.id.in_([pid for _, pid in page]))} if page else {}
+    posts = [by_id[pid] for _, pid in page if pid in by_id]
+    return posts, (page[-1] if has_more else None)
+
+
+def rebuild(db: Session, user_ids=None, batch: int = 200):
+    """Recompute timelines from follows + posts (all users when user_ids is None)."""
+    q = db.query(User).order_by(User.id)
+    if user_ids:
+        q = q.filter(User.id.in_(user_ids))
+    last_id = 0
+    done = 0
+    while True:
+        readers = q.filter(User.id > last_id).limit(batch).all()
+        if not readers:
+            return done
+        for reader in readers:
+            db.execute(entries.delete().where(entries.c.user_id == reader.id))
+            authors = [reader] + [
+                a for a in db.query(User).join(Follow, Follow.followee_id == User.id).filter(Follow.follower_id == reader.id)
+                if not is_pull_author(a)
+            ]
+            boosts = {a.id: _boost(reader.geo_cell, _nearby_cells(a)) if a.id != reader.id else 0 for a in authors}
+            recent = (
+                db.query(Post.id, Post.user_id, Post.created_at)
+                .filter(Post.user_id.in_(list(boosts)))
+                .order_by(Post.created_at.desc(), Post.id.desc())
+                .limit(TIMELINE_MAX_ENTRIES)
+                .all()
+            )
+            rows = [
+                {"user_id": reader.id, "post_id": r.id, "author_id": r.user_id, "score": base_score(r.created_at) + boosts[r.user_id]}
+                for r in recent
+            ]
+            if rows:
+                db.execute(entries.insert(), rows)
+            done += 1
+        db.commit()
+        last_id = readers[-1].id
+
+
+def trim_all(db: Session, keep: int = TIMELINE_MAX_ENTRIES):
+    """Trim every timeline holding more than `keep` entries, one reader per transaction."""
+    over = (
+        db.query(TimelineEntry.user_id)
+        .group_by(TimelineEntry.user_id)
+        .having(func.count() > keep)
+        .all()
+    )
+    removed = 0
+    for (user_id,) in over:
+        removed += trim(db, user_id, keep)
+        db.commit()
+    return removed
+
+
+def _trim_once():
+    from app.core.database import SessionLocal
+    db = SessionLocal()
+    try:
+        return trim_all(db)
+    finally:
+        db.close()
+
+
+async def trim_forever(interval: int = TIMELINE_TRIM_INTERVAL_SECONDS):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await run_in_threadpool(_trim_once)
+            if removed:
+                log.info("timeline trim removed %d entries", removed)
+        except Exception:
+            log.exception("timeline trim failed")
+
+
+if __name__ == "__main__":
+    from app.core.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Home timeline maintenance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_rebuild = sub.add_parser("rebuild", help="recompute timelines from follows and posts")
+    p_rebuild.add_argument("--user", type=int, action="append", help="only these user ids (repeatable)")
+    sub.add_parser("trim", help=f"cut every timeline to TIMELINE_MAX_ENTRIES ({TIMELINE_MAX_ENTRIES})")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.cmd == "rebuild":
+            print(f"rebuilt {rebuild(db, args.user)} timelines")
+        else:
+            print(f"trimmed {trim_all(db)} entries")
+    finally:
+        db.close()
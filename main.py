@@ -1,32 +1,170 @@
 # backend/app/main.py
+import asyncio
+from pathlib import Path
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from app.core.database import Base, engine
-from app.core.config import UPLOAD_DIR
-from app.routes import uploads  # if you already have uploads route
-from app.routes import posts
-# import users/auth routers as you have them
-
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="VSXchangeZA API")
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://127.0.0.1:5500","http://localhost:5500", "http://localhost:8000"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# include routers
-app.include_router(posts.router)       # provides /posts endpoints
-# app.include_router(uploads.router, prefix="/api")  # if you have a separate uploads route
-
-# serve uploads (so uploaded files are accessible at /uploads/<filename>)
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
-
-@app.get("/")
-def root():
-    return {"message":"VSXchangeZA API running"}
\ No newline at end of file
+from app.core.config import UPLOAD_DIR, MIGRATE_ON_STARTUP
+from app.core.serialization import FastJSONResponse
+from app.core.metrics import MetricsMiddleware, registry
+
+# Nothing here touches the database or the filesystem at import. Routers, engines and
+# background jobs are wired up by create_app(); the schema is managed by core/migrations.py
+# (once per deploy) and only its version is checked at startup.
+#
+#     uvicorn app.main:create_app --factory     or, as before,     uvicorn app.main:app
+
+
+def create_app() -> FastAPI:
+    from app.core import storage, media, migrations, matching, timeline
+    from app.core.database import engine, async_engine, pool_stats
+    from app.core.static import MediaFiles
+    from app.core.counters import counters
+    from app.core.cache import response_cache
+    from app.core.messaging import hub
+    from app.core.events import bus
+    from app.core.security import hash_pool
+    from app.core.ratelimit import RateLimitMiddleware, limiter
+    from app.routes import uploads  # if you already have uploads route
+    from app.routes import posts
+    from app.routes import search
+    from app.routes import messages
+    from app.routes import events
+    from app.routes import market
+    from app.routes import user
+    from app.routes import auth
+
+    # orjson-backed JSON for every route (core/serialization.py)
+    app = FastAPI(title="VSXchangeZA API", default_response_class=FastJSONResponse)
+
+    # oversized request bodies get a 413 before anything reads them (core/storage.py)
+    app.add_middleware(storage.UploadLimitMiddleware)
+
+    # token buckets + in-flight caps (core/ratelimit.py); inside CORS so 429/503 stay readable by the browser
+    app.add_middleware(RateLimitMiddleware)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://127.0.0.1:5500","http://localhost:5500", "http://localhost:8000"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # per-route latency, SQL statements per request, N+1 flags, optional Server-Timing (core/metrics.py)
+    app.add_middleware(MetricsMiddleware)
+
+    # include routers
+    app.include_router(posts.router)       # provides /posts endpoints
+    app.include_router(search.router)      # provides /users and /search
+    app.include_router(uploads.router)     # provides /upload and resumable /upload/sessions
+    app.include_router(messages.router)    # provides /messages and the /ws/messages socket
+    app.include_router(events.router)      # provides the /events SSE stream
+    app.include_router(market.router)      # provides /listings, /exchange-requests and /matches
+    app.include_router(user.router)        # provides /users/{id} (profile) and /users/{id}/follow
+    app.include_router(auth.router)        # provides /register and /login
+
+    # serve uploads (so uploaded files are accessible at /uploads/<filename>)
+    # immutable caching + strong ETags + Range, see core/static.py
+    Path(UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
+    app.mount("/uploads", MediaFiles(directory=UPLOAD_DIR), name="uploads")
+
+    @app.on_event("startup")
+    async def check_schema():
+        # one SELECT against schema_version; DDL only when explicitly asked to (single-process dev setups)
+        if MIGRATE_ON_STARTUP:
+            await run_in_threadpool(migrations.upgrade)
+        else:
+            await run_in_threadpool(migrations.check)
+
+    @app.on_event("startup")
+    async def start_media_gc():
+        # reclaim unreferenced media blobs in the background
+        app.state.media_gc = asyncio.create_task(storage.gc_forever())
+        # thumbnails / responsive variants / video posters
+        app.state.media_worker = asyncio.create_task(media.worker_forever())
+        # batched approvals/shares writes
+        app.state.counter_flush = asyncio.create_task(counters.flush_forever())
+        # coalesced delivery of live events to /events streams
+        app.state.event_bus = asyncio.create_task(bus.run_forever())
+        # pairs new exchange requests with listings / skilled users, incrementally
+        app.state.matching = asyncio.create_task(matching.worker_forever())
+        # cuts home timelines back to TIMELINE_MAX_ENTRIES (reads never write)
+        app.state.timeline_trim = asyncio.create_task(timeline.trim_forever())
+
+    @app.on_event("shutdown")
+    async def flush_counters():
+        s = app.state
+        tasks = [s.media_gc, s.media_worker, s.counter_flush, s.event_bus, s.matching, s.timeline_trim]
+        for task in tasks:
+            task.cancel()
+        # wait for them to unwind; a cancelled threadpool call finishes its current batch first
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await run_in_threadpool(counters.flush)
+        await async_engine.dispose()
+
+    @app.get("/")
+    def root():
+        return {"message":"VSXchangeZA API running"}
+
+    @app.get("/cache/stats")
+    def cache_stats():
+        # hit/miss counters of the response cache (core/cache.py)
+        return response_cache.stats()
+
+    @app.get("/db/stats")
+    def db_stats():
+        # connection pool occupancy and checkout latency (core/database.py)
+        return {"sync": pool_stats(engine), "async": pool_stats(async_engine)}
+
+    @app.get("/ws/stats")
+    def ws_stats():
+        # open message sockets and fan-out counters (core/messaging.py)
+        return hub.stats()
+
+    @app.get("/ratelimit/stats")
+    def ratelimit_stats():
+        # 429s, 503s and requests in flight per pool (core/ratelimit.py)
+        return limiter.stats()
+
+    @app.get("/matching/stats")
+    def matching_stats():
+        # marketplace matching batches and candidate pairs (core/matching.py)
+        return matching.matcher.stats()
+
+    @app.get("/events/stats")
+    def events_stats():
+        # SSE subscribers and how much the bus coalesced (core/events.py)
+        return bus.stats()
+
+    # component stats exported as gauges next to the request metrics
+    registry.collect("vsx_hash_pool", hash_pool.stats)
+    registry.collect("vsx_response_cache", response_cache.stats)
+    registry.collect("vsx_db_pool", lambda: pool_stats(engine), engine="sync")
+    registry.collect("vsx_db_pool", lambda: pool_stats(async_engine), engine="async")
+    registry.collect("vsx_counters", counters.stats)
+    registry.collect("vsx_ws", hub.stats)
+    registry.collect("vsx_events", bus.stats)
+    registry.collect("vsx_ratelimit", limiter.stats)
+    registry.collect("vsx_matching", matching.matcher.stats)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        # Prometheus text exposition format
+        return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    return app
+
+
+_app = None
+
+
+def __getattr__(name):
+    # `app.main:app` keeps working: built on first access, not on import
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
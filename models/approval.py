@@ -0,0 +1,10 @@
+# backend/app/models/approval.py
+from sqlalchemy import Column, Integer, ForeignKey, func
+from app.core.database import Base, Timestamp
+
+class PostApproval(Base):
+    """One row per (post, user): makes approving idempotent and is the source of truth for posts.approvals."""
+    __tablename__ = "post_approvals"
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(Timestamp, server_default=func.now())
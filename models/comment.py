@@ -1,7 +1,7 @@
 # backend/app/models/comment.py
-from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime, func
+from sqlalchemy import Column, Integer, ForeignKey, Text, Index, func
 from sqlalchemy.orm import relationship
-from app.core.database import Base
+from app.core.database import Base, Timestamp
 
 class Comment(Base):
     __tablename__ = "comments"
@@ -9,6 +9,11 @@ class Comment(Base):
     post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"))
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     text = Column(Text, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
 
-    user = relationship("User", lazy="joined")
\ No newline at end of file
+    user = relationship("User", lazy="joined")
+
+    # a post's thread in order, keyset pages and the latest-N previews all walk this index
+    __table_args__ = (
+        Index("ix_comments_post_created_id", "post_id", "created_at", "id"),
+    )
@@ -0,0 +1,14 @@
+# backend/app/models/follow.py
+from sqlalchemy import Column, Integer, ForeignKey, Index, func
+from app.core.database import Base, Timestamp
+
+class Follow(Base):
+    """follower_id follows followee_id; the PK serves "who do I follow", the index "who follows me"."""
+    __tablename__ = "follows"
+    follower_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    followee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(Timestamp, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_follows_followee_follower", "followee_id", "follower_id"),
+    )
@@ -0,0 +1,84 @@
+# backend/app/models/listing.py
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Text, ForeignKey, Index, UniqueConstraint, func
+from app.core.database import Base, Timestamp
+
+# Marketplace: what people offer (Listing) and what they are looking for (ExchangeRequest).
+# category is lower-cased ("plumbing", "maize"), prices are whole cents of ZAR (NULL = swap /
+# negotiable), geo_cell is the core/geo.py grid bucket of the geocoded location.
+# Browse queries filter category + status, optionally location (geo_cell IN nearby cells),
+# then walk recency or price; each combination has a composite index in that column order.
+
+class Listing(Base):
+    __tablename__ = "listings"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    category = Column(String(60), nullable=False)
+    title = Column(String(200), nullable=False)
+    description = Column(Text, nullable=True)
+    price_cents = Column(BigInteger, nullable=True)
+    quantity = Column(Integer, nullable=True)
+    unit = Column(String(30), nullable=True)             # "bags", "hours", ...
+    location = Column(String(200), nullable=True)
+    lat = Column(Float, nullable=True)
+    lng = Column(Float, nullable=True)
+    geo_cell = Column(Integer, nullable=True)
+    status = Column(String(16), nullable=False, default="active")   # active / closed
+    matched_at = Column(Timestamp, nullable=True)         # NULL until core/matching.py has looked at it
+    created_at = Column(Timestamp, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_listings_browse_recent", "category", "status", created_at.desc(), id.desc()),
+        Index("ix_listings_browse_geo", "category", "status", "geo_cell", created_at.desc(), id.desc()),
+        Index("ix_listings_browse_price", "category", "status", "price_cents", "id"),
+        Index("ix_listings_status_recent", "status", created_at.desc(), id.desc()),
+        Index("ix_listings_status_geo", "status", "geo_cell"),
+        Index("ix_listings_user_recent", "user_id", created_at.desc(), id.desc()),
+        Index("ix_listings_unmatched", "matched_at", "id"),
+    )
+
+class ExchangeRequest(Base):
+    __tablename__ = "exchange_requests"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    category = Column(String(60), nullable=False)
+    title = Column(String(200), nullable=False)
+    description = Column(Text, nullable=True)
+    max_price_cents = Column(BigInteger, nullable=True)  # budget; NULL = open to offers / swaps
+    quantity = Column(Integer, nullable=True)
+    unit = Column(String(30), nullable=True)
+    location = Column(String(200), nullable=True)
+    lat = Column(Float, nullable=True)
+    lng = Column(Float, nullable=True)
+    geo_cell = Column(Integer, nullable=True)
+    status = Column(String(16), nullable=False, default="open")     # open / closed
+    matched_at = Column(Timestamp, nullable=True)
+    created_at = Column(Timestamp, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_exchange_requests_browse_recent", "category", "status", created_at.desc(), id.desc()),
+        Index("ix_exchange_requests_browse_geo", "category", "status", "geo_cell", created_at.desc(), id.desc()),
+        Index("ix_exchange_requests_browse_price", "category", "status", "max_price_cents", "id"),
+        Index("ix_exchange_requests_status_recent", "status", created_at.desc(), id.desc()),
+        Index("ix_exchange_requests_user_recent", "user_id", created_at.desc(), id.desc()),
+        Index("ix_exchange_requests_unmatched", "matched_at", "id"),
+    )
+
+class ExchangeMatch(Base):
+    """A candidate for a request: a listing (kind="listing") or a user with the skill (kind="user")."""
+    __tablename__ = "exchange_matches"
+    id = Column(Integer, primary_key=True, index=True)
+    request_id = Column(Integer, ForeignKey("exchange_requests.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(10), nullable=False)
+    target_id = Column(Integer, nullable=False)           # listings.id or users.id
+    candidate_user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Integer, nullable=False)
+    distance_km = Column(Float, nullable=True)
+    created_at = Column(Timestamp, server_default=func.now())
+
+    __table_args__ = (
+        # the matcher may meet the same pair from both sides; the second insert is a no-op
+        UniqueConstraint("request_id", "kind", "target_id", name="uq_exchange_matches_target"),
+        # a request's best candidates; "requests that match me or my listings", newest first
+        Index("ix_exchange_matches_request_score", "request_id", score.desc(), "id"),
+        Index("ix_exchange_matches_candidate_recent", "candidate_user_id", created_at.desc(), id.desc()),
+    )
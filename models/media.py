@@ -0,0 +1,31 @@
+# backend/app/models/media.py
+from sqlalchemy import Column, Integer, String, BigInteger, Text, ForeignKey, Index, func
+from app.core.database import Base, Timestamp
+
+class MediaBlob(Base):
+    """One row per stored file (content-addressed); refcount tracks posts/users pointing at it."""
+    __tablename__ = "media_blobs"
+    name = Column(String(200), primary_key=True)      # "ab/cd/<sha256>.<ext>" under UPLOAD_DIR
+    sha256 = Column(String(64), index=True, nullable=False)
+    size = Column(BigInteger, nullable=False, default=0)
+    refcount = Column(Integer, nullable=False, default=0)
+    touched_at = Column(Timestamp, server_default=func.now(), index=True)
+
+class MediaJob(Base):
+    """Background processing queue (thumbnails, responsive variants, video posters)."""
+    __tablename__ = "media_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
+    source = Column(String(200), nullable=False)       # blob name under UPLOAD_DIR
+    media_type = Column(String(32), nullable=True)
+    status = Column(String(16), nullable=False, default="queued")   # queued / running / done / failed
+    attempts = Column(Integer, nullable=False, default=0)     # claims, including ones whose worker died
+    failures = Column(Integer, nullable=False, default=0)     # runs that raised
+    run_after = Column(Timestamp, nullable=True)               # retry backoff: not claimed before this
+    error = Column(Text, nullable=True)
+    locked_at = Column(Timestamp, nullable=True)
+    created_at = Column(Timestamp, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_media_jobs_status_id", "status", "id"),
+    )
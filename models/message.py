@@ -0,0 +1,33 @@
+# backend/app/models/message.py
+from sqlalchemy import Column, Integer, ForeignKey, Text, Index, UniqueConstraint, func
+from app.core.database import Base, Timestamp
+
+class Conversation(Base):
+    """A two-person thread; the pair is stored ordered (user_a < user_b) so it has one row."""
+    __tablename__ = "conversations"
+    id = Column(Integer, primary_key=True, index=True)
+    user_a = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_b = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    last_message_id = Column(Integer, nullable=True)
+    last_message_at = Column(Timestamp, server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+
+    # inbox: a user's conversations, most recently active first, from either side of the pair
+    __table_args__ = (
+        UniqueConstraint("user_a", "user_b", name="uq_conversations_pair"),
+        Index("ix_conversations_a_last", "user_a", last_message_at.desc(), id.desc()),
+        Index("ix_conversations_b_last", "user_b", last_message_at.desc(), id.desc()),
+    )
+
+class Message(Base):
+    __tablename__ = "messages"
+    id = Column(Integer, primary_key=True, index=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
+    sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    text = Column(Text, nullable=False)
+    created_at = Column(Timestamp, server_default=func.now())
+
+    # "latest N messages of a conversation" and its keyset pages walk this index
+    __table_args__ = (
+        Index("ix_messages_conversation_created_id", "conversation_id", created_at.desc(), id.desc()),
+    )
@@ -1,7 +1,7 @@
 # backend/app/models/post.py
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Index, func
 from sqlalchemy.orm import relationship
-from app.core.database import Base
+from app.core.database import Base, Timestamp
 
 class Post(Base):
     __tablename__ = "posts"
@@ -10,8 +10,15 @@ class Post(Base):
     text = Column(Text, nullable=True)
     media = Column(String(1024), nullable=True)
     media_type = Column(String(32), nullable=True)
+    variants = Column(Text, nullable=True)   # JSON, filled in by the media worker
     approvals = Column(Integer, default=0)
     shares = Column(Integer, default=0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    comment_count = Column(Integer, default=0)   # bumped in the same transaction as the comment insert
+    created_at = Column(Timestamp, server_default=func.now())
 
-    user = relationship("User", lazy="joined")
\ No newline at end of file
+    user = relationship("User", lazy="joined")
+
+    # keyset pagination for the feed walks this index newest-first
+    __table_args__ = (
+        Index("ix_posts_created_at_id", created_at.desc(), id.desc()),
+    )
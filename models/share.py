@@ -0,0 +1,10 @@
+# backend/app/models/share.py
+from sqlalchemy import Column, Integer, ForeignKey, func
+from app.core.database import Base, Timestamp
+
+class PostShare(Base):
+    """One row per (post, user): a user's share counts once, like approvals (models/approval.py)."""
+    __tablename__ = "post_shares"
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(Timestamp, server_default=func.now())
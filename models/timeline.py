@@ -0,0 +1,15 @@
+# backend/app/models/timeline.py
+from sqlalchemy import Column, Integer, BigInteger, ForeignKey, Index
+from app.core.database import Base
+
+class TimelineEntry(Base):
+    """Materialized home feed: one row per (reader, post), ordered by score (see core/timeline.py)."""
+    __tablename__ = "timeline_entries"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    author_id = Column(Integer, nullable=False)
+    score = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index("ix_timeline_user_score_post", "user_id", score.desc(), post_id.desc()),
+    )
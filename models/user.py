@@ -1,5 +1,5 @@
 # backend/app/models/user.py
-from sqlalchemy import Column, Integer, String, Text, Boolean
+from sqlalchemy import Column, Integer, String, Text, Boolean, Float
 from app.core.database import Base
 
 class User(Base):
@@ -11,5 +11,12 @@ class User(Base):
     password_hash = Column(String(256), nullable=False)
     role = Column(String(50), default="client")
     location = Column(String(200), nullable=True)
+    lat = Column(Float, nullable=True)
+    lng = Column(Float, nullable=True)
+    geo_cell = Column(Integer, nullable=True, index=True)        # grid bucket, see core/geo.py
     bio = Column(Text, nullable=True)
-    discoverable = Column(Boolean, default=True)
\ No newline at end of file
+    avatar_url = Column(String(300), nullable=True)              # /uploads/... (media_blobs holds a reference)
+    photos = Column(Text, nullable=True)                         # JSON list of /uploads/... gallery URLs, same
+    skills = Column(Text, nullable=True)                        # JSON list of skills
+    discoverable = Column(Boolean, default=True)
+    follower_count = Column(Integer, default=0)                  # > TIMELINE_FANOUT_LIMIT: feeds pull instead of push
\ No newline at end of file
@@ -0,0 +1,13 @@
+# backend/app/models/user_skill.py
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from app.core.database import Base
+
+class UserSkill(Base):
+    """One row per (user, skill); skill is stored lower-cased for indexed prefix lookups."""
+    __tablename__ = "user_skills"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    skill = Column(String(120), primary_key=True)
+
+    __table_args__ = (
+        Index("ix_user_skills_skill_user", "skill", "user_id"),
+    )
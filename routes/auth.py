@@ -4,12 +4,13 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from app.core.database import get_db
 from app.models.user import User
+from app.core.search import index_user
 from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
-from passlib.context import CryptContext
+from app.core.security import hash_password_async, verify_password_async
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime, timedelta
 from jose import jwt
 
-pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
 router = APIRouter()
 
 class RegisterIn(BaseModel):
@@ -23,14 +24,29 @@ class LoginIn(BaseModel):
     email: EmailStr
     password: str
 
+# Handlers are async so bcrypt waits on the dedicated hash pool (core/security.py)
+# instead of holding a request threadpool slot; the short DB calls go to the threadpool.
+def _find_user(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+def _create_user(db: Session, payload: RegisterIn, hashed: str):
+    u = User(first_name=payload.first_name, last_name=payload.last_name, email=payload.email, password_hash=hashed, role=payload.role)
+    db.add(u); db.flush()
+    index_user(db, u)
+    db.commit(); db.refresh(u)
+    return u
+
+def _upgrade_hash(db: Session, u: User, new_hash: str):
+    u.password_hash = new_hash
+    db.commit()
+
 @router.post("/register")
-def register(payload: RegisterIn, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == payload.email).first()
+async def register(payload: RegisterIn, db: Session = Depends(get_db)):
+    existing = await run_in_threadpool(_find_user, db, payload.email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed = pwd.hash(payload.password)
-    u = User(first_name=payload.first_name, last_name=payload.last_name, email=payload.email, password_hash=hashed, role=payload.role)
-    db.add(u); db.commit(); db.refresh(u)
+    hashed = await hash_password_async(payload.password)
+    u = await run_in_threadpool(_create_user, db, payload, hashed)
     return {"id": u.id, "email": u.email, "first_name": u.first_name, "role": u.role}
 
 def create_access_token(data: dict, expires_minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES):
@@ -40,9 +56,15 @@ def create_access_token(data: dict, expires_minutes: int = ACCESS_TOKEN_EXPIRE_M
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 @router.post("/login")
-def login(payload: LoginIn, db: Session = Depends(get_db)):
-    u = db.query(User).filter(User.email == payload.email).first()
-    if not u or not pwd.verify(payload.password, u.password_hash):
+async def login(payload: LoginIn, db: Session = Depends(get_db)):
+    u = await run_in_threadpool(_find_user, db, payload.email)
+    if not u:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    ok, new_hash = await verify_password_async(payload.password, u.password_hash)
+    if not ok:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # cost factor (BCRYPT_ROUNDS) changed since this hash was made: upgrade it in place
+        await run_in_threadpool(_upgrade_hash, db, u, new_hash)
     token = create_access_token({"sub": str(u.id)})
     return {"token": token, "user": {"id": u.id, "first_name": u.first_name, "last_name": u.last_name, "email": u.email, "role": u.role, "location": u.location}}
\ No newline at end of file
@@ -0,0 +1,57 @@
+# backend/app/routes/events.py
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from app.core.config import EVENTS_COALESCE_SECONDS, EVENTS_HEARTBEAT_SECONDS, EVENTS_MAX_WATCHED_POSTS
+from app.core.events import bus, frame
+
+router = APIRouter(tags=["events"])
+
+def _post_ids(posts: str):
+    if not posts:
+        return []
+    try:
+        ids = sorted({int(p) for p in posts.split(",") if p.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="posts must be a comma-separated list of ids")
+    if len(ids) > EVENTS_MAX_WATCHED_POSTS:
+        raise HTTPException(status_code=400, detail=f"At most {EVENTS_MAX_WATCHED_POSTS} posts per stream")
+    return ids
+
+# ---------------------------
+# Live feed: GET /events?posts=1,2,3[&feed=false]  (text/event-stream)
+#   post      a new post (feed topic), same shape as GET /posts items
+#   counts    {postId, approvals, shares} of a watched post, latest value per tick
+#   comment   {postId, comment} on a watched post
+#   resync    too much happened at once (or the client fell behind): refetch
+# Reconnect with a new `posts` list when the set of visible posts changes.
+# ---------------------------
+@router.get("/events")
+async def stream_events(request: Request, posts: str = None, feed: bool = True):
+    ids = _post_ids(posts)
+    topics = [f"post:{i}" for i in ids] + (["posts"] if feed else [])
+
+    async def body():
+        # subscribed only once the stream is running: a client that disconnects before the
+        # first byte never starts the generator, and then nothing is registered on the bus
+        sub = None
+        try:
+            sub = bus.subscribe(topics)
+            yield f"retry: {int(EVENTS_COALESCE_SECONDS * 1000) + 2000}\n" + frame("ready", {"posts": ids, "feed": feed})
+            while True:
+                chunk = await sub.next(EVENTS_HEARTBEAT_SECONDS)
+                if chunk is None:
+                    if await request.is_disconnected():
+                        return
+                    # comment line: keeps proxies from timing the stream out
+                    yield ": keepalive\n\n"
+                else:
+                    yield chunk
+        finally:
+            if sub is not None:
+                bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,336 @@
+# backend/app/routes/market.py
+from typing import Optional
+from fastapi import APIRouter, Body, Depends, HTTPException
+from sqlalchemy import and_, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db, write_lock
+from app.core.geo import cells_within, cell_of, geocode
+from app.core.pagination import encode_cursor, decode_cursor, encode_score_cursor, decode_score_cursor
+from app.core.security import Principal, get_current_user, get_current_user_optional
+from app.core.serialization import FastJSONResponse
+from app.models.listing import ExchangeMatch, ExchangeRequest, Listing
+from app.models.user import User
+from app.schemas.market import ListingOut, ListingPage, ExchangeRequestOut, ExchangeRequestPage, MatchPage
+from app.schemas.user import user_summary
+
+# Marketplace: listings (offers) and exchange requests (wants). Both browse the same way:
+# category + status, optionally near a place (geo_cell IN the cells covering radius_km),
+# then newest first (created_at cursor) or cheapest first (price cursor), each served by a
+# composite index in models/listing.py. Matches are written by core/matching.py.
+router = APIRouter(tags=["market"])
+
+MAX_RADIUS_KM = 200
+MAX_PRICE_RAND = 10_000_000
+
+# (price column, status while visible, name in errors)
+KINDS = {
+    Listing: (Listing.price_cents, "active", "Listing"),
+    ExchangeRequest: (ExchangeRequest.max_price_cents, "open", "Request"),
+}
+
+def _page(limit: int):
+    return min(max(limit, 1), 100)
+
+def _rand(cents):
+    return None if cents is None else cents / 100
+
+def _listing_out(l: Listing, user=None):
+    return {
+        "id": l.id,
+        "category": l.category,
+        "title": l.title,
+        "description": l.description,
+        "price": _rand(l.price_cents),
+        "quantity": l.quantity,
+        "unit": l.unit,
+        "location": l.location,
+        "status": l.status,
+        "createdAt": l.created_at.isoformat() if l.created_at else None,
+        "user": user_summary(user),
+    }
+
+def _request_out(r: ExchangeRequest, user=None):
+    return {
+        "id": r.id,
+        "category": r.category,
+        "title": r.title,
+        "description": r.description,
+        "maxPrice": _rand(r.max_price_cents),
+        "quantity": r.quantity,
+        "unit": r.unit,
+        "location": r.location,
+        "status": r.status,
+        "createdAt": r.created_at.isoformat() if r.created_at else None,
+        "user": user_summary(user),
+    }
+
+# ---------------------------
+# Input
+# ---------------------------
+def _category(value) -> str:
+    category = str(value or "").strip().lower()[:60]
+    if not category:
+        raise HTTPException(status_code=400, detail="category is required")
+    return category
+
+def _cents(value, field: str) -> Optional[int]:
+    """Rand (number or numeric string) -> whole cents; empty means negotiable."""
+    if value is None or value == "":
+        return None
+    try:
+        rand = float(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"{field} must be a number")
+    if not 0 <= rand <= MAX_PRICE_RAND:
+        raise HTTPException(status_code=400, detail=f"{field} must be between 0 and {MAX_PRICE_RAND}")
+    return round(rand * 100)
+
+def _quantity(value) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        quantity = int(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="quantity must be a whole number")
+    if quantity < 0:
+        raise HTTPException(status_code=400, detail="quantity must not be negative")
+    return quantity
+
+async def _fields(db: AsyncSession, payload: dict, user: Principal) -> dict:
+    """Columns shared by listings and requests; location defaults to the poster's profile."""
+    title = str(payload.get("title") or "").strip()[:200]
+    if not title:
+        raise HTTPException(status_code=400, detail="title is required")
+    location = str(payload.get("location") or "").strip()[:200] or None
+    if location is None:
+        location = await db.scalar(select(User.location).where(User.id == user.id))
+    point = geocode(location)
+    return {
+        "user_id": user.id,
+        "category": _category(payload.get("category")),
+        "title": title,
+        "description": str(payload.get("description") or "").strip() or None,
+        "quantity": _quantity(payload.get("quantity")),
+        "unit": str(payload.get("unit") or "").strip()[:30] or None,
+        "location": location,
+        "lat": point[0] if point else None,
+        "lng": point[1] if point else None,
+        "geo_cell": cell_of(*point) if point else None,
+    }
+
+async def _create(db: AsyncSession, row):
+    async with write_lock(db):
+        db.add(row)
+        await db.commit()
+    await db.refresh(row, ["created_at"])
+    # core/matching.py picks it up on its next poll (matched_at IS NULL)
+    return row
+
+# ---------------------------
+# Browse
+# ---------------------------
+async def _browse(db: AsyncSession, model, viewer: Optional[Principal], *, category, near, radius_km, min_price, max_price, sort, mine, user_id, limit, cursor):
+    """(rows of (item, owner), has_more, next_cursor) for GET /listings and /exchange-requests."""
+    price, visible, _ = KINDS[model]
+    limit = _page(limit)
+    if sort not in ("recent", "price"):
+        raise HTTPException(status_code=400, detail="sort must be 'recent' or 'price'")
+    q = select(model, User).join(User, User.id == model.user_id)
+    if mine:
+        if viewer is None:
+            raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+        # your own, closed ones included (ix_*_user_recent)
+        q = q.where(model.user_id == viewer.id)
+    else:
+        q = q.where(model.status == visible)
+        if user_id is not None:
+            q = q.where(model.user_id == user_id)
+    if category:
+        q = q.where(model.category == _category(category))
+    if near:
+        point = geocode(near)
+        if not point:
+            raise HTTPException(status_code=400, detail="Unknown location")
+        q = q.where(model.geo_cell.in_(cells_within(*point, min(max(radius_km, 1), MAX_RADIUS_KM))))
+    low, high = _cents(min_price, "minPrice"), _cents(max_price, "maxPrice")
+    if low is not None:
+        q = q.where(price >= low)
+    if high is not None:
+        q = q.where(price <= high)
+
+    if sort == "price":
+        # cheapest first; negotiable (no price) items only appear in the recency order
+        q = q.where(price.is_not(None)).order_by(price, model.id)
+        if cursor:
+            key = decode_score_cursor(cursor)
+            if not key:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            q = q.where(tuple_(price, model.id) > key)
+    else:
+        q = q.order_by(model.created_at.desc(), model.id.desc())
+        if cursor:
+            key = decode_cursor(cursor)
+            if not key:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            q = q.where(tuple_(model.created_at, model.id) < key)
+
+    rows = (await db.execute(q.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1][0]
+        if sort == "price":
+            next_cursor = encode_score_cursor(getattr(last, price.key), last.id)
+        else:
+            next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, has_more, next_cursor
+
+async def _get(db: AsyncSession, model, item_id: int):
+    item = await db.get(model, item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail=f"{KINDS[model][2]} not found")
+    return item
+
+async def _close(db: AsyncSession, model, item_id: int, user: Principal):
+    item = await _get(db, model, item_id)
+    if item.user_id != user.id:
+        raise HTTPException(status_code=403, detail=f"{KINDS[model][2]} belongs to someone else")
+    if item.status != "closed":
+        async with write_lock(db):
+            item.status = "closed"
+            await db.commit()
+    return item
+
+# ---------------------------
+# Listings
+# ---------------------------
+@router.post("/listings", response_model=ListingOut)
+async def create_listing(payload: dict = Body(...), db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_user)):
+    fields = await _fields(db, payload, user)
+    listing = await _create(db, Listing(**fields, price_cents=_cents(payload.get("price"), "price"), status="active"))
+    return FastJSONResponse(_listing_out(listing, user))
+
+@router.get("/listings", response_model=ListingPage)
+async def list_listings(
+    category: str = None, near: str = None, radius_km: float = 50, min_price: float = None, max_price: float = None,
+    sort: str = "recent", mine: bool = False, user_id: int = None, limit: int = 20, cursor: str = None,
+    db: AsyncSession = Depends(get_async_db), viewer: Optional[Principal] = Depends(get_current_user_optional),
+):
+    rows, has_more, next_cursor = await _browse(
+        db, Listing, viewer, category=category, near=near, radius_km=radius_km, min_price=min_price, max_price=max_price,
+        sort=sort, mine=mine, user_id=user_id, limit=limit, cursor=cursor,
+    )
+    return FastJSONResponse({"listings": [_listing_out(l, u) for l, u in rows], "hasMore": has_more, "nextCursor": next_cursor})
+
+@router.get("/listings/{listing_id}", response_model=ListingOut)
+async def get_listing(listing_id: int, db: AsyncSession = Depends(get_async_db)):
+    listing = await _get(db, Listing, listing_id)
+    return FastJSONResponse(_listing_out(listing, await db.get(User, listing.user_id)))
+
+@router.post("/listings/{listing_id}/close", response_model=ListingOut)
+async def close_listing(listing_id: int, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_user)):
+    return FastJSONResponse(_listing_out(await _close(db, Listing, listing_id, user), user))
+
+# ---------------------------
+# Exchange requests
+# ---------------------------
+@router.post("/exchange-requests", response_model=ExchangeRequestOut)
+async def create_request(payload: dict = Body(...), db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_user)):
+    fields = await _fields(db, payload, user)
+    req = await _create(db, ExchangeRequest(**fields, max_price_cents=_cents(payload.get("maxPrice"), "maxPrice"), status="open"))
+    return FastJSONResponse(_request_out(req, user))
+
+@router.get("/exchange-requests", response_model=ExchangeRequestPage)
+async def list_requests(
+    category: str = None, near: str = None, radius_km: float = 50, min_price: float = None, max_price: float = None,
+    sort: str = "recent", mine: bool = False, user_id: int = None, limit: int = 20, cursor: str = None,
+    db: AsyncSession = Depends(get_async_db), viewer: Optional[Principal] = Depends(get_current_user_optional),
+):
+    # min_price/max_price filter on the budget
+    rows, has_more, next_cursor = await _browse(
+        db, ExchangeRequest, viewer, category=category, near=near, radius_km=radius_km, min_price=min_price, max_price=max_price,
+        sort=sort, mine=mine, user_id=user_id, limit=limit, cursor=cursor,
+    )
+    return FastJSONResponse({"requests": [_request_out(r, u) for r, u in rows], "hasMore": has_more, "nextCursor": next_cursor})
+
+@router.get("/exchange-requests/{request_id}", response_model=ExchangeRequestOut)
+async def get_request(request_id: int, db: AsyncSession = Depends(get_async_db)):
+    req = await _get(db, ExchangeRequest, request_id)
+    return FastJSONResponse(_request_out(req, await db.get(User, req.user_id)))
+
+@router.post("/exchange-requests/{request_id}/close", response_model=ExchangeRequestOut)
+async def close_request(request_id: int, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_user)):
+    return FastJSONResponse(_request_out(await _close(db, ExchangeRequest, request_id, user), user))
+
+# ---------------------------
+# Matches
+# ---------------------------
+def _match_out(m: ExchangeMatch, listing=None, candidate=None, request=None, requester=None):
+    return {
+        "id": m.id,
+        "kind": m.kind,
+        "score": m.score,
+        "distanceKm": round(m.distance_km, 1) if m.distance_km is not None else None,
+        "createdAt": m.created_at.isoformat() if m.created_at else None,
+        "request": _request_out(request, requester) if request is not None else None,
+        "listing": _listing_out(listing, candidate) if listing is not None else None,
+        "user": user_summary(candidate),
+    }
+
+# a listing match is only worth showing while the listing is still up
+_live = or_(ExchangeMatch.kind == "user", Listing.status == "active")
+
+@router.get("/exchange-requests/{request_id}/matches", response_model=MatchPage)
+async def request_matches(request_id: int, limit: int = 20, cursor: str = None, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_user)):
+    """Best candidates for one of your requests (ix_exchange_matches_request_score)."""
+    req = await _get(db, ExchangeRequest, request_id)
+    if req.user_id != user.id:
+        raise HTTPException(status_code=403, detail="Request belongs to someone else")
+    limit = _page(limit)
+    q = (
+        select(ExchangeMatch, Listing, User)
+        .join(User, User.id == ExchangeMatch.candidate_user_id)
+        .outerjoin(Listing, and_(ExchangeMatch.kind == "listing", Listing.id == ExchangeMatch.target_id))
+        .where(ExchangeMatch.request_id == request_id, _live)
+        .order_by(ExchangeMatch.score.desc(), ExchangeMatch.id)
+    )
+    if cursor:
+        key = decode_score_cursor(cursor)
+        if not key:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.where(or_(ExchangeMatch.score < key[0], and_(ExchangeMatch.score == key[0], ExchangeMatch.id > key[1])))
+    rows = (await db.execute(q.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return FastJSONResponse({
+        "matches": [_match_out(m, listing, candidate) for m, listing, candidate in rows],
+        "hasMore": has_more,
+        "nextCursor": encode_score_cursor(rows[-1][0].score, rows[-1][0].id) if has_more else None,
+    })
+
+@router.get("/matches", response_model=MatchPage)
+async def my_matches(limit: int = 20, cursor: str = None, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_user)):
+    """Open requests that match you or one of your listings, newest first (ix_exchange_matches_candidate_recent)."""
+    limit = _page(limit)
+    q = (
+        select(ExchangeMatch, ExchangeRequest, User, Listing)
+        .join(ExchangeRequest, ExchangeRequest.id == ExchangeMatch.request_id)
+        .join(User, User.id == ExchangeRequest.user_id)
+        .outerjoin(Listing, and_(ExchangeMatch.kind == "listing", Listing.id == ExchangeMatch.target_id))
+        .where(ExchangeMatch.candidate_user_id == user.id, ExchangeRequest.status == "open", _live)
+        .order_by(ExchangeMatch.created_at.desc(), ExchangeMatch.id.desc())
+    )
+    if cursor:
+        key = decode_cursor(cursor)
+        if not key:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.where(tuple_(ExchangeMatch.created_at, ExchangeMatch.id) < key)
+    rows = (await db.execute(q.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return FastJSONResponse({
+        "matches": [_match_out(m, listing, user, req, requester) for m, req, requester, listing in rows],
+        "hasMore": has_more,
+        "nextCursor": encode_cursor(rows[-1][0].created_at, rows[-1][0].id) if has_more else None,
+    })
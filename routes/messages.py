@@ -0,0 +1,178 @@
+# backend/app/routes/messages.py
+import json
+import math
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, constr
+from sqlalchemy import case, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.core.config import MESSAGE_MAX_LENGTH
+from app.core.database import AsyncSessionLocal, get_async_db
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.security import Principal, _bearer, decode_token, get_current_user, load_principal
+from app.core import messaging
+from app.core.messaging import hub
+from app.core.ratelimit import REJECTED, RULES, limiter
+from app.models.message import Conversation, Message
+from app.models.user import User
+from app.schemas.user import user_summary
+
+router = APIRouter(tags=["messages"])
+
+def _page(limit: int):
+    return min(max(limit, 1), 100)
+
+def _cursor_key(cursor: str):
+    if not cursor:
+        return None
+    key = decode_cursor(cursor)
+    if not key:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+# ---------------------------
+# Inbox: conversations, most recently active first
+# ---------------------------
+@router.get("/messages")
+async def list_conversations(limit: int = 20, cursor: str = None, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_user)):
+    limit = _page(limit)
+    other_id = case((Conversation.user_a == user.id, Conversation.user_b), else_=Conversation.user_a)
+    q = (
+        select(Conversation, Message, User)
+        .join(User, User.id == other_id)
+        .outerjoin(Message, Message.id == Conversation.last_message_id)
+        .where(or_(Conversation.user_a == user.id, Conversation.user_b == user.id))
+        .order_by(Conversation.last_message_at.desc(), Conversation.id.desc())
+    )
+    key = _cursor_key(cursor)
+    if key:
+        q = q.where(tuple_(Conversation.last_message_at, Conversation.id) < key)
+    rows = (await db.execute(q.limit(limit + 1))).unique().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "conversations": [
+            {
+                "id": c.id,
+                "user": user_summary(other),
+                "online": hub.online(other.id),
+                "lastMessage": messaging.message_out(m) if m else None,
+                "lastMessageAt": c.last_message_at.isoformat() if c.last_message_at else None,
+            }
+            for c, m, other in rows
+        ],
+        "hasMore": has_more,
+        "nextCursor": encode_cursor(rows[-1][0].last_message_at, rows[-1][0].id) if has_more else None,
+    }
+
+# ---------------------------
+# History with one user, newest first, keyset paginated
+# ---------------------------
+@router.get("/messages/{user_id}")
+async def get_history(user_id: int, limit: int = 30, cursor: str = None, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_user)):
+    limit = _page(limit)
+    conversation = (await db.execute(messaging.conversation_stmt(user.id, user_id))).scalar_one_or_none()
+    if conversation is None:
+        return {"conversationId": None, "messages": [], "hasMore": False, "nextCursor": None}
+    q = select(Message).where(Message.conversation_id == conversation.id).order_by(Message.created_at.desc(), Message.id.desc())
+    key = _cursor_key(cursor)
+    if key:
+        q = q.where(tuple_(Message.created_at, Message.id) < key)
+    messages = (await db.execute(q.limit(limit + 1))).scalars().all()
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    return {
+        "conversationId": conversation.id,
+        "messages": [messaging.message_out(m) for m in messages],
+        "hasMore": has_more,
+        "nextCursor": encode_cursor(messages[-1].created_at, messages[-1].id) if has_more else None,
+    }
+
+class MessageIn(BaseModel):
+    text: constr(strip_whitespace=True, min_length=1, max_length=MESSAGE_MAX_LENGTH)
+
+# plain HTTP send, for clients without a socket; delivered live the same way
+@router.post("/messages/{user_id}")
+async def send_message(user_id: int, payload: MessageIn, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_user)):
+    return await messaging.send(db, user.id, user_id, payload.text)
+
+# ---------------------------
+# Live socket: ws://host/ws/messages?token=<jwt>
+#   client -> {"type": "send", "to": <userId>, "text": "...", "clientId": "..."} | {"type": "ping"}
+#   server -> {"type": "message", "message": {...}, "clientId"?} | {"type": "pong"} | {"type": "error", ...}
+# Send frames are rate limited and shed like POST /messages/{user_id} ("retryAfter" in seconds).
+# Keepalive pings at the protocol level are left to the server (uvicorn --ws-ping-interval).
+# ---------------------------
+async def _socket_user(ws: WebSocket, token: str):
+    # browsers can't set headers on a WebSocket, so the token usually comes in the query string
+    claims = decode_token(token or _bearer(ws))
+    if not claims or "sub" not in claims:
+        return None
+    try:
+        user_id = int(claims["sub"])
+    except (TypeError, ValueError):
+        return None
+    return await run_in_threadpool(load_principal, user_id)
+
+def _error(conn, detail, client_id=None, retry_after=None):
+    frame = {"type": "error", "detail": detail, "clientId": client_id}
+    if retry_after is not None:
+        frame["retryAfter"] = retry_after
+    conn.offer(json.dumps(frame))
+
+# a send frame is charged like POST /messages/{user_id}, from the same bucket
+SEND_RULE = RULES[("POST", "/messages/{user_id}")]
+
+@router.websocket("/ws/messages")
+async def message_socket(ws: WebSocket, token: str = None):
+    user = await _socket_user(ws, token)
+    if user is None:
+        await ws.close(code=messaging.CLOSE_POLICY)
+        return
+    await ws.accept()
+    conn = hub.connect(ws, user.id)
+    if conn is None:
+        await ws.close(code=messaging.CLOSE_TRY_LATER)
+        return
+    try:
+        while True:
+            raw = await ws.receive_text()
+            try:
+                frame = json.loads(raw)
+            except ValueError:
+                _error(conn, "Invalid JSON")
+                continue
+            if not isinstance(frame, dict):
+                _error(conn, "Expected an object")
+                continue
+            kind = frame.get("type")
+            if kind == "ping":
+                conn.offer('{"type":"pong"}')
+            elif kind == "send":
+                client_id = frame.get("clientId")
+                try:
+                    to = int(frame.get("to"))
+                except (TypeError, ValueError):
+                    _error(conn, "Missing 'to'", client_id)
+                    continue
+                if limiter.store is not None:
+                    status, wait = await limiter.admit(f"u:{user.id}", SEND_RULE)
+                    if status != 200:
+                        _error(conn, REJECTED[status], client_id, max(1, math.ceil(wait)))
+                        continue
+                try:
+                    # a session per message: idle sockets hold no pooled connection
+                    async with AsyncSessionLocal() as db:
+                        try:
+                            await messaging.send(db, user.id, to, frame.get("text"), client_id)
+                        except HTTPException as e:
+                            _error(conn, e.detail, client_id)
+                finally:
+                    if limiter.store is not None:
+                        limiter.release(SEND_RULE.pool)
+            else:
+                _error(conn, f"Unknown frame type {kind!r}")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.disconnect(conn)
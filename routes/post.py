@@ -1,217 +1,372 @@
 # backend/app/routes/posts.py
 import os
-import shutil
-import uuid
-from fastapi import APIRouter, Depends, UploadFile, File, Form, Request, HTTPException
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from typing import Optional
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, Request
+from pydantic import BaseModel, constr
+from sqlalchemy import bindparam, func, select, tuple_
+from sqlalchemy.orm import noload
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db, run_write, write_lock
+from app.core.pagination import encode_cursor, decode_cursor, encode_score_cursor, decode_score_cursor
+from app.core.security import Principal, get_current_user, get_current_user_optional
 from app.models.post import Post
-from app.models.user import User
 from app.models.comment import Comment
-from app.core.config import UPLOAD_DIR
-
-router = APIRouter()
-
-# ensure upload dir exists
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-def _get_user_from_auth(db: Session, request: Request):
-    # Dev-friendly: if Authorization header contains an integer token, treat it as user id.
-    auth = request.headers.get("Authorization")
-    if auth and auth.startswith("Bearer "):
-        token = auth.split(" ", 1)[1]
-        # if token is a plain integer (dev), return that user
-        try:
-            uid = int(token)
-            u = db.query(User).get(uid)
-            if u:
-                return u
-        except Exception:
-            pass
-        # else you might decode JWT here in prod
-    # fallback: return first user (dev convenience)
-    return db.query(User).first()
-
-@router.get("/posts")
-def list_posts(db: Session = Depends(get_db), page: int = 1, limit: int = 12):
-    offset = (page - 1) * limit
-    posts = db.query(Post).order_by(Post.created_at.desc()).offset(offset).limit(limit).all()
-    out = []
-    for p in posts:
-        out.append({
-            "id": p.id,
-            "text": p.text,
-            "media": p.media,
-            "mediaType": p.media_type,
-            "approvals": p.approvals,
-            "shares": p.shares,
-            "createdAt": p.created_at.isoformat() if p.created_at else None,
-            "user": {
-                "id": p.user.id if p.user else None,
-                "first_name": getattr(p.user, "first_name", None),
-                "last_name": getattr(p.user, "last_name", None),
-                "avatarUrl": None
-            }
-        })
-    return {"posts": out, "hasMore": len(out) == limit}
+from app.models.user import User
+from app.core import storage
+from app.core import media as media_jobs
+from app.core.counters import counters, approve_stmt, share_stmt
+from app.core import timeline
+from app.core.cache import response_cache, conditional_json
+from app.core.events import bus
+from app.core.serialization import FastJSONResponse
+from app.schemas.post import PostOut, PostPage, CommentOut, CommentPage, ApprovalOut, ShareOut, BatchOut
+from app.schemas.user import user_summary
 
-@router.post("/posts")
-def create_post(
-    request: Request,
+# Hot paths return FastJSONResponse (or cached bytes) built from plain dicts; the
+# response_model on each route is the documented shape (schemas/post.py).
+# Async end to end: AsyncSession on the shared async engine, uploads streamed through
+# core/storage.py's threadpool writes, bcrypt on its own pool. Sync helpers that take an
+# ORM Session (timeline) run through AsyncSession.run_sync, which does not block the loop.
+router = APIRouter(tags=["posts"])
+
+posts_table = Post.__table__
+comments_table = Comment.__table__
+
+COMMENT_PREVIEW = 2       # latest comments embedded in each feed item
+COMMENT_PAGE_MAX = 100
+COMMENT_MAX_LENGTH = 2000
+
+class CommentIn(BaseModel):
+    text: constr(strip_whitespace=True, min_length=1, max_length=COMMENT_MAX_LENGTH)
+
+def _post_out(p: Post, user=None, comments=()):
+    return {
+        "id": p.id,
+        "text": p.text,
+        "media": p.media,
+        "mediaType": p.media_type,
+        "variants": media_jobs.srcset(p.variants),
+        "approvals": counters.value(p.id, "approvals", p.approvals),
+        "shares": counters.value(p.id, "shares", p.shares),
+        "commentCount": p.comment_count or 0,
+        "comments": list(comments),
+        "createdAt": p.created_at.isoformat() if p.created_at else None,
+        "user": user_summary(user or p.user),
+    }
+
+def _comment_out(c: Comment, user=None):
+    return {
+        "id": c.id,
+        "text": c.text,
+        "createdAt": c.created_at.isoformat() if c.created_at else None,
+        "user": user_summary(user or c.user),
+    }
+
+def _publish_counts(post: Post):
+    # coalesced per tick: viewers get the latest numbers, not one event per click
+    bus.publish(f"post:{post.id}", "counts", {
+        "postId": post.id,
+        "approvals": counters.value(post.id, "approvals", post.approvals),
+        "shares": counters.value(post.id, "shares", post.shares),
+    }, key="counts")
+
+def _feed_tags(payload):
+    rows = payload["posts"]
+    users = {p["user"]["id"] for p in rows if p["user"]} | {c["user"]["id"] for p in rows for c in p["comments"] if c["user"]}
+    return [f"post:{p['id']}" for p in rows] + [f"comments:{p['id']}" for p in rows] + [f"user:{u}" for u in users]
+
+async def _get_post(db: AsyncSession, post_id: int) -> Post:
+    post = await db.get(Post, post_id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return post
+
+@router.get("/posts", response_model=PostPage)
+async def list_posts(page: int = Query(1, ge=1), limit: int = Query(12, ge=1, le=100), cursor: str = None, db: AsyncSession = Depends(get_async_db)):
+    # same for every caller: served from the response cache (core/cache.py)
+    key = response_cache.key("/posts", page=None if cursor else page, limit=limit, cursor=cursor)
+    hit = await response_cache.lookup_async(key)
+    if hit is not None:
+        return hit
+    versions = await response_cache.snapshot_async(("posts",))
+    return await response_cache.store_async(key, await _list_posts(db, page, limit, cursor), versions, _feed_tags)
+
+def _feed_stmt(page: int, limit: int, cursor: str):
+    q = select(Post).order_by(Post.created_at.desc(), Post.id.desc())
+    if cursor:
+        # keyset mode: seek past (created_at, id) instead of walking OFFSET rows
+        key = decode_cursor(cursor)
+        if not key:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.where(tuple_(Post.created_at, Post.id) < key)
+    else:
+        q = q.offset((page - 1) * limit)
+    return q.limit(limit + 1)
+
+def _feed_page(posts, limit: int):
+    """(posts, has_more, next_cursor) from the limit + 1 rows of _feed_stmt."""
+    has_more = len(posts) > limit
+    posts = posts[:limit]
+    return posts, has_more, encode_cursor(posts[-1].created_at, posts[-1].id) if has_more and posts else None
+
+async def _posts_out(db: AsyncSession, posts):
+    # latest comments of the whole page in one query
+    previews = await _comment_previews(db, [p.id for p in posts], COMMENT_PREVIEW)
+    return [_post_out(p, comments=[_comment_out(c) for c in previews.get(p.id, ())]) for p in posts]
+
+async def _list_posts(db: AsyncSession, page: int, limit: int, cursor: str):
+    posts, has_more, next_cursor = _feed_page((await db.execute(_feed_stmt(page, limit, cursor))).scalars().unique().all(), limit)
+    return {"posts": await _posts_out(db, posts), "hasMore": has_more, "nextCursor": next_cursor}
+
+@router.get("/feed", response_model=PostPage)
+async def home_feed(limit: int = Query(12, ge=1, le=100), cursor: str = None, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_user)):
+    # precomputed per-user timeline (core/timeline.py), same shape as /posts
+    key = None
+    if cursor:
+        key = decode_score_cursor(cursor)
+        if not key:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    posts, next_key = await db.run_sync(timeline.read, user.id, key, limit)
+    return FastJSONResponse({
+        "posts": await _posts_out(db, posts),
+        "hasMore": next_key is not None,
+        "nextCursor": encode_score_cursor(*next_key) if next_key else None,
+    })
+
+VIDEO_EXTS = {".mp4", ".mov", ".webm", ".m4v", ".mkv", ".avi"}
+
+@router.post("/posts", response_model=PostOut)
+async def create_post(
     text: str = Form(None),
     media: UploadFile = File(None),
-    db: Session = Depends(get_db)
+    media_url: str = Form(None),       # a finished POST /upload or upload session, instead of `media`
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
 ):
-    user = _get_user_from_auth(db, request)
-    if not user:
-        raise HTTPException(status_code=401, detail="No user available (ensure you have at least one user in DB or provide a token)")
-
-    media_url = None
     media_type = None
-    if media:
-        ext = os.path.splitext(media.filename)[1] or ""
-        fname = f"{uuid.uuid4().hex}{ext}"
-        dest = os.path.join(UPLOAD_DIR, fname)
-        with open(dest, "wb") as f:
-            shutil.copyfileobj(media.file, f)
-        media_url = f"/uploads/{fname}"
+    stored = None
+    if media and media_url:
+        raise HTTPException(status_code=400, detail="Send either media or media_url, not both")
+    if media_url:
+        media_type = "video" if os.path.splitext(media_url)[1].lower() in VIDEO_EXTS else "image"
+    elif media:
+        storage.check_filename(media.filename)
+        # chunked, size-capped copy with the writes on the threadpool
+        stored = await storage.save_upload(media)
+        media_url = stored.url
         media_type = "video" if media.content_type and media.content_type.startswith("video") else "image"
 
     post = Post(user_id=user.id, text=text, media=media_url, media_type=media_type)
-    db.add(post)
-    db.commit()
-    db.refresh(post)
+    async with write_lock(db):
+        if stored:
+            await storage.register_async(db, stored, refs=1)
+        elif media_url and (await db.execute(storage.acquire_stmt(media_url))).rowcount != 1:
+            # takes the reference in the same transaction, so GC cannot reclaim the blob meanwhile
+            await db.rollback()
+            raise HTTPException(status_code=400, detail="media_url must be a file from POST /upload")
+        db.add(post)
+        await db.flush()
+        if media_url:
+            await media_jobs.enqueue(db, post.id, media_url, media_type)
+        await db.run_sync(timeline.fan_out, post.id, user.id)
+        await db.commit()
+    if media_url:
+        media_jobs.wake()
+    await db.refresh(post, ["created_at"])
+    await response_cache.invalidate_async("posts")
+    out = _post_out(post, user)
+    bus.publish("posts", "post", out)
+    return FastJSONResponse(out)
 
-    return {
-        "id": post.id,
-        "text": post.text,
-        "media": post.media,
-        "mediaType": post.media_type,
-        "approvals": post.approvals,
-        "shares": post.shares,
-        "createdAt": post.created_at.isoformat() if post.created_at else None,
-        "user": {
-            "id": user.id,
-            "first_name": user.first_name,
-            "last_name": user.last_name
-        }
+def _approve(conn, post_id: int, user_id: int):
+    return conn.execute(approve_stmt(conn.dialect.name, post_id, user_id)).rowcount == 1
+
+def _share(conn, post_id: int, user_id: int):
+    return conn.execute(share_stmt(conn.dialect.name, post_id, user_id)).rowcount == 1
+
+@router.post("/posts/{post_id}/approve", response_model=ApprovalOut)
+async def approve_post(post_id: int, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_user)):
+    post = await _get_post(db, post_id)
+    # idempotent per user; the counter itself is buffered and flushed in batches (core/counters.py)
+    approved = await run_write(db, _approve, post_id, user.id)
+    if approved:
+        counters.incr(post_id, "approvals")
+        await response_cache.invalidate_async(f"post:{post_id}")
+        _publish_counts(post)
+    return {"approvals": counters.value(post_id, "approvals", post.approvals), "approved": approved}
+
+@router.post("/posts/{post_id}/share", response_model=ShareOut)
+async def share_post(post_id: int, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_user)):
+    post = await _get_post(db, post_id)
+    # once per user, like approvals: repeated clicks cannot inflate the count
+    shared = await run_write(db, _share, post_id, user.id)
+    if shared:
+        counters.incr(post_id, "shares")
+        await response_cache.invalidate_async(f"post:{post_id}")
+        _publish_counts(post)
+    return {"shares": counters.value(post_id, "shares", post.shares), "shared": shared}
+
+@router.get("/posts/{post_id}/comments", response_model=CommentPage)
+async def get_comments(post_id: int, limit: int = Query(20, ge=1, le=COMMENT_PAGE_MAX), cursor: str = None, db: AsyncSession = Depends(get_async_db)):
+    # oldest first, `limit` at a time; nextCursor continues after the last one returned
+    key = response_cache.key(f"/posts/{post_id}/comments", limit=limit, cursor=cursor)
+    hit = await response_cache.lookup_async(key)
+    if hit is not None:
+        return hit
+    versions = await response_cache.snapshot_async((f"comments:{post_id}",))
+    q = select(Comment).where(Comment.post_id == post_id).order_by(Comment.created_at, Comment.id)
+    if cursor:
+        after = decode_cursor(cursor)
+        if not after:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.where(tuple_(Comment.created_at, Comment.id) > after)
+    comments = (await db.execute(q.limit(limit + 1))).scalars().unique().all()
+    has_more = len(comments) > limit
+    comments = comments[:limit]
+    out = {
+        "comments": [_comment_out(c) for c in comments],
+        "hasMore": has_more,
+        "nextCursor": encode_cursor(comments[-1].created_at, comments[-1].id) if has_more else None,
     }
+    return await response_cache.store_async(key, out, versions, lambda out: [f"user:{c['user']['id']}" for c in out["comments"] if c["user"]])
 
-@router.post("/posts/{post_id}/approve")
-def approve_post(post_id: int, request: Request, db: Session = Depends(get_db)):
-    user = _get_user_from_auth(db, request)
-    if not user:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    post = db.query(Post).get(post_id)
-    if not post:
+def _insert_comment(conn, post_id: int, user_id: int, text: str):
+    """(id, created_at) of the new comment, or None when the post does not exist."""
+    # the count moves with the row it counts: same transaction, relative update; no row, no post
+    bumped = conn.execute(
+        posts_table.update().where(posts_table.c.id == post_id).values(comment_count=func.coalesce(posts_table.c.comment_count, 0) + 1)
+    ).rowcount
+    if not bumped:
+        return None
+    return conn.execute(
+        comments_table.insert().values(post_id=post_id, user_id=user_id, text=text)
+        .returning(comments_table.c.id, comments_table.c.created_at)
+    ).one()
+
+@router.post("/posts/{post_id}/comments", response_model=CommentOut)
+async def create_comment(post_id: int, payload: CommentIn, db: AsyncSession = Depends(get_async_db), user: Principal = Depends(get_current_user)):
+    row = await run_write(db, _insert_comment, post_id, user.id, payload.text)
+    if row is None:
         raise HTTPException(status_code=404, detail="Post not found")
-    post.approvals = (post.approvals or 0) + 1
-    db.commit()
-    return {"approvals": post.approvals}
-
-@router.get("/posts/{post_id}/comments")
-def get_comments(post_id: int, db: Session = Depends(get_db)):
-    comments = db.query(Comment).filter(Comment.post_id == post_id).order_by(Comment.created_at).all()
-    out = []
-    for c in comments:
-        out.append({
-            "id": c.id,
-            "text": c.text,
-            "createdAt": c.created_at.isoformat() if c.created_at else None,
-            "user": {
-                "id": c.user.id if c.user else None,
-                "first_name": getattr(c.user, "first_name", None),
-                "last_name": getattr(c.user, "last_name", None),
-            }
-        })
-    return out
+    comment = Comment(id=row.id, post_id=post_id, user_id=user.id, text=payload.text, created_at=row.created_at)
+    await response_cache.invalidate_async(f"comments:{post_id}")
+    out = _comment_out(comment, user)
+    bus.publish(f"post:{post_id}", "comment", {"postId": post_id, "comment": out})
+    return FastJSONResponse(out)
 
-@router.post("/posts/{post_id}/comments")
-def create_comment(post_id: int, request: Request, payload: dict = None, db: Session = Depends(get_db)):
-    # Accept both JSON body and form data 'text' for convenience
-    user = _get_user_from_auth(db, request)
-    if not user:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    body = {}
-    try:
-        body = request.json()  # may fail for form
-    except Exception:
-        pass
-    text = None
-    if body and isinstance(body, dict):
-        text = body.get("text")
-    if not text:
-        # try to read form body
-        form = request._body if hasattr(request, "_body") else None
-    # fallback: read request body raw (fastapi normally passes json)
-    req_text = None
-    try:
-        req = request._json if hasattr(request, "_json") else None
-    except Exception:
-        req = None
+# ---------------------------
+# Dashboard bundle: one round trip for the initial load
+# ---------------------------
+BATCH_PARTS = {"me", "feed", "comments"}
 
-    # Best option: read from Starlette Request body quickly (synchronous; ok small)
+def _id_list(raw: str, cap: int = 100):
     try:
-        import json as _json
-        raw = request.stream()
-    except Exception:
-        pass
+        ids = list(dict.fromkeys(int(p) for p in raw.split(",") if p.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="posts must be a comma-separated list of ids")
+    if len(ids) > cap:
+        raise HTTPException(status_code=400, detail=f"At most {cap} post ids")
+    return ids
 
-    # Simpler approach: accept JSON via fetch -> earlier frontend sends JSON
-    try:
-        j = request.json()
-    except Exception:
-        j = None
+# built once: constructing the windowed select cost more per request than running it
+_ranked = (
+    select(Comment.id, func.row_number().over(
+        partition_by=Comment.post_id, order_by=(Comment.created_at.desc(), Comment.id.desc())
+    ).label("rn"))
+    .where(Comment.post_id.in_(bindparam("post_ids", expanding=True)))
+    .subquery()
+)
+_previews_stmt = (
+    select(Comment)
+    .join(_ranked, _ranked.c.id == Comment.id)
+    .where(_ranked.c.rn <= bindparam("depth"))
+    .order_by(Comment.post_id, Comment.created_at, Comment.id)
+)
+_previews_no_users = _previews_stmt.options(noload(Comment.user))
 
-    # Instead rely on FastAPI auto mapping: if client sends JSON, FastAPI would pass data in function param (not used here)
-    # For reliability, expect frontend sends JSON. We'll manually attempt to parse request._body if available.
-    data = None
-    try:
-        body_bytes = request._body if hasattr(request, "_body") else None
-    except Exception:
-        body_bytes = None
+async def _comment_previews(db: AsyncSession, post_ids, n: int, with_users: bool = True):
+    """Latest `n` comments of each post in one windowed query, oldest first per post."""
+    if not post_ids or n <= 0:
+        return {}
+    q = _previews_stmt if with_users else _previews_no_users
+    out = {}
+    for c in (await db.execute(q, {"post_ids": list(post_ids), "depth": n})).scalars().unique():
+        out.setdefault(c.post_id, []).append(c)
+    return out
 
-    # Ultimately: support standard JSON POSTs that the frontend sends using fetch(JSON).
-    # So we will attempt to read body via request.json() (works with normal FastAPI routing when param declared).
-    try:
-        data = request.json()
-    except Exception:
-        data = None
+@router.get("/batch", response_model=BatchOut)
+async def dashboard_batch(
+    request: Request,
+    include: str = "me,feed,comments",
+    page: int = Query(1, ge=1),
+    limit: int = Query(12, ge=1, le=100),
+    cursor: str = None,
+    posts: str = None,
+    preview: int = 2,
+    db: AsyncSession = Depends(get_async_db),
+    user: Optional[Principal] = Depends(get_current_user_optional),
+):
+    """
+    Any of `me`, `feed` (a /posts page) and `comments` (count + latest `preview` comments for
+    `posts`, defaulting to the feed page) from one session. Authors are loaded once for the
+    whole payload instead of joined per row. ETag / If-None-Match -> 304 when nothing changed.
+    """
+    parts = {p.strip() for p in include.split(",") if p.strip()}
+    if parts - BATCH_PARTS:
+        raise HTTPException(status_code=400, detail=f"Unknown include: {', '.join(sorted(parts - BATCH_PARTS))}")
+    if "me" in parts and user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
 
-    # Best compromise: read text from request._body_bytes (if any) or expect payload param
-    text_val = None
-    try:
-        # If FastAPI passed json parsed into payload param (rare), use it.
-        if isinstance(payload, dict):
-            text_val = payload.get("text")
-    except Exception:
-        pass
+    feed, has_more, next_cursor = [], False, None
+    if "feed" in parts:
+        rows = (await db.execute(_feed_stmt(page, limit, cursor).options(noload(Post.user)))).scalars().all()
+        feed, has_more, next_cursor = _feed_page(rows, limit)
 
-    # If still None, attempt to parse request body synchronously from request._body (Starlette internal)
-    try:
-        body_raw = request._body if hasattr(request, "_body") else None
-        if body_raw:
-            import json as _json
-            parsed = _json.loads(body_raw.decode() if isinstance(body_raw, (bytes, bytearray)) else body_raw)
-            text_val = text_val or parsed.get("text")
-    except Exception:
-        pass
-
-    if not text_val:
-        # Last fallback: raise
-        raise HTTPException(status_code=400, detail="Missing 'text' in body")
-
-    comment = Comment(post_id=post_id, user_id=user.id, text=text_val)
-    db.add(comment)
-    db.commit()
-    db.refresh(comment)
-    return {
-        "id": comment.id,
-        "text": comment.text,
-        "createdAt": comment.created_at.isoformat() if comment.created_at else None,
-        "user": {
-            "id": user.id,
-            "first_name": user.first_name,
-            "last_name": user.last_name
+    # feed items embed their latest COMMENT_PREVIEW comments, same as GET /posts;
+    # one windowed query covers those and the `comments` part
+    counts = {p.id: p.comment_count or 0 for p in feed}
+    post_ids = _id_list(posts) if posts else list(counts)
+    preview = min(max(preview, 0), 10) if "comments" in parts else 0
+    wanted = set(counts) | (set(post_ids) if preview else set())
+    depth = max(preview, COMMENT_PREVIEW if feed else 0)
+    previews = await _comment_previews(db, sorted(wanted), depth, with_users=False)
+    if "comments" in parts:
+        missing = [pid for pid in post_ids if pid not in counts]
+        if missing:
+            counts.update((await db.execute(select(Post.id, Post.comment_count).where(Post.id.in_(missing)))).all())
+
+    # one lookup for every author on the page, plus the caller
+    author_ids = {p.user_id for p in feed} | {c.user_id for cs in previews.values() for c in cs}
+    if "me" in parts:
+        author_ids.add(user.id)
+    users = {}
+    if author_ids:
+        users = {u.id: u for u in (await db.execute(select(User).where(User.id.in_(author_ids)))).scalars()}
+
+    out = {}
+    if "me" in parts:
+        me = users.get(user.id)
+        out["me"] = {
+            **user_summary(me or user),
+            "email": user.email,
+            "role": user.role,
+            "location": me.location if me else None,
+        }
+    if "feed" in parts:
+        out["feed"] = {
+            "posts": [
+                _post_out(p, users.get(p.user_id), [_comment_out(c, users.get(c.user_id)) for c in previews.get(p.id, [])[-COMMENT_PREVIEW:]])
+                for p in feed
+            ],
+            "hasMore": has_more,
+            "nextCursor": next_cursor,
+        }
+    if "comments" in parts:
+        out["comments"] = {
+            str(pid): {
+                "count": counts.get(pid) or 0,
+                "preview": [_comment_out(c, users.get(c.user_id)) for c in previews.get(pid, [])[-preview:]] if preview else [],
+            }
+            for pid in post_ids
         }
-    }
\ No newline at end of file
+    return conditional_json(request, out)
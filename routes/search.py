@@ -4,16 +4,29 @@ from typing import List, Optional
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.user import User   # ORM model (adjust import if your user model path differs)
+from app.models.listing import Listing
+from app.core import search, geo
+from app.core.search import parse_skills
+from app.core.serialization import FastJSONResponse
+from app.schemas.user import UserSearchPage, SearchHit, NearbyHit
 import json
 
 router = APIRouter(tags=["search"])
 
-def _normalize(v: Optional[str]):
-    if not v:
-        return None
-    return v.strip().lower()
+def _user_out(u: User):
+    return {
+        "id": u.id,
+        "firstName": getattr(u, "first_name", "") or "",
+        "lastName": getattr(u, "last_name", "") or "",
+        "role": getattr(u, "role", "") or "",
+        "location": getattr(u, "location", "") or "",
+        "skills": parse_skills(getattr(u, "skills", None)),
+        "avatarUrl": getattr(u, "avatar_url", None) or "",
+        "photos": json.loads(u.photos) if getattr(u, "photos", None) else [],
+        "companies": json.loads(u.companies) if getattr(u, "companies", None) else []
+    }
 
-@router.get("/users")
+@router.get("/users", response_model=UserSearchPage)
 def search_users(
     skill: Optional[str] = Query(None, description="Skill to search for"),
     location: Optional[str] = Query(None, description="City or province"),
@@ -23,74 +36,67 @@ def search_users(
 ):
     """
     Return discoverable users matching skill/location.
-    Matches are case-insensitive and partial.
+    Skills match by prefix, locations by word prefix; with both filters either may match.
+    Filtering and paging run in the database (user_skills + users_fts).
     """
-    skill_q = _normalize(skill)
-    loc_q = _normalize(location)
+    users = search.search_users(db, skill=skill, location=location, offset=(page - 1) * limit, limit=limit)
+    matched = [_user_out(u) for u in users]
+    return FastJSONResponse({"results": matched, "page": page, "limit": limit, "count": len(matched)})
 
-    # load discoverable users (simple approach)
-    q = db.query(User).filter(getattr(User, "discoverable", True) == True)
-
-    # Basic fetch (we'll filter in python for skills array matching)
-    offset = (page - 1) * limit
-    users = q.offset(offset).limit(limit * 5).all()  # fetch a bit extra to allow filtering
-
-    matched = []
+@router.get("/search", response_model=List[SearchHit])
+def search_all(
+    q: str = Query("", description="Free text: name, skill, location or bio"),
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """Ranked global search used by the dashboard search box."""
+    users = search.search_text(db, q, offset=(page - 1) * limit, limit=limit)
+    out = []
     for u in users:
-        # Read skills field — support JSON string or comma-separated string
-        raw_skills = []
-        if getattr(u, "skills", None):
-            try:
-                if isinstance(u.skills, (list, tuple)):
-                    raw_skills = u.skills
-                else:
-                    raw_skills = json.loads(u.skills)
-            except Exception:
-                # fallback: comma separated
-                raw_skills = [s.strip() for s in str(u.skills).split(",") if s.strip()]
-
-        user_location = (getattr(u, "location", "") or "").lower()
+        skills = parse_skills(u.skills)
+        out.append({
+            "id": u.id,
+            "type": "user",
+            "name": f"{u.first_name or ''} {u.last_name or ''}".strip() or "User",
+            "skill": skills[0] if skills else (u.role or ""),
+            "location": u.location or "",
+        })
+    return FastJSONResponse(out)
 
-        skill_match = False
-        loc_match = False
+@router.get("/nearby", response_model=List[NearbyHit])
+def nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=50),
+    radius_km: float = Query(300, gt=0, le=2000),
+    db: Session = Depends(get_db),
+):
+    """k nearest discoverable users and active listings, walking the geo_cell grid outwards from (lat, lng)."""
+    def fetch_users(cells):
+        return db.query(User).filter(User.geo_cell.in_(cells), User.discoverable == True).all()
 
-        if skill_q:
-            for s in raw_skills:
-                if skill_q in str(s).lower():
-                    skill_match = True
-                    break
+    def fetch_listings(cells):
+        return db.query(Listing).filter(Listing.status == "active", Listing.geo_cell.in_(cells)).all()
 
-        if loc_q:
-            if loc_q in user_location:
-                loc_match = True
+    # each walk stops at its own k; the merged k nearest are among those 2k
+    hits = geo.nearest(fetch_users, lat, lng, k=k, max_km=radius_km) + geo.nearest(fetch_listings, lat, lng, k=k, max_km=radius_km)
+    hits.sort(key=lambda t: t[0])
 
-        # include user if:
-        # - both queries present: at least one must match (OR semantics)
-        # - only one present: must match that one
-        include = False
-        if skill_q and loc_q:
-            include = skill_match or loc_match
-        elif skill_q:
-            include = skill_match
-        elif loc_q:
-            include = loc_match
+    out = []
+    for dist, obj in hits[:k]:
+        if isinstance(obj, Listing):
+            kind, title = "listing", f"{obj.title} — {obj.category}"
         else:
-            include = True  # no filters -> include
-
-        if include:
-            matched.append({
-                "id": u.id,
-                "firstName": getattr(u, "first_name", "") or "",
-                "lastName": getattr(u, "last_name", "") or "",
-                "role": getattr(u, "role", "") or "",
-                "location": getattr(u, "location", "") or "",
-                "skills": raw_skills,
-                "avatarUrl": getattr(u, "avatar_url", None) or "",
-                "photos": json.loads(u.photos) if getattr(u, "photos", None) else [],
-                "companies": json.loads(u.companies) if getattr(u, "companies", None) else []
-            })
-
-        if len(matched) >= limit:
-            break
-
-    return {"results": matched, "page": page, "limit": limit, "count": len(matched)}
\ No newline at end of file
+            skills = parse_skills(obj.skills)
+            name = f"{obj.first_name or ''} {obj.last_name or ''}".strip() or "User"
+            kind, title = "user", f"{name} — {skills[0]}" if skills else name
+        out.append({
+            "id": obj.id,
+            "type": kind,
+            "title": title,
+            "location": obj.location or "",
+            "distanceKm": round(dist, 1),
+            "distance": f"{dist:.1f} km",
+        })
+    return FastJSONResponse(out)
@@ -1,9 +1,13 @@
+import json
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
-from app.core.config import get_db, UPLOAD_DIR
+from app.core.database import get_db
 from app.models.user import User
-import os
-import shutil
+from app.core.search import index_user, parse_skills
+from app.core.geo import locate_user
+from app.core import storage, timeline
+from app.core.security import Principal, get_current_user
+from app.core.cache import response_cache
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -12,61 +16,113 @@ router = APIRouter(prefix="/users", tags=["Users"])
 # ---------------------------
 @router.get("/{user_id}")
 def get_user_profile(user_id: int, db: Session = Depends(get_db)):
+    key = response_cache.key(f"/users/{user_id}")
+    return response_cache.json_response(key, lambda: _profile(db, user_id), (f"user:{user_id}",))
+
+def _profile(db: Session, user_id: int):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    return _profile_out(user)
+
+def _profile_out(user: User):
+    # same shape for GET and the PUT response, so a client can cache either
     return {
         "id": user.id,
-        "name": user.name,
+        "firstName": user.first_name or "",
+        "lastName": user.last_name or "",
         "email": user.email,
-        "skill": user.skill,
+        "skills": parse_skills(user.skills),
         "location": user.location,
-        "portfolio_url": user.portfolio_url,
-        "photo_url": f"/uploads/{user.photo}" if user.photo else None
+        "bio": user.bio,
+        "avatarUrl": user.avatar_url,
+        "photos": _photo_list(user.photos),
     }
 
 # ---------------------------
 # Update user profile
 # ---------------------------
+MAX_PHOTOS = 24
+
+def _photo_list(raw):
+    try:
+        value = json.loads(raw) if raw else []
+    except ValueError:
+        return []
+    return value if isinstance(value, list) else []
+
+def _gallery(raw: str):
+    try:
+        urls = json.loads(raw)
+    except ValueError:
+        urls = None
+    if not isinstance(urls, list) or not all(isinstance(u, str) and u.startswith("/uploads/") for u in urls):
+        raise HTTPException(status_code=400, detail="photos must be a JSON list of /uploads/ URLs")
+    urls = list(dict.fromkeys(urls))
+    if len(urls) > MAX_PHOTOS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PHOTOS} photos")
+    return urls
+
+def _media_refs(user: User):
+    return [user.avatar_url, *_photo_list(user.photos)]
+
 @router.put("/{user_id}")
 def update_user_profile(
     user_id: int,
     name: str = Form(...),
     skill: str = Form(...),
     location: str = Form(...),
-    portfolio_url: str = Form(None),
     photo: UploadFile = File(None),
-    db: Session = Depends(get_db)
+    photos: str = Form(None),          # JSON list of URLs from POST /upload (the gallery)
+    db: Session = Depends(get_db),
+    me: Principal = Depends(get_current_user),
 ):
+    if me.id != user_id:
+        raise HTTPException(status_code=403, detail="You can only edit your own profile")
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Update basic fields
-    user.name = name
-    user.skill = skill
+    first, _, last = name.strip().partition(" ")
+    user.first_name, user.last_name = first or None, last.strip() or None
+    user.skills = json.dumps(parse_skills(skill))
     user.location = location
-    user.portfolio_url = portfolio_url
+    locate_user(user)
 
-    # Handle photo upload
+    # Avatar and gallery: each blob the profile points at holds one reference, so GC keeps it
+    # and a replaced or removed one is released
+    before = _media_refs(user)
+    if photos is not None:
+        user.photos = json.dumps(_gallery(photos))
     if photo:
-        photo_filename = f"user_{user_id}_{photo.filename}"
-        file_path = os.path.join(UPLOAD_DIR, photo_filename)
-
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(photo.file, buffer)
-
-        user.photo = photo_filename
+        storage.check_filename(photo.filename, storage.IMAGE_EXT)
+        stored = storage.register(db, storage.save_upload_sync(photo), refs=0)
+        user.avatar_url = stored.url
+    storage.swap(db, before, _media_refs(user))
 
+    # user_skills / users_fts move with the profile, in the same transaction
+    db.flush()
+    index_user(db, user)
     db.commit()
     db.refresh(user)
+    # GET /users/{id} and every cached feed page showing this author (see routes/post.py _feed_tags)
+    response_cache.invalidate(f"user:{user_id}")
 
-    return {"message": "Profile updated successfully", "user": {
-        "id": user.id,
-        "name": user.name,
-        "skill": user.skill,
-        "location": user.location,
-        "portfolio_url": user.portfolio_url,
-        "photo_url": f"/uploads/{user.photo}" if user.photo else None
-    }}
\ No newline at end of file
+    return {"message": "Profile updated successfully", "user": _profile_out(user)}
+
+# ---------------------------
+# Follow / unfollow (feeds the home timeline, see core/timeline.py)
+# ---------------------------
+@router.post("/{user_id}/follow")
+def follow_user(user_id: int, db: Session = Depends(get_db), me: Principal = Depends(get_current_user)):
+    if user_id == me.id:
+        raise HTTPException(status_code=400, detail="Cannot follow yourself")
+    if not db.query(User.id).filter(User.id == user_id).first():
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"following": True, "changed": timeline.follow(db, me.id, user_id)}
+
+@router.delete("/{user_id}/follow")
+def unfollow_user(user_id: int, db: Session = Depends(get_db), me: Principal = Depends(get_current_user)):
+    return {"following": False, "changed": timeline.unfollow(db, me.id, user_id)}
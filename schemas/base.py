@@ -0,0 +1,7 @@
+# app/schemas/base.py
+from pydantic import BaseModel, ConfigDict
+from pydantic.alias_generators import to_camel
+
+class CamelModel(BaseModel):
+    """Response shapes: snake_case in Python, camelCase on the wire (what the frontend reads)."""
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True, from_attributes=True)
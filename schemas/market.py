@@ -0,0 +1,60 @@
+# app/schemas/market.py
+from datetime import datetime
+from typing import List, Optional
+from app.schemas.base import CamelModel
+from app.schemas.user import UserSummary
+
+# ---------------------------
+# Responses (routes/market.py), built as dicts like schemas/post.py. Prices are rand on
+# the wire and whole cents in the database; None means negotiable / swap.
+# ---------------------------
+class ListingOut(CamelModel):
+    id: int
+    category: str
+    title: str
+    description: Optional[str] = None
+    price: Optional[float] = None
+    quantity: Optional[int] = None
+    unit: Optional[str] = None
+    location: Optional[str] = None
+    status: str
+    created_at: Optional[datetime] = None
+    user: Optional[UserSummary] = None
+
+class ListingPage(CamelModel):
+    listings: List[ListingOut]
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+class ExchangeRequestOut(CamelModel):
+    id: int
+    category: str
+    title: str
+    description: Optional[str] = None
+    max_price: Optional[float] = None
+    quantity: Optional[int] = None
+    unit: Optional[str] = None
+    location: Optional[str] = None
+    status: str
+    created_at: Optional[datetime] = None
+    user: Optional[UserSummary] = None
+
+class ExchangeRequestPage(CamelModel):
+    requests: List[ExchangeRequestOut]
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+class MatchOut(CamelModel):
+    id: int
+    kind: str                                   # "listing" or "user"
+    score: int
+    distance_km: Optional[float] = None
+    created_at: Optional[datetime] = None
+    request: Optional[ExchangeRequestOut] = None
+    listing: Optional[ListingOut] = None        # kind == "listing"
+    user: Optional[UserSummary] = None          # the candidate
+
+class MatchPage(CamelModel):
+    matches: List[MatchOut]
+    has_more: bool
+    next_cursor: Optional[str] = None
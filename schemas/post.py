@@ -1,7 +1,9 @@
 # app/schemas/post.py
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
+from app.schemas.base import CamelModel
+from app.schemas.user import UserSummary, MeOut
 
 class PostBase(BaseModel):
     text: Optional[str] = None
@@ -10,12 +12,50 @@ class PostBase(BaseModel):
 class PostCreate(PostBase):
     pass
 
-class PostOut(PostBase):
+# ---------------------------
+# Responses (routes/post.py). Handlers build these shapes as dicts and return them as
+# FastJSONResponse; the models are the documented contract (OpenAPI, bench_serialization).
+# ---------------------------
+class CommentOut(CamelModel):
     id: int
-    media_type: Optional[str]
+    text: str
+    created_at: Optional[datetime] = None
+    user: Optional[UserSummary] = None
+
+class PostOut(PostBase, CamelModel):
+    id: int
+    media_type: Optional[str] = None
+    variants: Optional[Dict[str, str]] = None   # "image/webp" -> srcset, "poster" -> url
+    approvals: int = 0
+    shares: int = 0
+    comment_count: int = 0
+    comments: List[CommentOut] = []             # latest few, oldest first
+    created_at: Optional[datetime] = None
+    user: Optional[UserSummary] = None
+
+class PostPage(CamelModel):
+    posts: List[PostOut]
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+class CommentPage(CamelModel):
+    comments: List[CommentOut]
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+class ApprovalOut(CamelModel):
     approvals: int
+    approved: bool
+
+class ShareOut(CamelModel):
     shares: int
-    created_at: datetime
+    shared: bool          # False when this user had already shared it
+
+class CommentPreview(CamelModel):
+    count: int
+    preview: List[CommentOut]
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+class BatchOut(CamelModel):
+    me: Optional[MeOut] = None
+    feed: Optional[PostPage] = None
+    comments: Optional[Dict[str, CommentPreview]] = None   # keyed by post id
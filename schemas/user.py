@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 
 class UserBase(BaseModel):
     name: str
@@ -15,8 +15,7 @@ class UserLogin(BaseModel):
 class UserResponse(UserBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
         
 from pydantic import BaseModel
 
@@ -29,5 +28,62 @@ class UserBase(BaseModel):
 
 class UserOut(UserBase):
     id: int
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+# ---------------------------
+# Responses (camelCase on the wire)
+# ---------------------------
+from typing import List, Optional
+from app.schemas.base import CamelModel
+
+class UserSummary(CamelModel):
+    """Author block embedded in posts, comments and conversations."""
+    id: int
+    first_name: str = ""
+    last_name: str = ""
+    name: str = ""
+    avatar_url: Optional[str] = None
+
+def user_summary(u):
+    """UserSummary as a dict, from a User row or a Principal; the routes build responses as dicts."""
+    if u is None:
+        return None
+    first, last = u.first_name or "", u.last_name or ""
+    return {"id": u.id, "firstName": first, "lastName": last, "name": f"{first} {last}".strip(), "avatarUrl": u.avatar_url}
+
+class MeOut(UserSummary):
+    email: str
+    role: Optional[str] = None
+    location: Optional[str] = None
+
+class SearchUserOut(CamelModel):
+    id: int
+    first_name: str = ""
+    last_name: str = ""
+    role: str = ""
+    location: str = ""
+    skills: List[str] = []
+    avatar_url: str = ""
+    photos: list = []
+    companies: list = []
+
+class UserSearchPage(CamelModel):
+    results: List[SearchUserOut]
+    page: int
+    limit: int
+    count: int
+
+class SearchHit(CamelModel):
+    id: int
+    type: str
+    name: str
+    skill: str = ""
+    location: str = ""
+
+class NearbyHit(CamelModel):
+    id: int
+    type: str
+    title: str
+    location: str = ""
+    distance_km: float
+    distance: str
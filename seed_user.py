@@ -1,34 +1,203 @@
 # backend/seed_user.py
-from app.core.database import SessionLocal, engine, Base
+"""
+Seed data.
+
+    python seed_user.py                 # one test user: test@example.com / password123
+    python seed_user.py --bulk [--users 100000] [--posts 1000000] [--comments 5000000]
+
+--bulk writes the benchmark dataset (benchmarks/suite.py) into an empty database:
+users with skills JSON (plus their user_skills / users_fts rows), posts spread over a
+year and comments skewed towards recent posts. Rows go in as driver-level executemany
+batches, or COPY on PostgreSQL; comment counts are filled in by counters.backfill_comment_counts.
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from app.core.database import SessionLocal, engine
+from app.core.security import get_password_hash
+from app.core.counters import backfill_comment_counts
+from app.core import migrations
 from app.models.user import User
-from passlib.context import CryptContext
-
-# Setup password hasher
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# Ensure tables exist
-Base.metadata.create_all(bind=engine)
-
-db = SessionLocal()
-
-# Check if any user exists
-user = db.query(User).first()
-if user:
-    print(f"User already exists: {user.id} - {user.first_name} {user.last_name}")
-else:
-    # Create a test user with a hashed password
-    hashed_password = pwd_context.hash("password123")
-    test_user = User(
-        first_name="Test",
-        last_name="User",
-        email="test@example.com",
-        password_hash=hashed_password,
-        role="Developer",
-        location="Limpopo"
-    )
-    db.add(test_user)
-    db.commit()
-    db.refresh(test_user)
-    print(f"✅ Created test user: {test_user.id} - {test_user.first_name} {test_user.last_name}")
-
-db.close()
\ No newline at end of file
+from app.models.user_skill import UserSkill
+from app.models.post import Post
+from app.models.comment import Comment
+
+SKILLS = [
+    "Welding", "Plumbing", "Electrical", "Carpentry", "Bricklaying", "Tiling", "Painting", "Roofing",
+    "App Development", "Web Design", "UI Design", "Data Analysis", "Bookkeeping", "Tutoring",
+    "Sewing", "Hairdressing", "Catering", "Photography", "Video Editing", "Driving", "Mechanics",
+    "Maize Farming", "Poultry", "Cattle", "Irrigation", "Beekeeping", "Solar Installation", "Gardening",
+]
+LOCATIONS = [
+    "Polokwane, Limpopo", "Tzaneen, Limpopo", "Thohoyandou, Limpopo", "Pretoria, Gauteng", "Johannesburg, Gauteng",
+    "Soweto, Gauteng", "Durban, KwaZulu-Natal", "Pietermaritzburg, KwaZulu-Natal", "Cape Town, Western Cape",
+    "George, Western Cape", "Gqeberha, Eastern Cape", "Mthatha, Eastern Cape", "Bloemfontein, Free State",
+    "Mbombela, Mpumalanga", "Rustenburg, North West", "Kimberley, Northern Cape",
+]
+FIRST = ["Thabo", "Lerato", "Sipho", "Naledi", "Kagiso", "Ayanda", "Pieter", "Anika", "Themba", "Zanele", "Johan", "Palesa"]
+LAST = ["Mokoena", "Dlamini", "Nkosi", "Botha", "Khumalo", "van der Merwe", "Naidoo", "Mahlangu", "Ndlovu", "Pillay"]
+WORDS = ("offering looking for trade swap maize labour skills weekend tools bakkie transport training help "
+         "available urgent quote fair price community project harvest repairs design lessons").split()
+
+# matches the Timestamp column type's SQLite storage format (core/database.py)
+_TS = "%Y-%m-%d %H:%M:%S"
+
+try:
+    import psycopg2  # noqa: F401  (COPY path)
+except ImportError:
+    psycopg2 = None
+
+
+def seed_test_user():
+    migrations.upgrade()
+    db = SessionLocal()
+    try:
+        user = db.query(User).first()
+        if user:
+            print(f"User already exists: {user.id} - {user.first_name} {user.last_name}")
+            return
+        test_user = User(
+            first_name="Test",
+            last_name="User",
+            email="test@example.com",
+            password_hash=get_password_hash("password123"),
+            role="Developer",
+            location="Limpopo",
+        )
+        db.add(test_user)
+        db.commit()
+        db.refresh(test_user)
+        print(f"✅ Created test user: {test_user.id} - {test_user.first_name} {test_user.last_name}")
+    finally:
+        db.close()
+
+
+# ---------------------------
+# Bulk path
+# ---------------------------
+def _sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime(_TS)
+    return value
+
+
+def _insert(conn, table: str, columns, rows):
+    """Append `rows` (tuples in `columns` order) with the fastest path the backend offers."""
+    if not rows:
+        return
+    if conn.dialect.name == "postgresql" and psycopg2 is not None:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row in rows:
+            writer.writerow([_csv_value(v) for v in row])
+        buf.seek(0)
+        with conn.connection.driver_connection.cursor() as cur:
+            cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+        return
+    mark = "?" if conn.dialect.paramstyle == "qmark" else "%s"
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([mark] * len(columns))})"
+    if conn.dialect.name == "sqlite":
+        rows = [tuple(v.strftime(_TS) if isinstance(v, datetime) else v for v in row) for row in rows]
+    conn.exec_driver_sql(sql, rows)
+
+
+def _batches(total: int, size: int):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def seed_bulk(users: int = 100_000, posts: int = 1_000_000, comments: int = 5_000_000,
+              batch: int = 50_000, seed: int = 42, log=print):
+    """Write the benchmark dataset into empty tables; returns row counts and timings."""
+    rng = random.Random(seed)
+    migrations.upgrade()
+    password_hash = get_password_hash("password123")   # one hash for everyone: bcrypt is not what we measure
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    year = 365 * 24 * 3600
+    timings = {}
+
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        fts = conn.dialect.name == "sqlite"
+
+        t = time.perf_counter()
+        for start, n in _batches(users, batch):
+            rows, skill_rows, fts_rows = [], [], []
+            for uid in range(start + 1, start + n + 1):
+                first, last = rng.choice(FIRST), rng.choice(LAST)
+                skills = rng.sample(SKILLS, rng.randint(1, 4))
+                location = rng.choice(LOCATIONS)
+                bio = _sentence(rng, 12)
+                rows.append((uid, first, last, f"user{uid}@seed.local", password_hash, rng.choice(["client", "provider"]),
+                             location, bio, json.dumps(skills), True, 0))
+                lowered = sorted({s.lower() for s in skills})
+                skill_rows.extend((uid, s) for s in lowered)
+                if fts:
+                    fts_rows.append((uid, f"{first} {last}", bio, location, " ".join(lowered)))
+            _insert(conn, "users", ("id", "first_name", "last_name", "email", "password_hash", "role",
+                                    "location", "bio", "skills", "discoverable", "follower_count"), rows)
+            _insert(conn, UserSkill.__tablename__, ("user_id", "skill"), skill_rows)
+            if fts_rows:
+                conn.exec_driver_sql("INSERT INTO users_fts(rowid, name, bio, location, skills) VALUES (?, ?, ?, ?, ?)", fts_rows)
+        timings["users"] = time.perf_counter() - t
+        log(f"users: {users} in {timings['users']:.1f}s")
+
+        # ids follow time, oldest first, so /posts newest-first pages walk from the top id down
+        t = time.perf_counter()
+        step = year / max(posts, 1)
+        for start, n in _batches(posts, batch):
+            rows = [
+                (pid, rng.randint(1, users), _sentence(rng, rng.randint(6, 30)), now - timedelta(seconds=int((posts - pid) * step)), 0, 0, 0)
+                for pid in range(start + 1, start + n + 1)
+            ]
+            _insert(conn, Post.__tablename__, ("id", "user_id", "text", "created_at", "approvals", "shares", "comment_count"), rows)
+        timings["posts"] = time.perf_counter() - t
+        log(f"posts: {posts} in {timings['posts']:.1f}s")
+
+        # most comments land on recent posts (random() ** 3 piles up near the newest ids)
+        t = time.perf_counter()
+        for start, n in _batches(comments, batch):
+            rows = []
+            for cid in range(start + 1, start + n + 1):
+                pid = posts - int(posts * rng.random() ** 3)
+                created = now - timedelta(seconds=int((posts - pid) * step)) + timedelta(seconds=rng.randint(1, 3 * 24 * 3600))
+                rows.append((cid, pid, rng.randint(1, users), _sentence(rng, rng.randint(3, 15)), min(created, now)))
+            _insert(conn, Comment.__tablename__, ("id", "post_id", "user_id", "text", "created_at"), rows)
+        timings["comments"] = time.perf_counter() - t
+        log(f"comments: {comments} in {timings['comments']:.1f}s")
+
+    t = time.perf_counter()
+    db = SessionLocal()
+    try:
+        backfill_comment_counts(db)
+    finally:
+        db.close()
+    timings["comment_counts"] = time.perf_counter() - t
+    log(f"comment counts in {timings['comment_counts']:.1f}s")
+    return {"users": users, "posts": posts, "comments": comments, "seconds": {k: round(v, 2) for k, v in timings.items()}}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--bulk", action="store_true", help="write the benchmark dataset")
+    ap.add_argument("--users", type=int, default=100_000)
+    ap.add_argument("--posts", type=int, default=1_000_000)
+    ap.add_argument("--comments", type=int, default=5_000_000)
+    ap.add_argument("--batch", type=int, default=50_000)
+    ap.add_argument("--seed", type=int, default=42, help="random seed (same seed, same dataset)")
+    args = ap.parse_args()
+    if args.bulk:
+        print(seed_bulk(args.users, args.posts, args.comments, args.batch, args.seed))
+    else:
+        seed_test_user()
@@ -0,0 +1,37 @@
+# backend/app/tests/conftest.py
+import os
+import tempfile
+
+# config is read at import: point the app at a throwaway database before anything imports it
+_tmp = tempfile.mkdtemp(prefix="vsx-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["UPLOAD_DIR"] = os.path.join(_tmp, "uploads")
+os.environ["RESPONSE_CACHE_BACKEND"] = "off"
+os.environ["RATE_LIMIT_ENABLED"] = "0"
+os.environ["BCRYPT_ROUNDS"] = "4"      # the minimum cost; hashing speed is not under test
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def migrated():
+    from app.core import migrations
+    migrations.upgrade()
+
+
+@pytest.fixture(scope="session")
+def client(migrated):
+    # no lifespan: background workers would share the database with the assertions
+    from app.main import create_app
+    return TestClient(create_app())
+
+
+@pytest.fixture
+def db(migrated):
+    from app.core.database import SessionLocal
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,32 @@
+# backend/app/tests/test_auth.py
+from passlib.context import CryptContext
+from app.models.user import User
+
+
+def test_register_then_login(client):
+    r = client.post("/register", json={"first_name": "Lindiwe", "last_name": "Mokoena", "email": "lindiwe@example.com", "password": "s3cret!"})
+    assert r.status_code == 200, r.text
+    user_id = r.json()["id"]
+    assert client.post("/register", json={"email": "lindiwe@example.com", "password": "again"}).status_code == 400
+
+    r = client.post("/login", json={"email": "lindiwe@example.com", "password": "s3cret!"})
+    assert r.status_code == 200, r.text
+    assert r.json()["user"]["id"] == user_id and r.json()["token"]
+    assert client.post("/login", json={"email": "lindiwe@example.com", "password": "wrong"}).status_code == 401
+
+    # indexed for search at registration
+    r = client.get("/search", params={"q": "Lindiwe"})
+    assert r.status_code == 200, r.text
+    assert user_id in [hit["id"] for hit in r.json()]
+
+
+def test_login_upgrades_a_hash_with_another_cost(client, db):
+    old = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=5).hash("pa55word")
+    u = User(first_name="Sipho", email="sipho@example.com", password_hash=old)
+    db.add(u)
+    db.commit()
+
+    r = client.post("/login", json={"email": "sipho@example.com", "password": "pa55word"})
+    assert r.status_code == 200, r.text
+    db.refresh(u)
+    assert u.password_hash != old and u.password_hash.startswith("$2b$04$")
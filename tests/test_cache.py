@@ -0,0 +1,53 @@
+# backend/app/tests/test_cache.py
+import threading
+import anyio
+from app.core.cache import MemoryBackend, ResponseCache
+
+
+def test_tag_versions_are_bounded_and_eviction_never_serves_stale():
+    cache = ResponseCache(MemoryBackend(maxsize=100, max_tags=10))
+    versions = cache.snapshot(("post:1",))
+    cache.store("/posts/1", {"v": 1}, versions)
+    assert cache.get("/posts/1") is not None
+
+    cache.invalidate("post:1")
+    for i in range(2, 50):      # pushes post:1 out of the tag LRU
+        cache.invalidate(f"post:{i}")
+    assert len(cache.backend._versions) == 10
+    assert cache.get("/posts/1") is None
+
+    # an entry built after the evictions is served until its own tag moves
+    cache.store("/posts/1", {"v": 2}, cache.snapshot(("post:1",)))
+    assert cache.get("/posts/1") is not None
+    cache.invalidate("post:1")
+    assert cache.get("/posts/1") is None
+
+
+class _BlockingBackend(MemoryBackend):
+    blocking = True
+
+    def __init__(self):
+        super().__init__(maxsize=10)
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+    def bump(self, tags):
+        self.threads.add(threading.get_ident())
+        super().bump(tags)
+
+
+def test_blocking_backend_is_called_off_the_event_loop():
+    backend = _BlockingBackend()
+    cache = ResponseCache(backend)
+
+    async def main():
+        loop_thread = threading.get_ident()
+        await cache.lookup_async("/posts")
+        await cache.invalidate_async("posts")
+        return loop_thread
+
+    loop_thread = anyio.run(main)
+    assert backend.threads and loop_thread not in backend.threads
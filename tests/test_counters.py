@@ -0,0 +1,91 @@
+# backend/app/tests/test_counters.py
+import asyncio
+import uuid
+import pytest
+from sqlalchemy import func, select, text
+from app.core.counters import CounterBuffer, counters, reconcile
+from app.core.security import create_access_token
+from app.models.approval import PostApproval
+from app.models.post import Post
+from app.models.share import PostShare
+from app.models.user import User
+
+
+@pytest.fixture
+def post(db):
+    author = User(first_name="Count", email=f"count-{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(author)
+    db.flush()
+    p = Post(user_id=author.id, text="count me", approvals=0, shares=0)
+    db.add(p)
+    db.commit()
+    return p
+
+
+@pytest.fixture
+def headers(db):
+    u = User(first_name="Clicker", email=f"clicker-{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(u)
+    db.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(u.id)})}"}
+
+
+def _rows(db, model, post_id):
+    return db.execute(select(func.count()).select_from(model).where(model.post_id == post_id)).scalar()
+
+
+def test_approving_twice_counts_once(client, db, post, headers):
+    first = client.post(f"/posts/{post.id}/approve", headers=headers).json()
+    second = client.post(f"/posts/{post.id}/approve", headers=headers).json()
+    assert first == {"approvals": 1, "approved": True}
+    assert second == {"approvals": 1, "approved": False}
+    assert _rows(db, PostApproval, post.id) == 1
+    counters.flush(db)
+    db.refresh(post)
+    assert post.approvals == 1
+
+
+def test_sharing_twice_counts_once(client, db, post, headers):
+    assert client.post(f"/posts/{post.id}/share", headers=headers).json() == {"shares": 1, "shared": True}
+    assert client.post(f"/posts/{post.id}/share", headers=headers).json() == {"shares": 1, "shared": False}
+    assert _rows(db, PostShare, post.id) == 1
+    counters.flush(db)
+    db.refresh(post)
+    assert post.shares == 1
+
+
+def test_buffer_flushes_at_the_high_water_mark(db, post):
+    buffer = CounterBuffer(threshold=3)
+
+    async def main():
+        task = asyncio.create_task(buffer.flush_forever(interval=3600))
+        await asyncio.sleep(0)
+        buffer.incr(post.id, "shares")
+        buffer.incr(post.id, "shares")
+        await asyncio.sleep(0.2)
+        assert buffer.flushes == 0      # below the threshold: waits for the interval
+        buffer.incr(post.id, "approvals")
+        for _ in range(100):
+            if buffer.flushes:
+                break
+            await asyncio.sleep(0.02)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    assert buffer.flushes == 1 and buffer.pending() == 0
+    db.refresh(post)
+    assert (post.shares, post.approvals) == (2, 1)
+
+
+def test_reconcile_keeps_approvals_that_have_no_rows(db, post, headers):
+    legacy = Post(user_id=post.user_id, text="from before post_approvals", approvals=7)
+    db.add(legacy)
+    db.execute(text("UPDATE posts SET approvals = 9 WHERE id = :id"), {"id": post.id})
+    db.add(PostApproval(post_id=post.id, user_id=post.user_id))
+    db.commit()
+    reconcile(db)
+    db.refresh(legacy)
+    db.refresh(post)
+    assert legacy.approvals == 7
+    assert post.approvals == 1
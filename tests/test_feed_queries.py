@@ -0,0 +1,74 @@
+# backend/app/tests/test_feed_queries.py
+import uuid
+import pytest
+from sqlalchemy import event
+from app.core.database import async_engine
+from app.core.security import create_access_token
+from app.models.comment import Comment
+from app.models.post import Post
+from app.models.user import User
+from app.routes.posts import COMMENT_PAGE_MAX
+
+POSTS = 40
+COMMENTS_PER_POST = 3
+
+
+@pytest.fixture(scope="module")
+def feed(migrated):
+    # every post by a different author, commented on by yet others: any per-row lookup shows up
+    from app.core.database import SessionLocal
+    with SessionLocal() as db:
+        users = [User(first_name=f"F{i}", last_name="Q", email=f"feed{i}@example.com", password_hash="x") for i in range(POSTS + COMMENTS_PER_POST)]
+        db.add_all(users)
+        db.flush()
+        for i in range(POSTS):
+            post = Post(user_id=users[i].id, text=f"post {i}", comment_count=COMMENTS_PER_POST)
+            db.add(post)
+            db.flush()
+            db.add_all(Comment(post_id=post.id, user_id=users[POSTS + j].id, text=f"c{j}") for j in range(COMMENTS_PER_POST))
+        db.commit()
+
+
+def _statements(client, path):
+    seen = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        r = client.get(path)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+    assert r.status_code == 200, r.text
+    return r.json(), seen
+
+
+@pytest.mark.parametrize("path", ["/posts?limit={n}", "/batch?include=feed&limit={n}"])
+def test_feed_statement_count_is_constant_in_page_size(client, feed, path):
+    counts = {}
+    for n in (1, 5, 20, POSTS):
+        body, seen = _statements(client, path.format(n=n))
+        posts = body["posts"] if "posts" in body else body["feed"]["posts"]
+        assert len(posts) == n
+        assert all(len(p["comments"]) == 2 and p["user"] for p in posts)
+        counts[n] = len(seen)
+    assert len(set(counts.values())) == 1, counts
+
+
+def test_cursor_page_costs_the_same(client, feed):
+    first, seen_first = _statements(client, "/posts?limit=10")
+    second, seen_second = _statements(client, f"/posts?limit=10&cursor={first['nextCursor']}")
+    assert {p["id"] for p in first["posts"]}.isdisjoint(p["id"] for p in second["posts"])
+    assert len(seen_first) == len(seen_second)
+
+
+@pytest.mark.parametrize("path", ["/posts?limit={n}", "/feed?limit={n}", "/posts/1/comments?limit={n}"])
+def test_out_of_range_limits_are_rejected(client, db, path):
+    # pages are capped by validation, not clamped silently
+    user = User(first_name="Limit", email=f"limit-{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    for n in (0, -1, COMMENT_PAGE_MAX + 1 if "comments" in path else 101):
+        assert client.get(path.format(n=n), headers=headers).status_code == 422, n
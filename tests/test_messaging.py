@@ -0,0 +1,84 @@
+# backend/app/tests/test_messaging.py
+import asyncio
+import pytest
+from app.core import messaging
+from app.core.config import MESSAGE_SEND_QUEUE_SIZE
+from app.core.messaging import Hub
+from app.core.security import create_access_token
+from app.models.user import User
+
+
+@pytest.fixture(scope="module")
+def pair(migrated):
+    from app.core.database import SessionLocal
+    with SessionLocal() as db:
+        a = User(first_name="Ayanda", email="ayanda@example.com", password_hash="x")
+        b = User(first_name="Bongani", email="bongani@example.com", password_hash="x")
+        db.add_all([a, b])
+        db.commit()
+        return a.id, b.id
+
+
+def test_socket_rejects_bad_frames_and_keeps_going(client, pair):
+    me, other = pair
+    with client.websocket_connect(f"/ws/messages?token={create_access_token({'sub': str(me)})}") as ws:
+        ws.send_json({"type": "send", "to": other, "text": 5, "clientId": "c1"})
+        frame = ws.receive_json()
+        assert frame == {"type": "error", "detail": "'text' must be a string", "clientId": "c1"}
+
+        ws.send_text("not json")
+        assert ws.receive_json()["detail"] == "Invalid JSON"
+        ws.send_json({"type": "send", "text": "hi"})
+        assert ws.receive_json()["detail"] == "Missing 'to'"
+
+        # the loop is still alive and still delivers
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+        ws.send_json({"type": "send", "to": other, "text": " sawubona ", "clientId": "c2"})
+        frame = ws.receive_json()
+        assert frame["type"] == "message" and frame["clientId"] == "c2"
+        assert frame["message"]["text"] == "sawubona" and frame["message"]["senderId"] == me
+
+
+def test_socket_needs_a_token(client):
+    from starlette.websockets import WebSocketDisconnect
+    with pytest.raises(WebSocketDisconnect) as e:
+        with client.websocket_connect("/ws/messages?token=nope") as ws:
+            ws.receive_json()
+    assert e.value.code == messaging.CLOSE_POLICY
+
+
+class _StuckSocket:
+    """A client that stopped reading: the first send never completes."""
+
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+
+    async def send_text(self, text):
+        self.sent.append(text)
+        await asyncio.Event().wait()
+
+    async def close(self, code):
+        self.closed_with = code
+
+
+def test_slow_consumer_is_bounded_and_dropped():
+    async def main():
+        hub = Hub()
+        ws = _StuckSocket()
+        conn = hub.connect(ws, 7)
+        # one frame in flight, MESSAGE_SEND_QUEUE_SIZE queued behind it; the next one overflows
+        for i in range(MESSAGE_SEND_QUEUE_SIZE + 1):
+            assert hub.publish([7], {"n": i}) == 1
+            await asyncio.sleep(0)
+            assert len(conn._frames) <= MESSAGE_SEND_QUEUE_SIZE
+        assert hub.publish([7], {"n": "overflow"}) == 0
+        await asyncio.sleep(0)
+        return hub, conn, ws
+
+    hub, conn, ws = asyncio.run(main())
+    assert conn.closed and not conn._frames
+    assert ws.closed_with == messaging.CLOSE_TRY_LATER
+    assert len(ws.sent) == 1
+    assert hub.dropped_slow == 1 and hub.connections == 0 and not hub.online(7)
@@ -0,0 +1,78 @@
+# backend/app/tests/test_migrations.py
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from app.core import migrations
+from app.core.database import Base
+from app.models import approval, comment, follow, listing, media, message, post, share, timeline, user, user_skill  # noqa: F401
+
+MARKETPLACE = {"listings", "exchange_requests", "exchange_matches"}
+
+# what a database built by the old create_all-at-import looked like before the counters,
+# geo and follower columns existed: no schema_version, no indexes beyond the primary keys
+LEGACY = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, first_name VARCHAR(120), last_name VARCHAR(120), "
+    "email VARCHAR(320) NOT NULL UNIQUE, password_hash VARCHAR(256) NOT NULL, role VARCHAR(50), "
+    "location VARCHAR(200), bio TEXT, skills TEXT)",
+    "CREATE TABLE posts (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users (id), text TEXT, "
+    "media VARCHAR(1024), media_type VARCHAR(32), approvals INTEGER, shares INTEGER, created_at DATETIME)",
+    "CREATE TABLE comments (id INTEGER PRIMARY KEY, post_id INTEGER REFERENCES posts (id), "
+    "user_id INTEGER REFERENCES users (id), text TEXT NOT NULL, created_at DATETIME)",
+    "INSERT INTO users (id, first_name, email, password_hash, location, skills) "
+    "VALUES (1, 'Thandi', 'thandi@example.com', 'x', 'Soweto', '[\"Plumbing\", \"tiling\"]')",
+    "INSERT INTO users (id, first_name, email, password_hash, skills) VALUES (2, 'Pieter', 'pieter@example.com', 'x', 'welding, Carpentry')",
+    "INSERT INTO posts (id, user_id, text, approvals, shares) VALUES (1, 1, 'hello', 7, 2)",
+    "INSERT INTO comments (post_id, user_id, text) VALUES (1, 1, 'first')",
+]
+
+
+@pytest.fixture
+def fresh_engine(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    yield eng
+    eng.dispose()
+
+
+def _assert_matches_models(eng):
+    insp = inspect(eng)
+    for table in Base.metadata.sorted_tables:
+        assert insp.has_table(table.name), table.name
+        have = {c["name"] for c in insp.get_columns(table.name)}
+        assert {c.name for c in table.columns} <= have, table.name
+        indexes = {i["name"] for i in insp.get_indexes(table.name)}
+        assert {i.name for i in table.indexes} <= indexes, table.name
+
+
+def test_baseline_is_the_first_release_schema(fresh_engine, monkeypatch):
+    # the models have moved on since; migration 1 must not pick that up
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:1])
+    assert migrations.upgrade(fresh_engine) == 1
+    insp = inspect(fresh_engine)
+    assert not MARKETPLACE & set(insp.get_table_names())
+    assert "avatar_url" not in {c["name"] for c in insp.get_columns("users")}
+    assert "failures" not in {c["name"] for c in insp.get_columns("media_jobs")}
+    assert insp.has_table("users_fts")
+
+
+def test_upgrade_from_empty(fresh_engine):
+    assert migrations.upgrade(fresh_engine) == migrations.LATEST
+    _assert_matches_models(fresh_engine)
+    assert migrations.pending(fresh_engine) == []
+    assert migrations.upgrade(fresh_engine) == 0
+
+
+def test_upgrade_from_legacy(fresh_engine):
+    with fresh_engine.begin() as conn:
+        for sql in LEGACY:
+            conn.execute(text(sql))
+    assert migrations.upgrade(fresh_engine) == migrations.LATEST
+    _assert_matches_models(fresh_engine)
+    migrations.check(fresh_engine)
+    with fresh_engine.connect() as conn:
+        row = conn.execute(text("SELECT approvals, shares, comment_count FROM posts WHERE id = 1")).one()
+        assert tuple(row) == (7, 2, 1)
+        skills = conn.execute(text("SELECT user_id, skill FROM user_skills ORDER BY user_id, skill")).all()
+        assert [tuple(r) for r in skills] == [(1, "plumbing"), (1, "tiling"), (2, "carpentry"), (2, "welding")]
+        hits = conn.execute(text("SELECT rowid FROM users_fts WHERE users_fts MATCH 'location : sowet*'")).scalars().all()
+        assert hits == [1]
+        assert conn.execute(text("SELECT discoverable, follower_count FROM users WHERE id = 1")).one() == (1, 0)
+        assert conn.execute(text("SELECT count(*) FROM comments")).scalar() == 1
@@ -0,0 +1,84 @@
+# backend/app/tests/test_ratelimit.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core import ratelimit
+from app.core.ratelimit import POOLS, Limiter, MemoryStore, RateLimitMiddleware, _LocalRedis, TOKEN_BUCKET_LUA
+from app.core.security import create_access_token
+from app.models.user import User
+
+# POST /messages/{user_id} costs 2: a burst of 4 is two messages
+BURST = 4
+
+
+@pytest.fixture
+def small_bucket(monkeypatch):
+    monkeypatch.setitem(ratelimit.BUCKETS, "api", (0.001, BURST))
+
+
+@pytest.fixture
+def limited(small_bucket):
+    limiter = Limiter(MemoryStore())
+    app = FastAPI()
+
+    @app.post("/messages/{user_id}")
+    async def send(user_id: int):
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, limits=limiter)
+    return limiter, TestClient(app)
+
+
+def test_empty_bucket_is_429_with_retry_after(limited):
+    limiter, client = limited
+    assert [client.post("/messages/2").status_code for _ in range(2)] == [200, 200]
+    r = client.post("/messages/2")
+    assert r.status_code == 429 and r.json() == {"detail": "Too many requests"}
+    assert int(r.headers["retry-after"]) >= 1
+    assert limiter.stats()["limited"] == 1
+    # a limited request does not keep its in-flight slot
+    assert limiter.stats()["inflight_all"] == 0 and limiter.stats()["inflight_write"] == 0
+
+
+def test_shed_requests_are_not_charged(limited):
+    limiter, client = limited
+    limiter._inflight["write"] = POOLS["write"]
+    for _ in range(10):
+        r = client.post("/messages/2")
+        assert r.status_code == 503 and r.headers["retry-after"] == "1"
+    limiter._inflight["write"] = 0
+    assert limiter.stats()["shed"] == 10
+    # the bucket is still full: a whole burst goes through
+    assert [client.post("/messages/2").status_code for _ in range(2)] == [200, 200]
+    assert client.post("/messages/2").status_code == 429
+
+
+def test_local_redis_refuses_other_scripts():
+    with pytest.raises(NotImplementedError):
+        _LocalRedis().register_script("return 1")
+    assert _LocalRedis().register_script(TOKEN_BUCKET_LUA)
+
+
+@pytest.fixture
+def sender(migrated):
+    from app.core.database import SessionLocal
+    with SessionLocal() as db:
+        a = User(first_name="Rate", email="rate-a@example.com", password_hash="x")
+        b = User(first_name="Limit", email="rate-b@example.com", password_hash="x")
+        db.add_all([a, b])
+        db.commit()
+        return create_access_token({"sub": str(a.id)}), b.id
+
+
+def test_socket_sends_share_the_http_bucket(client, sender, small_bucket, monkeypatch):
+    token, other = sender
+    monkeypatch.setattr(ratelimit.limiter, "store", MemoryStore())
+    with client.websocket_connect(f"/ws/messages?token={token}") as ws:
+        for i in range(3):
+            ws.send_json({"type": "send", "to": other, "text": f"m{i}", "clientId": str(i)})
+        frames = [ws.receive_json() for _ in range(3)]
+    assert [f["type"] for f in frames] == ["message", "message", "error"]
+    assert frames[2]["detail"] == "Too many requests" and frames[2]["retryAfter"] >= 1
+    assert ratelimit.limiter.stats()["inflight_write"] == 0
+    r = client.post(f"/messages/{other}", json={"text": "over http"}, headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 429
@@ -0,0 +1,34 @@
+# backend/app/tests/test_search.py
+import uuid
+from app.core.geo import cell_of
+from app.models.listing import Listing
+from app.models.user import User
+
+# somewhere no other test puts anything
+LAT, LNG = -29.5, 31.2
+
+
+def _place(obj, dlat):
+    obj.lat, obj.lng = LAT + dlat, LNG
+    obj.geo_cell = cell_of(obj.lat, obj.lng)
+    return obj
+
+
+def test_nearby_mixes_users_and_active_listings_by_distance(client, db):
+    near = _place(User(first_name="Near", email=f"near-{uuid.uuid4().hex[:8]}@example.com", password_hash="x", discoverable=True), 0.01)
+    far = _place(User(first_name="Far", email=f"far-{uuid.uuid4().hex[:8]}@example.com", password_hash="x", discoverable=True), 0.10)
+    db.add_all([near, far])
+    db.flush()
+    middle = _place(Listing(user_id=far.id, category="maize", title="Maize", status="active"), 0.05)
+    closed = _place(Listing(user_id=far.id, category="maize", title="Sold", status="closed"), 0.0)
+    db.add_all([middle, closed])
+    db.commit()
+
+    r = client.get("/nearby", params={"lat": LAT, "lng": LNG, "radius_km": 20})
+    assert r.status_code == 200
+    hits = [(h["type"], h["id"]) for h in r.json()]
+    assert hits == [("user", near.id), ("listing", middle.id), ("user", far.id)]
+    assert r.json()[1]["title"] == "Maize — maize"
+
+    r = client.get("/nearby", params={"lat": LAT, "lng": LNG, "radius_km": 20, "k": 2})
+    assert [(h["type"], h["id"]) for h in r.json()] == [("user", near.id), ("listing", middle.id)]
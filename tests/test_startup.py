@@ -0,0 +1,64 @@
+# backend/app/tests/test_startup.py
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+import app.main
+
+# same defaults as benchmarks/bench_startup.py, which breaks a regression down by module
+IMPORT_BUDGET_MS = 1500
+FIRST_REQUEST_BUDGET_MS = 2500
+RUNS = 3
+
+APP_ROOT = str(Path(app.main.__file__).parent.parent)
+
+IMPORT_ONLY = """
+import sys
+import app.main
+touched = [m for m in ("app.core.database", "sqlalchemy") if m in sys.modules]
+assert not touched, f"import app.main loaded {touched}"
+"""
+
+FIRST_REQUEST = """
+import asyncio, httpx
+from app.main import create_app
+
+async def main():
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://boot") as client:
+            r = await client.get("/")
+            assert r.status_code == 200, r.status_code
+
+asyncio.run(main())
+"""
+
+
+def _best_ms(code: str, env) -> float:
+    # fresh interpreters, best of RUNS: the budget is about our code, not a noisy neighbour
+    best = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        r = subprocess.run([sys.executable, "-c", code], env=env, cwd=APP_ROOT, capture_output=True, text=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        assert r.returncode == 0, r.stderr
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _env(**overrides):
+    return {**os.environ, "PYTHONPATH": APP_ROOT, **overrides}
+
+
+def test_import_touches_nothing_and_is_within_budget(tmp_path):
+    missing = tmp_path / "not-created"
+    env = _env(DATABASE_URL=f"sqlite:///{missing / 'app.db'}", UPLOAD_DIR=str(missing / "uploads"))
+    ms = _best_ms(IMPORT_ONLY, env)
+    assert not missing.exists(), "import app.main created files"
+    assert ms <= IMPORT_BUDGET_MS, f"import app.main took {ms:.0f} ms (budget {IMPORT_BUDGET_MS} ms)"
+
+
+def test_first_request_is_within_budget(migrated):
+    ms = _best_ms(FIRST_REQUEST, _env())
+    assert ms <= FIRST_REQUEST_BUDGET_MS, f"first request took {ms:.0f} ms (budget {FIRST_REQUEST_BUDGET_MS} ms)"
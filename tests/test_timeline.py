@@ -0,0 +1,57 @@
+# backend/app/tests/test_timeline.py
+import uuid
+import pytest
+from sqlalchemy import func, select
+from app.core import timeline
+from app.core.database import SessionLocal
+from app.core.security import create_access_token
+from app.models.follow import Follow
+from app.models.post import Post
+from app.models.timeline import TimelineEntry
+from app.models.user import User
+
+
+def _user(db, name):
+    u = User(first_name=name, email=f"{name.lower()}-{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(u)
+    db.commit()
+    return u
+
+
+@pytest.fixture
+def pair(db):
+    author, reader = _user(db, "Author"), _user(db, "Reader")
+    db.add(Post(user_id=author.id, text="backfilled"))
+    db.commit()
+    return author, reader
+
+
+def _follows(db, follower_id, followee_id):
+    return db.execute(
+        select(func.count()).select_from(Follow).where(Follow.follower_id == follower_id, Follow.followee_id == followee_id)
+    ).scalar()
+
+
+def test_following_twice_counts_once(client, db, pair):
+    author, reader = pair
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(reader.id)})}"}
+    first = client.post(f"/users/{author.id}/follow", headers=headers)
+    second = client.post(f"/users/{author.id}/follow", headers=headers)
+    assert first.json() == {"following": True, "changed": True}
+    assert second.status_code == 200 and second.json() == {"following": True, "changed": False}
+    db.expire_all()
+    assert _follows(db, reader.id, author.id) == 1
+    assert db.get(User, author.id).follower_count == 1
+    entries = db.execute(select(func.count()).select_from(TimelineEntry).where(TimelineEntry.user_id == reader.id)).scalar()
+    assert entries == 1
+
+
+def test_losing_a_follow_race_is_a_no_op(db, pair):
+    author, reader = pair
+    # the other request committed between our user lookups and the insert
+    with SessionLocal() as other:
+        assert timeline.follow(other, reader.id, author.id) is True
+    assert timeline.follow(db, reader.id, author.id) is False
+    db.expire_all()
+    assert _follows(db, reader.id, author.id) == 1
+    assert db.get(User, author.id).follower_count == 1
@@ -0,0 +1,81 @@
+# backend/app/tests/test_uploads.py
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from app.core.config import MAX_UPLOAD_BYTES
+from app.core.storage import UploadLimitMiddleware
+from app.core.security import create_access_token
+from app.models.user import User
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 64
+
+
+@pytest.fixture(scope="module")
+def auth(migrated):
+    from app.core.database import SessionLocal
+    with SessionLocal() as db:
+        u = User(first_name="Upload", email="uploader@example.com", password_hash="x")
+        db.add(u)
+        db.commit()
+        return u.id, {"Authorization": f"Bearer {create_access_token({'sub': str(u.id)})}"}
+
+
+@pytest.mark.parametrize("name", ["page.html", "logo.svg", "noext"])
+def test_every_upload_path_rejects_other_types(client, auth, name):
+    user_id, headers = auth
+    files = {"file": (name, b"<script>alert(1)</script>", "text/html")}
+    assert client.post("/upload", files=files).status_code == 400
+    assert client.post("/upload/sessions", json={"filename": name}).status_code == 400
+    r = client.post("/posts", data={"text": "hi"}, files={"media": files["file"]}, headers=headers)
+    assert r.status_code == 400, r.text
+    r = client.put(f"/users/{user_id}", data={"name": "Upload Me", "skill": "x", "location": "Durban"}, files={"photo": files["file"]}, headers=headers)
+    assert r.status_code == 400, r.text
+
+
+def test_avatar_must_be_an_image(client, auth):
+    user_id, headers = auth
+    form = {"name": "Upload Me", "skill": "x", "location": "Durban"}
+    r = client.put(f"/users/{user_id}", data=form, files={"photo": ("clip.mp4", b"\0" * 16, "video/mp4")}, headers=headers)
+    assert r.status_code == 400
+    r = client.put(f"/users/{user_id}", data=form, files={"photo": ("me.png", PNG, "image/png")}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["user"]["avatarUrl"].endswith(".png")
+
+
+@pytest.mark.parametrize("method,path", [("POST", "/upload"), ("POST", "/posts"), ("PUT", "/users/{user_id}")])
+def test_oversized_bodies_are_refused_before_parsing(client, auth, method, path):
+    user_id, headers = auth
+    too_big = str(MAX_UPLOAD_BYTES + 1024 * 1024)
+    r = client.request(method, path.format(user_id=user_id), content=b"", headers={**headers, "Content-Length": too_big, "Content-Type": "multipart/form-data; boundary=x"})
+    assert r.status_code == 413, r.text
+
+
+def test_chunked_body_is_cut_off_at_the_cap():
+    app = FastAPI()
+    read = []
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        read.append(file.filename)
+        return {}
+
+    app.add_middleware(UploadLimitMiddleware, max_bytes=4096)
+    client = TestClient(app)
+    body = b"--x\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.png\"\r\n\r\n" + b"\0" * 10000 + b"\r\n--x--\r\n"
+    chunks = (body[i:i + 1024] for i in range(0, len(body), 1024))   # a generator: no Content-Length
+    r = client.post("/upload", content=chunks, headers={"Content-Type": "multipart/form-data; boundary=x"})
+    assert r.status_code == 413 and not read
+    r = client.post("/upload", files={"file": ("a.png", PNG, "image/png")})
+    assert r.status_code == 200 and read == ["a.png"]
+
+
+def test_avatar_shows_wherever_the_author_does(client, auth):
+    user_id, headers = auth
+    form = {"name": "Upload Me", "skill": "x", "location": "Durban"}
+    avatar = client.put(f"/users/{user_id}", data=form, files={"photo": ("face.png", PNG + b"face", "image/png")}, headers=headers).json()["user"]["avatarUrl"]
+    post = client.post("/posts", data={"text": "with a face"}, headers=headers).json()
+    assert post["user"]["avatarUrl"] == avatar
+    comment = client.post(f"/posts/{post['id']}/comments", json={"text": "me again"}, headers=headers).json()
+    assert comment["user"]["avatarUrl"] == avatar
+    feed = client.get("/posts", params={"limit": 50}).json()["posts"]
+    assert next(p for p in feed if p["id"] == post["id"])["user"]["avatarUrl"] == avatar
@@ -1,34 +1,55 @@
 # backend/app/routes/uploads.py
-import os, uuid
-from fastapi import APIRouter, File, UploadFile, Request, HTTPException
-from app.core.config import UPLOAD_DIR
-from pathlib import Path
+from fastapi import APIRouter, File, UploadFile, Request, Depends
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db, write_lock
+from app.core import storage
 from fastapi.responses import JSONResponse
 
 router = APIRouter()
 
-Path(UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
-
-ALLOWED_EXT = {"png","jpg","jpeg","gif","webp","mp4","mov","webm"}
-
-def _secure_filename(filename: str):
-    if "." not in filename:
-        raise HTTPException(status_code=400, detail="Invalid filename")
-    ext = filename.rsplit(".",1)[1].lower()
-    if ext not in ALLOWED_EXT:
-        raise HTTPException(status_code=400, detail="Invalid file type")
-    return f"{uuid.uuid4().hex}.{ext}"
+async def _register(db: AsyncSession, stored):
+    async with write_lock(db):
+        stored = await storage.register_async(db, stored, refs=0)
+        await db.commit()
+    return stored
 
 @router.post("/upload")
-async def upload_file(request: Request, file: UploadFile = File(...)):
+async def upload_file(request: Request, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
     # optional auth check (you can expand)
-    # save
-    name = _secure_filename(file.filename)
-    dest = os.path.join(UPLOAD_DIR, name)
-    try:
-        with open(dest, "wb") as f:
-            content = await file.read()
-            f.write(content)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Failed to save file")
-    return {"url": f"/uploads/{name}"}
\ No newline at end of file
+    storage.check_filename(file.filename)
+    stored = await storage.save_upload(file)
+    # unreferenced until a post/profile points at it; GC reclaims it after the grace period
+    stored = await _register(db, stored)
+    return {"url": stored.url, "size": stored.size, "sha256": stored.sha256}
+
+# ---------------------------
+# Resumable uploads for flaky connections:
+#   POST /upload/sessions                 -> {uploadId, offset, chunkSize}
+#   GET  /upload/sessions/{id}            -> {offset}  (where to resume)
+#   PUT  /upload/sessions/{id}?offset=N   raw bytes body, appended at N
+#   POST /upload/sessions/{id}/finalize   -> {url}
+# ---------------------------
+class SessionIn(BaseModel):
+    filename: str
+    size: int | None = None
+    content_type: str | None = None
+
+@router.post("/upload/sessions")
+def create_upload_session(payload: SessionIn):
+    storage.check_filename(payload.filename)
+    return storage.create_session(payload.filename, payload.size, payload.content_type)
+
+@router.get("/upload/sessions/{upload_id}")
+def get_upload_session(upload_id: str):
+    return storage.session_info(upload_id)
+
+@router.put("/upload/sessions/{upload_id}")
+async def append_upload_chunk(upload_id: str, request: Request, offset: int = 0):
+    return await storage.append_chunk(upload_id, offset, request.stream())
+
+@router.post("/upload/sessions/{upload_id}/finalize")
+async def finalize_upload_session(upload_id: str, sha256: str = None, db: AsyncSession = Depends(get_async_db)):
+    stored = await storage.finalize_session(upload_id, sha256)
+    stored = await _register(db, stored)
+    return {"url": stored.url, "size": stored.size, "sha256": stored.sha256}